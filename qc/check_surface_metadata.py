@@ -2,39 +2,23 @@ import os
 from pathlib import Path
 import pandas as pd
 import argparse
-import numpy as np
 
 from webviz_4d._datainput.common import read_config
+from webviz_4d._datainput._catalog import SurfaceCatalog, get_interval_times
 
 
-def get_real_runpath(surface_metadata, data, iteration, real, map_type, interval_mode):
+def get_real_runpath(surface_catalog, data, iteration, real, map_type, interval_mode):
     selected_interval = data["date"]
     name = data["name"]
     attribute = data["attr"]
 
-    if interval_mode == "normal":
-        time2 = selected_interval[0:10]
-        time1 = selected_interval[11:]
-    else:
-        time1 = selected_interval[0:10]
-        time2 = selected_interval[11:]
+    time1, time2 = get_interval_times(selected_interval, interval_mode)
 
-    surface_metadata.replace(np.nan, "", inplace=True)
+    path = surface_catalog.get_filename(
+        map_type, real, iteration, name, attribute, time1, time2
+    )
 
-    try:
-        selected_metadata = surface_metadata[
-            (surface_metadata["fmu_id.realization"] == real)
-            & (surface_metadata["fmu_id.iteration"] == iteration)
-            & (surface_metadata["map_type"] == map_type)
-            & (surface_metadata["data.time.t1"] == time1)
-            & (surface_metadata["data.time.t2"] == time2)
-            & (surface_metadata["data.name"] == name)
-            & (surface_metadata["data.attribute"] == attribute)
-        ]
-
-        path = selected_metadata["filename"].values[0]
-
-    except:
+    if path is None:
         path = ""
 
     return path
@@ -54,6 +38,7 @@ shared_settings = config.get("shared_settings")
 surface_metadata_file = shared_settings.get("surface_metadata_file")
 surface_metadata_file = os.path.join(config_folder, surface_metadata_file)
 surface_metadata = pd.read_csv(surface_metadata_file)
+surface_catalog = SurfaceCatalog(surface_metadata)
 
 data = {
     "name": "draupne_fm_1",
@@ -66,7 +51,7 @@ map_type = "simulated"
 interval_mode = "normal"
 
 filepath = get_real_runpath(
-    surface_metadata, data, iteration, real, map_type, interval_mode
+    surface_catalog, data, iteration, real, map_type, interval_mode
 )
 
 print("Map file:", filepath)
@@ -22,11 +22,16 @@ setup(
     entry_points={
         "webviz_config_plugins": [
             "SurfaceViewer4D = webviz_4d.plugins:SurfaceViewer4D",
-        ]
+        ],
+        "console_scripts": [
+            "webviz_4d_surface_scaling = webviz_4d._datainput._surface_scaling:main",
+        ],
     },
     install_requires=[
         "webviz-config==0.6.3",
+        "dash>=2.9",  # Promises in clientside callbacks and dash.Patch
         "xtgeo==4.0.0",
+        "matplotlib>=3.6",  # matplotlib.colormaps and Colormap.resampled
         "pillow>=10.4",
         "webviz-subsurface-components==0.4.15",
     ],
@@ -0,0 +1,83 @@
+"""Benchmark of the surface image encoders: encode time against payload size
+
+Run from the repository root:
+    python tests/benchmarks/benchmark_image_encoding.py
+"""
+
+import time
+import base64
+import argparse
+import numpy as np
+
+from webviz_4d._datainput.image_processing import ImageEncoder, array_to_image
+
+
+def make_grid(nrow, ncol, seed=0):
+    """Return a smooth 4D-like difference map with noise and undefined areas"""
+    rng = np.random.default_rng(seed)
+    y_coord, x_coord = np.mgrid[0:nrow, 0:ncol]
+
+    values = (
+        np.sin(x_coord / 37.0) * np.cos(y_coord / 53.0)
+        + 0.5 * np.sin((x_coord + y_coord) / 11.0)
+        + 0.1 * rng.standard_normal((nrow, ncol))
+    )
+
+    # Undefined nodes outside an elliptic field outline
+    outside = ((x_coord - ncol / 2) / (0.45 * ncol)) ** 2 + (
+        (y_coord - nrow / 2) / (0.4 * nrow)
+    ) ** 2 > 1
+    values[outside] = np.nan
+
+    return values
+
+
+def benchmark(encoder, values, repeats):
+    image = array_to_image(values.copy())
+    timings = []
+
+    for _i in range(repeats):
+        start = time.perf_counter()
+        image_bytes = encoder.encode(image)
+        timings.append(time.perf_counter() - start)
+
+    return min(timings), len(image_bytes)
+
+
+def main():
+    description = "Benchmark surface image encoders"
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    grids = {
+        "400x300": (300, 400),
+        "1000x800": (800, 1000),
+        "2500x2000": (2000, 2500),
+    }
+    encoders = {
+        "png (default)": ImageEncoder.from_settings({"mode": "default"}),
+        "png (fast)": ImageEncoder.from_settings({"mode": "fast"}),
+        "png (level 1, rle)": ImageEncoder(compress_level=1, strategy="rle"),
+        "png (small)": ImageEncoder.from_settings({"mode": "small"}),
+        "webp (lossless)": ImageEncoder.from_settings({"mode": "webp"}),
+    }
+
+    print(f"{'grid':>10} {'encoder':>20} {'time [ms]':>10} {'bytes':>10}", end="")
+    print(f" {'base64':>10}")
+
+    for grid_name, shape in grids.items():
+        values = make_grid(*shape)
+
+        for encoder_name, encoder in encoders.items():
+            seconds, nbytes = benchmark(encoder, values, args.repeats)
+            base64_bytes = len(base64.b64encode(b"\0" * nbytes))
+
+            print(
+                f"{grid_name:>10} {encoder_name:>20} {seconds * 1000:10.1f} "
+                f"{nbytes:10d} {base64_bytes:10d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark of the encoding of the well and polygon layers in tests/data:
+JSON payload size and serialization time with full precision positions,
+rounded positions and delta encoded positions
+
+Run from the repository root:
+    python tests/benchmarks/benchmark_layer_encoding.py
+"""
+
+import glob
+import json
+import math
+import time
+import argparse
+import pandas as pd
+from plotly.utils import PlotlyJSONEncoder
+
+from webviz_4d._datainput.well import WellIndex, load_all_wells, polyline_delta
+from webviz_4d._datainput._polygons import make_polyline_layer
+from webviz_4d._datainput._layer_encoding import encode_layer
+
+
+def make_polygon_layers(polygon_folder):
+    layers = []
+
+    for polygon_file in sorted(glob.glob(polygon_folder + "/**/*.csv", recursive=True)):
+        polygon_df = pd.read_csv(polygon_file)
+        layer = make_polyline_layer(
+            "additional", polygon_df, "csv", polygon_file, polygon_file, None, None
+        )
+
+        if layer:
+            layers.append(layer)
+
+    return layers
+
+
+def make_well_layer(well_folder):
+    """Return a layer with the trajectories of all wells (as in the plugin)"""
+    wellbore_info = pd.read_csv(well_folder + "/wellbore_info.csv")
+    well_index = WellIndex(load_all_wells(wellbore_info, 40))
+    names = list(well_index.slices)
+    positions = well_index.get_positions(
+        names, [0.0] * len(names), [math.nan] * len(names), polyline_delta
+    )
+
+    return {
+        "name": "Drilled wells",
+        "checked": False,
+        "base_layer": False,
+        "data": [
+            {"type": "polyline", "color": "black", "positions": well, "tooltip": name}
+            for name, well in zip(names, positions)
+        ],
+    }
+
+
+def benchmark(layers, repeats):
+    timings = []
+
+    for _i in range(repeats):
+        start = time.perf_counter()
+        payload = json.dumps(layers, cls=PlotlyJSONEncoder)
+        timings.append(time.perf_counter() - start)
+
+    return min(timings), len(payload)
+
+
+def main():
+    description = "Benchmark well and polygon layer encoding"
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--data", default="tests/data")
+    parser.add_argument("--decimals", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    layer_sets = {
+        "polygons": make_polygon_layers(args.data + "/polygon_data"),
+        "wells": [make_well_layer(args.data + "/well_data")],
+    }
+
+    print(f"{'layers':>10} {'encoding':>12} {'time [ms]':>10} {'bytes':>10}")
+
+    for name, layers in layer_sets.items():
+        encodings = {
+            "full": layers,
+            "rounded": [encode_layer(layer, args.decimals) for layer in layers],
+            "delta": [
+                encode_layer(layer, args.decimals, delta=True) for layer in layers
+            ],
+        }
+
+        for encoding, encoded_layers in encodings.items():
+            seconds, nbytes = benchmark(encoded_layers, args.repeats)
+            print(f"{name:>10} {encoding:>12} {seconds * 1000:10.3f} {nbytes:10d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark of the lateral-distance well resampling on synthetic wells:
+one resample_well call per well against one batched resample_wells call
+
+Run from the repository root:
+    python tests/benchmarks/benchmark_well_resampling.py
+"""
+
+import math
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from webviz_4d._datainput.well import resample_well, resample_wells
+
+
+def make_wells(nwells, seed=0):
+    """Return random walk trajectories with a few hundred positions each"""
+    rng = np.random.default_rng(seed)
+    wells = []
+
+    for _i in range(nwells):
+        npoints = int(rng.integers(100, 600))
+        md = np.cumsum(rng.uniform(5, 40, npoints))
+        steps = rng.normal(0, 15, (npoints, 2)).cumsum(axis=0)
+
+        wells.append(
+            pd.DataFrame(
+                {
+                    "X_UTME": 460000 + steps[:, 0],
+                    "Y_UTMN": 5930000 + steps[:, 1],
+                    "Z_TVDSS": 0.8 * md,
+                    "MD": md,
+                }
+            )
+        )
+
+    return wells
+
+
+def benchmark(function, repeats):
+    timings = []
+
+    for _i in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def main():
+    description = "Benchmark well trajectory resampling"
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--wells", type=int, default=1000)
+    parser.add_argument("--delta", type=float, default=200)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    wells = make_wells(args.wells)
+    md_starts = [well_df["MD"].iloc[0] for well_df in wells]
+    md_ends = [math.nan] * len(wells)
+    npoints = sum(len(well_df) for well_df in wells)
+
+    print(f"{args.wells} wells, {npoints} positions, delta {args.delta}")
+
+    seconds = benchmark(
+        lambda: [
+            resample_well(well_df, md_start, md_end, args.delta)
+            for well_df, md_start, md_end in zip(wells, md_starts, md_ends)
+        ],
+        args.repeats,
+    )
+    print(f"{'resample_well (per well)':>28} {seconds * 1000:10.1f} ms")
+
+    seconds = benchmark(
+        lambda: resample_wells(wells, md_starts, md_ends, args.delta), args.repeats
+    )
+    print(f"{'resample_wells (batched)':>28} {seconds * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import os
+import numpy as np
+import xtgeo
+
+from webviz_4d._datainput import _aggregation
+from webviz_4d._datainput._surface_store import configure_surface_store
+from webviz_4d._datainput._aggregation import (
+    RunningStatistics,
+    aggregate_surfaces,
+    compute_moments,
+    compute_quantiles,
+    get_aggregation,
+    get_aggregation_names,
+    nan_quantiles,
+)
+
+
+rng = np.random.default_rng(0)
+stack = rng.normal(size=(7, 5, 4))
+stack[0, 0, 0] = np.nan
+stack[:, 1, 1] = np.nan
+
+
+def test_get_aggregation():
+    assert "ensemble-p10" in get_aggregation_names()
+    assert get_aggregation("ensemble-mean") == "mean"
+    assert get_aggregation("realization-1") is None
+    assert get_aggregation("mean") is None
+
+
+def test_nan_quantiles():
+    p10, p90 = nan_quantiles(stack.copy(), [0.1, 0.9])
+
+    with np.errstate(invalid="ignore"):
+        expected = np.nanquantile(stack, [0.1, 0.9], axis=0)
+
+    np.testing.assert_allclose(p10, expected[0])
+    np.testing.assert_allclose(p90, expected[1])
+    assert np.isnan(p10[1, 1])
+
+
+def test_running_statistics():
+    running = RunningStatistics(stack.shape[1:])
+
+    for values in stack:
+        running.add(values)
+
+    valid = ~np.isnan(running.get_mean())
+    np.testing.assert_allclose(
+        running.get_mean()[valid], np.nanmean(stack, axis=0)[valid]
+    )
+    np.testing.assert_allclose(
+        running.get_std()[valid], np.nanstd(stack, axis=0)[valid]
+    )
+    assert np.isnan(running.get_std()[1, 1])
+
+
+def test_chunks_and_bands(monkeypatch):
+    header = {key: 1 for key in _aggregation.geometry_keys}
+    header.update({"ncol": 5, "nrow": 4, "undef": 1.0e30})
+    surfaces = {
+        f"realization-{index}.gri": np.nan_to_num(values, nan=1.0e30)
+        for index, values in enumerate(stack)
+    }
+    opened = []
+
+    def open_realization(surface_path):
+        opened.append(surface_path)
+        return header, surfaces[surface_path]
+
+    monkeypatch.setattr(_aggregation, "open_realization", open_realization)
+    surface_paths = list(surfaces)
+
+    moments = compute_moments(surface_paths, header, workers=2, chunk_size=3)
+    assert len(opened) == len(surfaces)
+
+    # One band per column: every band opens all realizations again
+    quantiles = compute_quantiles(surface_paths, header, workers=2, max_bytes=1)
+    assert len(opened) == len(surfaces) * (1 + header["ncol"])
+
+    with np.errstate(invalid="ignore"):
+        np.testing.assert_allclose(moments["mean"], np.nanmean(stack, axis=0))
+        np.testing.assert_allclose(quantiles["p50"], np.nanquantile(stack, 0.5, axis=0))
+
+
+def test_aggregate_stored_surfaces(tmp_path):
+    surface_paths = []
+
+    for index, values in enumerate(stack):
+        surface = xtgeo.RegularSurface(
+            ncol=5, nrow=4, xinc=25.0, yinc=25.0, values=np.ma.masked_invalid(values)
+        )
+        surface_path = os.path.join(tmp_path, f"realization-{index}.gri")
+        surface.to_file(surface_path)
+        surface_paths.append(surface_path)
+
+    # Read from the (float32) surface store: the undefined nodes are masked
+    configure_surface_store(os.path.join(tmp_path, "store"))
+
+    try:
+        means = aggregate_surfaces(surface_paths, "mean", workers=2)["mean"]
+        p50 = aggregate_surfaces(surface_paths, "p50", workers=2)["p50"]
+    finally:
+        configure_surface_store()
+
+    assert os.listdir(os.path.join(tmp_path, "store"))
+    assert means.values.mask[1, 1] and p50.values.mask[1, 1]
+
+    with np.errstate(invalid="ignore"):
+        np.testing.assert_allclose(
+            means.values.filled(np.nan), np.nanmean(stack, axis=0), atol=1e-6
+        )
+        np.testing.assert_allclose(
+            p50.values.filled(np.nan), np.nanquantile(stack, 0.5, axis=0), atol=1e-6
+        )
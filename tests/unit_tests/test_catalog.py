@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from webviz_4d._datainput._catalog import (
+    SurfaceCatalog,
+    get_interval_name,
+    get_interval_times,
+)
+
+
+meta_df = pd.DataFrame()
+meta_df["map_type"] = ["observed", "simulated", "simulated", "simulated"]
+meta_df["fmu_id.realization"] = ["---", "realization-0", "realization-1", "mean"]
+meta_df["fmu_id.iteration"] = ["---", "iter-0", "iter-0", "iter-0"]
+meta_df["data.name"] = ["all", "all", "all", "all"]
+meta_df["data.attribute"] = ["amplitude_mean"] * 4
+meta_df["data.time.t1"] = ["2019-10-01"] * 4
+meta_df["data.time.t2"] = ["2020-10-01", "2020-10-01", "2020-10-01", np.nan]
+meta_df["filename"] = ["obs.gri", "real0.gri", "real1.gri", "mean.gri"]
+
+
+def test_get_interval_times():
+    assert get_interval_times("2020-10-01-2019-10-01", "normal") == (
+        "2019-10-01",
+        "2020-10-01",
+    )
+    assert get_interval_times("2019-10-01-2020-10-01", "reverse") == (
+        "2019-10-01",
+        "2020-10-01",
+    )
+
+
+def test_get_interval_name():
+    interval = get_interval_name("2019-10-01", "2020-10-01", "normal")
+    assert interval == "2020-10-01-2019-10-01"
+    assert get_interval_times(interval, "normal") == ("2019-10-01", "2020-10-01")
+
+    interval = get_interval_name("2019-10-01", "2020-10-01", "reverse")
+    assert interval == "2019-10-01-2020-10-01"
+
+
+def test_surface_catalog():
+    catalog = SurfaceCatalog(meta_df)
+
+    filename = catalog.get_filename(
+        "simulated",
+        "realization-1",
+        "iter-0",
+        "all",
+        "amplitude_mean",
+        "2019-10-01",
+        "2020-10-01",
+    )
+    assert filename == "real1.gri"
+
+    # Missing values are normalized to empty strings
+    filename = catalog.get_filename(
+        "simulated", "mean", "iter-0", "all", "amplitude_mean", "2019-10-01", ""
+    )
+    assert filename == "mean.gri"
+
+    filename = catalog.get_filename(
+        "simulated",
+        "realization-2",
+        "iter-0",
+        "all",
+        "amplitude_mean",
+        "2019-10-01",
+        "2020-10-01",
+    )
+    assert filename is None
+
+    # The input dataframe is left untouched
+    assert meta_df["data.time.t2"].isna().sum() == 1
+
+
+def test_get_realization_filenames():
+    catalog = SurfaceCatalog(meta_df)
+
+    filenames = catalog.get_realization_filenames(
+        "simulated", "iter-0", "all", "amplitude_mean", "2019-10-01", "2020-10-01"
+    )
+    assert filenames == {"realization-0": "real0.gri", "realization-1": "real1.gri"}
+
+    filenames = catalog.get_realization_filenames(
+        "simulated", "iter-1", "all", "amplitude_mean", "2019-10-01", "2020-10-01"
+    )
+    assert filenames == {}
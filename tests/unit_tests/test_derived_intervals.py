@@ -0,0 +1,99 @@
+import os
+import numpy as np
+import numpy.ma as ma
+import pandas as pd
+import xtgeo
+
+from webviz_4d._datainput import _derived_intervals
+from webviz_4d._datainput._derived_intervals import (
+    DerivedIntervals,
+    get_date_chains,
+    sum_increments,
+)
+
+
+dates = ["2019-10-01", "2020-10-01", "2021-10-01", "2022-10-01"]
+
+meta_df = pd.DataFrame()
+meta_df["map_type"] = ["simulated"] * 4
+meta_df["fmu_id.realization"] = ["realization-0"] * 4
+meta_df["fmu_id.iteration"] = ["iter-0"] * 4
+meta_df["data.name"] = ["all"] * 4
+meta_df["data.attribute"] = ["oilthickness"] * 4
+meta_df["data.time.t1"] = [dates[0], dates[1], dates[2], dates[0]]
+meta_df["data.time.t2"] = [dates[1], dates[2], dates[3], dates[2]]
+meta_df["filename"] = ["inc1.gri", "inc2.gri", "inc3.gri", "interval.gri"]
+
+
+def test_get_date_chains():
+    chains = get_date_chains([(dates[1], dates[2]), (dates[0], dates[1])])
+    assert chains == [dates[:3]]
+
+    chains = get_date_chains([(dates[0], dates[1]), (dates[2], dates[3])])
+    assert chains == [dates[:2], dates[2:]]
+
+
+def test_derived_intervals():
+    derived_intervals = DerivedIntervals(meta_df, ["oilthickness"], "normal")
+
+    # 2019-10-01 - 2021-10-01 exists on disk
+    assert derived_intervals.get_intervals("simulated") == [
+        "2022-10-01-2019-10-01",
+        "2022-10-01-2020-10-01",
+    ]
+    assert derived_intervals.is_derived(
+        "simulated", "oilthickness", "2022-10-01-2019-10-01"
+    )
+    assert not derived_intervals.is_derived(
+        "simulated", "average_swat", "2022-10-01-2019-10-01"
+    )
+    assert derived_intervals.get_chain("simulated", dates[1], dates[3]) == dates
+
+    assert DerivedIntervals(meta_df, []).get_intervals("simulated") == []
+
+
+def test_sum_increments(tmp_path):
+    surface_files = []
+
+    for index in range(3):
+        surface = xtgeo.RegularSurface(
+            ncol=3, nrow=2, xinc=25.0, yinc=25.0, values=float(index + 1)
+        )
+        surface_file = os.path.join(tmp_path, f"increment-{index}.gri")
+        surface.to_file(surface_file)
+        surface_files.append(surface_file)
+
+    _key, surface = sum_increments(surface_files, 0, 3)
+    np.testing.assert_allclose(surface.values, 6.0)
+
+    # Reuses the cached increments
+    _key, surface = sum_increments(surface_files, 1, 3)
+    np.testing.assert_allclose(surface.values, 5.0)
+
+    assert sum_increments([surface_files[0], None, surface_files[2]], 0, 3) is None
+
+
+def test_sum_increments_mask(tmp_path, monkeypatch):
+    increments = {}
+
+    for index in range(3):
+        surface_file = os.path.join(tmp_path, f"increment-{index}.gri")
+        open(surface_file, "w").close()
+        values = ma.masked_invalid(np.full((3, 2), float(index + 1)))
+        increments[surface_file] = xtgeo.RegularSurface(
+            ncol=3, nrow=2, xinc=25.0, yinc=25.0, values=values
+        )
+
+    surface_files = list(increments)
+    increments[surface_files[0]].values[0, 0] = ma.masked
+    increments[surface_files[2]].values[2, 1] = ma.masked
+    monkeypatch.setattr(_derived_intervals, "load_surface", increments.get)
+
+    # A node undefined before the interval is defined in the interval
+    _key, surface = sum_increments(surface_files, 1, 3)
+    assert not surface.values.mask[0, 0]
+    assert surface.values.mask[2, 1]
+    assert surface.values[0, 0] == 5.0
+
+    _key, surface = sum_increments(surface_files, 0, 3)
+    assert surface.values.mask[0, 0] and surface.values.mask[2, 1]
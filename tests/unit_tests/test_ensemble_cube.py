@@ -0,0 +1,80 @@
+import os
+import numpy as np
+import xtgeo
+
+from webviz_4d._datainput import _ensemble_cube
+from webviz_4d._datainput._ensemble_cube import (
+    EnsembleCube,
+    EnsembleCubes,
+    build_cube,
+    get_info_path,
+    get_ensemble_cube,
+    get_probe_figure,
+)
+
+
+def write_realizations(directory, number=5):
+    os.makedirs(directory, exist_ok=True)
+    surface_files = {}
+
+    for real in range(number):
+        values = np.full((4, 3), float(real))
+        values[0, 0] = np.nan
+        surface = xtgeo.RegularSurface(
+            ncol=4, nrow=3, xori=100.0, yori=200.0, xinc=25.0, yinc=25.0, values=values
+        )
+        surface_file = os.path.join(directory, f"realization-{real}.gri")
+        surface.to_file(surface_file)
+        surface_files[f"realization-{real}"] = surface_file
+
+    return surface_files
+
+
+def test_build_cube(tmp_path):
+    surface_files = write_realizations(tmp_path)
+    cube_path = os.path.join(tmp_path, "cube.npy")
+    build_cube(surface_files, cube_path, workers=2)
+
+    cube = EnsembleCube(cube_path)
+    assert cube.values.shape == (5, 4, 3)
+    assert cube.realizations == list(surface_files)
+
+    assert cube.get_node(100.0 + 2 * 25.0 + 5.0, 200.0 + 25.0) == (2, 1)
+    assert cube.get_node(0.0, 0.0) is None
+
+    np.testing.assert_allclose(cube.probe(150.0, 225.0), np.arange(5.0))
+    assert np.isnan(cube.probe(100.0, 200.0)).all()
+    np.testing.assert_allclose(cube.probe(100.0, 200.0, window=1), np.arange(5.0))
+
+
+def test_get_ensemble_cube(tmp_path):
+    surface_files = write_realizations(tmp_path)
+
+    cube = get_ensemble_cube(surface_files)
+    assert get_ensemble_cube(surface_files) is cube
+
+    figure = get_probe_figure(cube.probe(150.0, 225.0), cube.realizations, "test")
+    assert figure["data"][0]["x"] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_cube_directory_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        _ensemble_cube, "get_cube_directory", lambda: str(tmp_path / "cubes")
+    )
+    os.makedirs(tmp_path / "cubes")
+    cubes = EnsembleCubes(max_bytes=1, max_open=1)
+
+    first = cubes.get(write_realizations(tmp_path / "first"))
+    second = cubes.get(write_realizations(tmp_path / "second"))
+
+    # Only the latest cube is kept on disk and open
+    assert not os.path.isfile(first.cube_path)
+    assert os.path.isfile(second.cube_path)
+    assert list(cubes.cubes) == [second.cube_path]
+    assert first.values is None
+    assert sorted(os.listdir(tmp_path / "cubes")) == sorted(
+        [
+            os.path.basename(second.cube_path),
+            os.path.basename(get_info_path(second.cube_path)),
+        ]
+    )
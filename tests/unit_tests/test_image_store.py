@@ -0,0 +1,103 @@
+import os
+import pytest
+import numpy as np
+
+from webviz_4d._datainput._image_store import ImageStore, get_mimetype
+from webviz_4d._datainput.image_processing import ImageEncoder, array_to_image
+from webviz_4d._datainput._colormap_registry import ColormapRegistry
+
+
+def test_image_store_data_url():
+    store = ImageStore()
+    url = store.add(b"png bytes")
+
+    assert url.startswith("data:image/png;base64,")
+
+
+def test_image_store_route(tmp_path):
+    store = ImageStore()
+    store.configure("/webviz-4d/images/", directory=str(tmp_path))
+
+    url = store.add(b"png bytes")
+    assert url.startswith("/webviz-4d/images/")
+    assert url == store.add(b"png bytes")
+
+    name = url.split("/")[-1]
+    assert get_mimetype(name) == "image/png"
+    assert os.path.isfile(os.path.join(tmp_path, name))
+    assert store.get(name) == b"png bytes"
+
+    # Another process (empty memory cache) reads the image from disk
+    other_store = ImageStore()
+    other_store.configure("/webviz-4d/images", directory=str(tmp_path))
+    assert other_store.get(name) == b"png bytes"
+
+    assert store.get("../secret.png") is None
+
+
+def test_image_encoder():
+    image = array_to_image(np.arange(12, dtype=np.float64).reshape(3, 4))
+
+    for settings in [None, {"mode": "fast"}, {"format": "png", "strategy": "rle"}]:
+        encoder = ImageEncoder.from_settings(settings)
+        assert encoder.mimetype == "image/png"
+        assert encoder.encode(image).startswith(b"\x89PNG")
+
+    with pytest.raises(ValueError):
+        ImageEncoder.from_settings({"mode": "unknown"})
+
+
+def test_colormap_registry():
+    registry = ColormapRegistry()
+    registry.fill(["seismic", "inferno", "no such colormap"])
+
+    assert "seismic" in registry
+    assert "no such colormap" not in registry
+    assert registry.get_image("inferno").startswith(b"\x89PNG")
+    assert registry.get_url("seismic").startswith("data:image/png;base64,")
+
+    # Colormaps which are not registered at startup are added on demand
+    assert "viridis_r" not in registry
+    assert registry.get_image("viridis_r").startswith(b"\x89PNG")
+    assert "viridis_r" in registry
+
+
+def test_image_store_directory_budget(tmp_path):
+    store = ImageStore()
+    store.configure("/webviz-4d/images", str(tmp_path), max_directory_bytes=1000)
+
+    urls = [store.add(bytes([index]) * 300) for index in range(3)]
+    names = [url.split("/")[-1] for url in urls]
+    assert sorted(os.listdir(tmp_path)) == sorted(names)
+
+    # The least recently used files are removed when the budget is exceeded
+    os.utime(os.path.join(tmp_path, names[0]), ns=(0, 0))
+    store.add(bytes([3]) * 300)
+    files = os.listdir(tmp_path)
+    assert names[0] not in files
+    assert sum(os.path.getsize(os.path.join(tmp_path, name)) for name in files) <= 800
+    assert not [name for name in files if name.endswith(".tmp")]
+
+
+def test_image_store_keep_url(tmp_path):
+    store = ImageStore(max_bytes=0)
+    assert store.keep_url("data:image/png;base64,AAAA")
+
+    store.configure("/webviz-4d/images", directory=str(tmp_path))
+    url = store.add(b"png bytes")
+    name = url.split("/")[-1]
+    assert store.keep_url(url)
+
+    # The image is gone from memory and pruned from disk: it must be added again
+    os.remove(os.path.join(tmp_path, name))
+    assert not store.keep_url(url)
+    assert store.add(b"png bytes") == url
+    assert store.get(name) == b"png bytes"
+
+    # An image still held in memory is written to disk again
+    store = ImageStore()
+    store.configure("/webviz-4d/images", directory=str(tmp_path))
+    url = store.add(b"other bytes")
+    os.remove(os.path.join(tmp_path, url.split("/")[-1]))
+    assert store.keep_url(url)
+    assert os.path.isfile(os.path.join(tmp_path, url.split("/")[-1]))
@@ -0,0 +1,70 @@
+from webviz_4d._datainput._surface_cache import get_nbytes
+from webviz_4d.plugins._surface_viewer_4D._interval_layers import IntervalWellLayers
+
+
+intervals = ["2019-10-01-2020-10-01", "2020-10-01-2021-05-01"]
+
+
+def make_layers(interval):
+    built.append(interval)
+
+    return [{"name": interval, "data": [{"positions": [[0.0, 1.0]] * 100}]}]
+
+
+built = []
+
+
+def test_interval_well_layers():
+    built.clear()
+    interval_layers = IntervalWellLayers(make_layers, intervals)
+
+    assert intervals[0] in interval_layers
+    assert "2021-05-01-2022-05-01" not in interval_layers
+    assert built == []
+
+    layers = interval_layers.get(intervals[0])
+    assert layers[0]["name"] == intervals[0]
+    assert interval_layers.get(intervals[0]) is layers
+    assert built == [intervals[0]]
+
+    assert interval_layers.get("2021-05-01-2022-05-01") == []
+
+
+def test_warm_interval_well_layers():
+    built.clear()
+    interval_layers = IntervalWellLayers(make_layers, intervals)
+    interval_layers.warm()
+    interval_layers.warm_thread.join(timeout=10)
+
+    assert sorted(built) == intervals
+
+    interval_layers.get(intervals[1])
+    assert len(built) == 2
+
+
+def test_interval_well_layers_budget():
+    built.clear()
+    interval_layers = IntervalWellLayers(make_layers, intervals, max_bytes=1)
+
+    # Layers larger than the budget are built on every request
+    interval_layers.get(intervals[0])
+    interval_layers.get(intervals[0])
+    assert built == [intervals[0], intervals[0]]
+
+
+def test_warm_without_evictions():
+    built.clear()
+    layer_nbytes = get_nbytes(make_layers(intervals[0]))
+    many_intervals = [str(year) for year in range(2010, 2020)]
+    interval_layers = IntervalWellLayers(
+        make_layers, many_intervals, max_bytes=int(3.5 * layer_nbytes)
+    )
+
+    # A selected interval is kept while warming fills the budget
+    interval_layers.get(many_intervals[0])
+    interval_layers.warm()
+    interval_layers.warm_thread.join(timeout=10)
+
+    assert interval_layers.cache.evictions == 0
+    assert many_intervals[0] in interval_layers.cache
+    assert len(interval_layers.cache) == 3
@@ -0,0 +1,58 @@
+import os
+import json
+import base64
+import numpy as np
+
+from webviz_4d._datainput import _layer_bundle
+from webviz_4d._datainput._image_store import ImageStore
+from webviz_4d._datainput._layer_bundle import LayerBundles
+
+
+layers = [
+    {
+        "name": "Faults",
+        "checked": True,
+        "base_layer": False,
+        "data": [{"type": "polyline", "positions": [[0.0, 1.0], [2.0, 3.5]]}],
+    },
+    {
+        "name": "Drilled wells",
+        "checked": False,
+        "base_layer": False,
+        "data": [{"type": "polyline", "positions": np.array([[4.0, 5.0]])}],
+    },
+]
+
+
+def test_layer_bundles():
+    bundles = LayerBundles(max_bundles=2)
+
+    url = bundles.get_url(layers)
+    assert bundles.get_url(list(layers)) == url
+    assert bundles.get_url([]) is None
+
+    # Without an image route the bundle is a data url
+    assert url.startswith("data:application/json;base64,")
+    bundle = json.loads(base64.b64decode(url.split(",")[1]))
+    assert [layer["name"] for layer in bundle] == ["Faults", "Drilled wells"]
+    assert bundle[1]["data"][0]["positions"] == [[4.0, 5.0]]
+
+    # Another (equal) layer object gives the same content addressed url
+    assert bundles.get_url([dict(layers[0]), layers[1]]) == url
+    assert bundles.get_url(layers[:1]) != url
+    assert len(bundles.bundles) == 2
+
+
+def test_layer_bundles_removed_image(tmp_path, monkeypatch):
+    store = ImageStore(max_bytes=0)
+    store.configure("/webviz-4d/images", directory=str(tmp_path))
+    monkeypatch.setattr(_layer_bundle, "IMAGE_STORE", store)
+    bundles = LayerBundles()
+
+    url = bundles.get_url(layers)
+    name = url.split("/")[-1]
+    os.remove(os.path.join(tmp_path, name))
+
+    # A bundle pruned from the image directory is stored again
+    assert bundles.get_url(layers) == url
+    assert json.loads(store.get(name))[0]["name"] == "Faults"
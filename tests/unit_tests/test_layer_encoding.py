@@ -0,0 +1,69 @@
+import json
+import numpy as np
+
+from webviz_4d._datainput._layer_encoding import (
+    quantize_positions,
+    delta_encode_positions,
+    delta_decode_positions,
+    encode_layer,
+    delta_decode_layer,
+    get_quantized_layer,
+)
+
+
+positions = [
+    [462134.123456789, 5934567.98765432],
+    [462140.56789, 5934570.01234],
+    [462100.0, 5934500.04999],
+]
+layer = {
+    "name": "Drilled wells",
+    "checked": False,
+    "base_layer": False,
+    "data": [
+        {"type": "polyline", "positions": positions, "tooltip": "55/33-A-1"},
+        {"type": "polyline", "positions": [[]], "tooltip": "55/33-A-2"},
+    ],
+}
+
+
+def test_quantize_positions():
+    assert quantize_positions(positions, 1) == [
+        [462134.1, 5934568.0],
+        [462140.6, 5934570.0],
+        [462100.0, 5934500.0],
+    ]
+    assert quantize_positions([[]], 1) == [[]]
+
+    rounded = quantize_positions(np.array(positions), 0)
+    assert isinstance(rounded, np.ndarray)
+    assert np.array_equal(rounded[0], [462134.0, 5934568.0])
+
+
+def test_delta_encoding():
+    values = delta_encode_positions(positions, 1)
+
+    assert values[:4] == [4621341, 59345680, 65, 20]
+    assert np.allclose(delta_decode_positions(values, 1), np.round(positions, 1))
+    assert delta_encode_positions([[]]) == []
+
+
+def test_encode_layer():
+    rounded = encode_layer(layer, 1)
+    assert rounded["data"][0]["positions"][0] == [462134.1, 5934568.0]
+    assert layer["data"][0]["positions"] is positions
+
+    encoded = encode_layer(layer, 1, delta=True)
+    assert "positions" not in encoded["data"][0]
+    assert len(json.dumps(encoded)) < len(json.dumps(layer))
+
+    decoded = delta_decode_layer(encoded)
+    assert decoded["data"][0]["positions"] == rounded["data"][0]["positions"]
+    assert decoded["data"][1]["positions"] == [[]]
+
+
+def test_get_quantized_layer():
+    quantized = get_quantized_layer(layer, 1)
+
+    assert get_quantized_layer(layer, 1) is quantized
+    assert get_quantized_layer(layer, None) is layer
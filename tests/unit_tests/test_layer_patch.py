@@ -0,0 +1,47 @@
+from dash import no_update
+
+from webviz_4d.plugins._surface_viewer_4D._layer_patch import (
+    get_layer_keys,
+    get_layer_patch,
+)
+
+
+surface_layer = {"name": "surface", "base_layer": True, "data": [{"url": "a.png"}]}
+other_surface_layer = dict(surface_layer, data=[{"url": "b.png"}])
+well_layer = {"name": "Production", "base_layer": False, "data": []}
+
+map_layers = {
+    "layers": [surface_layer, well_layer],
+    "static_index": 1,
+    "static_url": "/webviz-4d/images/bundle.json",
+}
+
+
+def get_locations(patch):
+    return [operation["location"] for operation in patch.to_plotly_json()["operations"]]
+
+
+def test_get_layer_patch():
+    # Nothing in the browser: the full data
+    update, keys = get_layer_patch(map_layers, None)
+    assert update is map_layers
+    assert keys == get_layer_keys(map_layers)
+
+    update, new_keys = get_layer_patch(map_layers, keys)
+    assert update is no_update
+    assert new_keys is no_update
+
+    # Another realization: only the surface layer is sent
+    new_map_layers = dict(map_layers, layers=[other_surface_layer, well_layer])
+    update, new_keys = get_layer_patch(new_map_layers, keys)
+    assert get_locations(update) == [["layers", 0]]
+    assert new_keys["layers"][1] == keys["layers"][1]
+
+    # Fewer layers and another static bundle
+    new_map_layers = {
+        "layers": [surface_layer],
+        "static_index": 1,
+        "static_url": "/webviz-4d/images/other_bundle.json",
+    }
+    update, _new_keys = get_layer_patch(new_map_layers, keys)
+    assert get_locations(update) == [["layers"], ["static_url"]]
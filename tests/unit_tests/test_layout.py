@@ -0,0 +1,53 @@
+from dash import html
+
+from webviz_subsurface_components import LayeredMap
+from webviz_4d.plugins._surface_viewer_4D._layout import set_layout
+
+
+class Selector:
+    layout = html.Div()
+
+
+class Parent:
+    """The plugin attributes used by the layout"""
+
+    label = "test"
+    well_update = "2024-01-01"
+    production_update = ""
+    attribute_settings = {}
+    map_defaults = [{"iteration": "iter-0", "realization": "realization-0"}] * 3
+    selector = selector2 = selector3 = Selector()
+
+    def uuid(self, element):
+        return "test-" + element
+
+    def iterations(self, _map_number):
+        return ["iter-0"]
+
+    def realizations(self, _map_number):
+        return ["realization-0", "ensemble-mean"]
+
+
+def get_components(component, component_type):
+    components = [component] if isinstance(component, component_type) else []
+    children = getattr(component, "children", None)
+
+    if not isinstance(children, (list, tuple)):
+        children = [children]
+
+    for child in children:
+        if child is not None and not isinstance(child, str):
+            components += get_components(child, component_type)
+
+    return components
+
+
+def test_set_layout():
+    layered_maps = get_components(set_layout(Parent()), LayeredMap)
+
+    assert len(layered_maps) == 4
+    assert [
+        layered_map.id
+        for layered_map in layered_maps
+        if getattr(layered_map, "draw_toolbar_marker", False)
+    ] == ["test-map", "test-map2", "test-map3"]
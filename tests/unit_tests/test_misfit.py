@@ -0,0 +1,64 @@
+import os
+import numpy as np
+import numpy.ma as ma
+import xtgeo
+
+from webviz_4d._datainput._surface_cache import SURFACE_CACHE, file_key
+from webviz_4d._datainput._misfit import (
+    compute_misfit,
+    get_misfit_label,
+    get_misfit_scores,
+    rank_realizations,
+)
+
+
+def test_compute_misfit():
+    observed = ma.masked_invalid(np.array([[1.0, -1.0], [2.0, np.nan]]))
+
+    scores = compute_misfit(observed, observed)
+    assert scores["rms"] == 0.0
+    assert np.isclose(scores["correlation"], 1.0)
+    assert scores["sign_agreement"] == 1.0
+
+    scores = compute_misfit(observed, -observed)
+    assert np.isclose(scores["rms"], np.sqrt(4.0 * 6.0 / 3.0))
+    assert np.isclose(scores["correlation"], -1.0)
+    assert scores["sign_agreement"] == 0.0
+
+    assert np.isnan(compute_misfit(observed, ma.masked_all((2, 2)))["rms"])
+
+
+def test_rank_realizations(tmp_path):
+    observed = xtgeo.RegularSurface(
+        ncol=4, nrow=3, xinc=25.0, yinc=25.0, values=np.linspace(-1.0, 1.0, 12)
+    )
+    observed_file = os.path.join(tmp_path, "observed.gri")
+    observed.to_file(observed_file)
+
+    surface_files = {}
+
+    for real, scale in enumerate([2.0, 1.1, -1.0]):
+        surface = observed.copy()
+        surface.values = observed.values * scale
+        surface_file = os.path.join(tmp_path, f"realization-{real}.gri")
+        surface.to_file(surface_file)
+        surface_files[f"realization-{real}"] = surface_file
+
+    scores = get_misfit_scores(observed_file, surface_files, workers=2)
+
+    assert rank_realizations(scores, "rms") == [
+        "realization-1",
+        "realization-0",
+        "realization-2",
+    ]
+    assert rank_realizations(scores, "sign_agreement")[-1] == "realization-2"
+    assert get_misfit_label("realization-1", scores["realization-1"]).startswith(
+        "realization-1 (RMS"
+    )
+
+    # The realizations are read in the thread pool without caching them
+    for surface_file in surface_files.values():
+        assert ("surface",) + file_key(surface_file) not in SURFACE_CACHE
+
+    # Scores are cached
+    assert get_misfit_scores(observed_file, surface_files, workers=1) == scores
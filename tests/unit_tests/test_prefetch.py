@@ -0,0 +1,38 @@
+import threading
+
+from webviz_4d.plugins._surface_viewer_4D._prefetch import (
+    SurfacePrefetcher,
+    get_neighbours,
+)
+
+
+def test_get_neighbours():
+    options = ["realization-0", "realization-1", "realization-2"]
+
+    assert get_neighbours("realization-1", options) == [
+        "realization-2",
+        "realization-0",
+    ]
+    assert get_neighbours("realization-0", options) == ["realization-1"]
+    assert get_neighbours("mean", options) == []
+
+
+def test_surface_prefetcher():
+    rendered = []
+    done = threading.Event()
+
+    def render(value):
+        rendered.append(value)
+
+        if len(rendered) == 2:
+            done.set()
+
+    prefetcher = SurfacePrefetcher(render, max_workers=1)
+    prefetcher.schedule(0, [("realization-1",), ("realization-2",)])
+
+    assert done.wait(timeout=10)
+    assert sorted(rendered) == ["realization-1", "realization-2"]
+
+    disabled = SurfacePrefetcher(render, max_workers=0)
+    disabled.schedule(0, [("realization-3",)])
+    assert "realization-3" not in rendered
@@ -0,0 +1,73 @@
+import numpy as np
+import xtgeo
+
+from webviz_4d._datainput._residual import (
+    compute_resampling_weights,
+    get_geometry,
+    get_node_coordinates,
+    get_residual_surface,
+    resample_values,
+)
+
+
+def make_surface(xori=0.0, yori=0.0, xinc=25.0, yinc=25.0, ncol=10, nrow=8, **kwargs):
+    surface = xtgeo.RegularSurface(
+        ncol=ncol, nrow=nrow, xori=xori, yori=yori, xinc=xinc, yinc=yinc, **kwargs
+    )
+    x_coord, y_coord = get_node_coordinates(get_geometry(surface))
+    surface.values = 2.0 * x_coord + 0.5 * y_coord
+
+    return surface
+
+
+def test_same_geometry():
+    surface = make_surface()
+    other = make_surface()
+    other.values = other.values - 1.0
+
+    residual = get_residual_surface(surface, other)
+    np.testing.assert_allclose(residual.values, 1.0)
+
+
+def test_resampling():
+    # A linear function is reproduced exactly by bilinear interpolation
+    source = make_surface(rotation=30.0)
+    target = make_surface(xori=-10.0, yori=20.0, xinc=20.0, yinc=15.0, rotation=10.0)
+
+    indices, weights = compute_resampling_weights(
+        get_geometry(source), get_geometry(target)
+    )
+    resampled = resample_values(source.values, indices, weights, target.values.shape)
+
+    inside = ~np.ma.getmaskarray(resampled)
+    assert inside.any() and not inside.all()
+    np.testing.assert_allclose(resampled[inside], target.values[inside])
+
+    residual = get_residual_surface(target, source)
+    np.testing.assert_allclose(residual.values.compressed(), 0.0, atol=1e-9)
+
+
+def test_resampling_edges():
+    # 3 x 3 source nodes at x, y = 0, 10, 20
+    source_geometry = (3, 3, 0.0, 0.0, 10.0, 10.0, 0.0, 1)
+    values = np.arange(9, dtype=np.float64).reshape(3, 3)
+
+    # Target nodes at x = 0, 5, ..., 25 and y = 0, 20, 25
+    target_geometry = (6, 2, 0.0, 20.0, 5.0, 5.0, 0.0, 1)
+    indices, weights = compute_resampling_weights(source_geometry, target_geometry)
+    resampled = resample_values(values, indices, weights, (6, 2))
+
+    # Nodes on the last column/row are interpolated, nodes less than one cell
+    # beyond are outside
+    np.testing.assert_allclose(resampled[:5, 0], [2.0, 3.5, 5.0, 6.5, 8.0])
+    assert np.ma.getmaskarray(resampled)[5].all()
+    assert np.ma.getmaskarray(resampled)[:, 1].all()
+
+    # Nodes on defined source nodes next to an undefined one are defined
+    values[2, 1] = np.nan
+    resampled = resample_values(values, indices, weights, (6, 2))
+    np.testing.assert_allclose(resampled[:5, 0], [2.0, 3.5, 5.0, 6.5, 8.0])
+
+    values[2, 2] = np.nan
+    resampled = resample_values(values, indices, weights, (6, 2))
+    assert np.ma.getmaskarray(resampled)[3:5, 0].all()
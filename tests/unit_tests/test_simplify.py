@@ -0,0 +1,110 @@
+import numpy as np
+
+from webviz_4d._datainput._simplify import (
+    simplify_lines,
+    simplify_layer,
+    get_layer_levels,
+    get_layer_level,
+    select_tolerance,
+)
+
+
+def reference_simplify(points, tolerance):
+    """Recursive Douglas-Peucker, returns the indices of the kept points"""
+    first, last = points[0], points[-1]
+
+    if len(points) < 3:
+        return list(range(len(points)))
+
+    direction = last - first
+    length = np.hypot(*direction)
+
+    if length == 0:
+        distances = np.hypot(*(points[1:-1] - first).T)
+    else:
+        to_first = points[1:-1] - first
+        distances = (
+            np.abs(direction[0] * to_first[:, 1] - direction[1] * to_first[:, 0])
+            / length
+        )
+
+    index = int(np.argmax(distances)) + 1
+
+    if distances[index - 1] <= tolerance:
+        return [0, len(points) - 1]
+
+    left = reference_simplify(points[: index + 1], tolerance)
+    right = reference_simplify(points[index:], tolerance)
+
+    return left + [index + i for i in right[1:]]
+
+
+rng = np.random.default_rng(0)
+lines = [
+    rng.normal(0, 10, (npoints, 2)).cumsum(axis=0) for npoints in [1, 2, 3, 40, 500]
+]
+lines.append(np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 10.0], [0.0, 0.0]]))
+
+
+def test_simplify_lines():
+    coordinates = np.concatenate(lines)
+    lengths = np.array([len(line) for line in lines])
+    ends = np.cumsum(lengths)
+
+    for tolerance in [0, 1, 10, 100]:
+        keep = simplify_lines(
+            coordinates[:, 0], coordinates[:, 1], ends - lengths, ends, tolerance
+        )
+
+        for line, start, end in zip(lines, ends - lengths, ends):
+            expected = reference_simplify(line, tolerance)
+            assert np.flatnonzero(keep[start:end]).tolist() == expected
+
+
+def test_simplify_layer():
+    layer = {
+        "name": "Faults",
+        "checked": True,
+        "base_layer": False,
+        "data": [
+            {"type": "polyline", "positions": line.tolist(), "color": "gray"}
+            for line in lines
+        ]
+        + [{"type": "polyline", "positions": [[]], "color": "gray"}],
+    }
+
+    simplified = simplify_layer(layer, 10)
+
+    assert simplified["name"] == layer["name"]
+    assert len(simplified["data"]) == len(layer["data"])
+    assert len(simplified["data"][4]["positions"]) < len(lines[4])
+    assert isinstance(simplified["data"][4]["positions"], list)
+    assert simplified["data"][-1] is layer["data"][-1]
+    assert layer["data"][4]["positions"] == lines[4].tolist()
+
+    levels = get_layer_levels(layer, [1, 10])
+    assert get_layer_levels(layer, [1, 10]) is levels
+    assert len(levels[10]["data"][4]["positions"]) <= len(
+        levels[1]["data"][4]["positions"]
+    )
+
+
+def test_get_layer_level():
+    layer = {
+        "name": "Drilled wells",
+        "base_layer": False,
+        "data": [{"type": "polyline", "positions": lines[4]}],
+    }
+    bounds = [[0.0, 0.0], [10000.0, 5000.0]]
+
+    assert select_tolerance(bounds, [2, 10, 50], 1000) == 10
+    assert select_tolerance(bounds, [20, 50], 1000) == 0
+
+    assert get_layer_level(layer, bounds, [20, 50], 1000) is layer
+    assert get_layer_level(layer, bounds, [], 1000) is layer
+
+    # The default tolerances are a few metres, also for large fields
+    assert select_tolerance([[0.0, 0.0], [50000.0, 50000.0]]) == 5
+    level = get_layer_level(layer, bounds, [2, 10, 50], 1000)
+    assert isinstance(level["data"][0]["positions"], np.ndarray)
+    assert len(level["data"][0]["positions"]) < len(lines[4])
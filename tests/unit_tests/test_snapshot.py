@@ -0,0 +1,64 @@
+import os
+import numpy as np
+import pandas as pd
+
+from webviz_4d._datainput._snapshot import (
+    get_snapshot_path,
+    load_dataframe,
+    read_csv_snapshot,
+    save_dataframe,
+)
+
+
+def test_read_csv_snapshot(tmp_path):
+    csv_file = os.path.join(tmp_path, "surface_metadata.csv")
+
+    meta_df = pd.DataFrame()
+    meta_df["map_type"] = ["observed", "simulated", "simulated"]
+    meta_df["fmu_id.realization"] = ["---", "realization-0", np.nan]
+    meta_df["data.value"] = [1.5, 2.5, np.nan]
+    meta_df.to_csv(csv_file, index=False)
+
+    first_df = read_csv_snapshot(csv_file)
+    snapshot_file = get_snapshot_path(csv_file)
+    assert os.path.isfile(snapshot_file)
+
+    second_df = read_csv_snapshot(csv_file)
+
+    for dataframe in [first_df, second_df]:
+        assert list(dataframe.columns) == list(meta_df.columns)
+        assert dataframe["map_type"].tolist() == meta_df["map_type"].tolist()
+        assert dataframe["fmu_id.realization"].isna().tolist() == [
+            False,
+            False,
+            True,
+        ]
+        assert np.allclose(
+            dataframe["data.value"].values, meta_df["data.value"].values, equal_nan=True
+        )
+
+    # A changed csv file invalidates the snapshot
+    meta_df["map_type"] = ["observed", "observed", "simulated"]
+    meta_df.to_csv(csv_file, index=False)
+    os.utime(csv_file, ns=(0, 0))
+
+    third_df = read_csv_snapshot(csv_file)
+    assert third_df["map_type"].tolist() == meta_df["map_type"].tolist()
+
+
+def test_string_dtype_columns(tmp_path):
+    # The default string dtype of pandas 3 is not object
+    snapshot_file = os.path.join(tmp_path, "wells.npz")
+    dataframe = pd.DataFrame(
+        {
+            "wellname": pd.Series(["A", None, "B"], dtype="string"),
+            "MD": [0.0, 10.0, 20.0],
+        }
+    )
+
+    save_dataframe(dataframe, snapshot_file, [1, 2])
+    loaded = load_dataframe(snapshot_file, [1, 2])
+
+    assert loaded["wellname"].isna().tolist() == [False, True, False]
+    assert loaded["wellname"].dropna().tolist() == ["A", "B"]
+    assert loaded["MD"].tolist() == [0.0, 10.0, 20.0]
@@ -0,0 +1,64 @@
+import io
+import base64
+import numpy as np
+import numpy.ma as ma
+from PIL import Image
+
+from webviz_4d._datainput._surface import (
+    downsample_array,
+    make_image_layer,
+    select_pyramid_level,
+)
+
+
+def test_downsample_array():
+    values = ma.masked_invalid(
+        np.array(
+            [
+                [1.0, 3.0, 5.0],
+                [np.nan, 5.0, 7.0],
+                [np.nan, np.nan, 9.0],
+            ]
+        )
+    )
+
+    downsampled = downsample_array(values)
+
+    assert downsampled.shape == (2, 2)
+    assert np.allclose(downsampled[0, 0], 3.0)
+    assert np.allclose(downsampled[0, 1], 6.0)
+    assert downsampled.mask[1, 0]
+    assert np.allclose(downsampled[1, 1], 9.0)
+
+
+def test_select_pyramid_level():
+    levels = [
+        (np.zeros((1000, 800)), "full"),
+        (np.zeros((500, 400)), "half"),
+        (np.zeros((250, 200)), "quarter"),
+    ]
+
+    assert select_pyramid_level(levels)[1] == "full"
+    assert select_pyramid_level(levels, 400)[1] == "half"
+    assert select_pyramid_level(levels, 100)[1] == "quarter"
+    assert select_pyramid_level(levels, 2000)[1] == "full"
+
+
+def test_make_image_layer():
+    values = ma.masked_invalid(np.array([[1.0, 2.0], [3.0, np.nan]]))
+    bounds = [[0.0, 0.0], [1.0, 1.0]]
+
+    # The image is scaled to the colour range (0 => undefined)
+    layer = make_image_layer(values.copy(), bounds, min_val=0.0, max_val=4.0)
+    data = layer["data"][0]
+    image = Image.open(io.BytesIO(base64.b64decode(data["url"].split(",")[1])))
+    assert np.array(image).tolist() == [[64, 128], [191, 0]]
+    assert (data["minvalue"], data["maxvalue"]) == ("0.00", "4.00")
+
+    # The value range (e.g. from the surface statistics) gives missing limits
+    layer = make_image_layer(values.copy(), bounds, value_range=(-1.0, 5.0))
+    assert layer["data"][0]["minvalue"] == "-1.00"
+    assert layer["data"][0]["maxvalue"] == "5.00"
+
+    layer = make_image_layer(values.copy(), bounds, max_val=2.5)
+    assert layer["data"][0]["minvalue"] == "1.00"
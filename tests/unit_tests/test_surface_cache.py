@@ -0,0 +1,72 @@
+import os
+import numpy as np
+
+from webviz_4d._datainput._surface_cache import SurfaceCache, file_key, get_nbytes
+
+
+def test_surface_cache_eviction():
+    array = np.zeros(100, dtype=np.float64)  # 800 bytes
+    cache = SurfaceCache(max_bytes=2000)
+
+    cache.put("a", array)
+    cache.put("b", array.copy())
+    assert cache.nbytes == 1600
+
+    # Use "a", so that "b" is the least recently used item
+    assert cache.get("a") is array
+
+    cache.put("c", array.copy())
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["evictions"] == 1
+    assert stats["nbytes"] == 1600
+
+    assert cache.get("b") is None
+    assert cache.stats()["misses"] == 1
+
+    # Items larger than the budget are returned but not cached
+    large_array = np.zeros(1000)
+    assert cache.put("d", large_array) is large_array
+    assert "d" not in cache
+
+    cache.resize(1000)
+    assert len(cache) == 1
+
+
+def test_get_or_create_for():
+    cache = SurfaceCache()
+    layer = {"name": "Wells"}
+    created = []
+
+    def create():
+        created.append(1)
+        return {"name": "Simplified wells"}
+
+    item = cache.get_or_create_for(layer, "levels", create)
+    assert cache.get_or_create_for(layer, "levels", create) is item
+    assert cache.get_or_create_for(layer, "other", create) is not item
+    assert len(created) == 2
+
+    # An equal object with another identity is another key
+    assert cache.get_or_create_for(dict(layer), "levels", create) is not item
+
+
+def test_get_nbytes():
+    layer = {"data": [{"url": "x" * 100, "bounds": [[0, 0], [1, 1]]}]}
+    assert get_nbytes(layer) >= 100
+    assert get_nbytes(np.ma.masked_array(np.zeros(10), mask=np.zeros(10))) == 90
+
+
+def test_file_key(tmp_path):
+    file_name = os.path.join(tmp_path, "surface.gri")
+
+    with open(file_name, "wb") as stream:
+        stream.write(b"1234")
+
+    key = file_key(file_name)
+    assert key[0] == os.path.abspath(file_name)
+    assert key[2] == 4
@@ -0,0 +1,49 @@
+import os
+import numpy as np
+import pandas as pd
+import xtgeo
+
+from webviz_4d._datainput._surface_statistics import SurfaceStatistics
+from webviz_4d._datainput._surface_scaling import create_surface_scaling, get_limits
+
+
+def test_get_limits():
+    assert get_limits([1.0, 2.0, 3.0], [5.0, 6.0, 7.0], False) == (2.0, 6.0)
+    assert get_limits([-2.0], [1.0], True) == (-2.0, 2.0)
+
+
+def test_create_surface_scaling(tmp_path):
+    rows = []
+
+    for real in range(3):
+        surface = xtgeo.RegularSurface(
+            ncol=10,
+            nrow=10,
+            xinc=25.0,
+            yinc=25.0,
+            values=np.linspace(-1.0, 1.0 + real, 100),
+        )
+        surface_file = os.path.join(tmp_path, f"realization-{real}.gri")
+        surface.to_file(surface_file)
+        rows.append(
+            {
+                "map_type": "simulated",
+                "fmu_id.realization": f"realization-{real}",
+                "fmu_id.iteration": "iter-0",
+                "data.name": "all",
+                "data.attribute": "amplitude_diff",
+                "data.time.t1": "2019-10-01",
+                "data.time.t2": "2020-10-01",
+                "filename": surface_file,
+            }
+        )
+
+    surface_statistics = SurfaceStatistics()
+    surface_scaling = create_surface_scaling(pd.DataFrame(rows), surface_statistics)
+
+    assert len(surface_scaling) == 1
+    row = surface_scaling.iloc[0]
+    assert row["interval"] == "2020-10-01-2019-10-01"
+    assert row["lower_limit"] == -row["upper_limit"]
+    assert row["upper_limit"] > 1.0
+    assert len(surface_statistics) == 3
@@ -0,0 +1,49 @@
+import os
+import numpy as np
+import numpy.ma as ma
+import xtgeo
+
+from webviz_4d._datainput._surface_statistics import (
+    SurfaceStatistics,
+    compute_statistics,
+    get_statistics_file,
+)
+
+
+def test_compute_statistics():
+    values = ma.masked_invalid(np.array([[1.0, 2.0, np.nan], [3.0, 4.0, 5.0]]))
+    statistics = compute_statistics(values)
+
+    assert statistics["min"] == 1.0
+    assert statistics["max"] == 5.0
+    assert statistics["mean"] == 3.0
+    assert statistics["p50"] == 3.0
+    assert sum(statistics["histogram_counts"]) == 5
+
+    statistics = compute_statistics(ma.masked_all((2, 2)))
+    assert np.isnan(statistics["max"])
+
+
+def test_surface_statistics(tmp_path):
+    surface = xtgeo.RegularSurface(
+        ncol=3, nrow=2, xinc=25.0, yinc=25.0, values=np.arange(6, dtype=np.float64)
+    )
+    surface_file = os.path.join(tmp_path, "surface.gri")
+    surface.to_file(surface_file)
+
+    statistics_file = get_statistics_file(os.path.join(tmp_path, "metadata.csv"))
+    assert statistics_file.endswith("metadata_statistics.csv")
+
+    # Only the min and max are computed on demand
+    surface_statistics = SurfaceStatistics(statistics_file)
+    assert surface_statistics.get_min_max(surface_file) == {"min": 0.0, "max": 5.0}
+    assert len(surface_statistics) == 0
+
+    assert surface_statistics.update([surface_file]) == 1
+    assert surface_statistics.update([surface_file]) == 0
+    surface_statistics.save()
+
+    stored_statistics = SurfaceStatistics(statistics_file)
+    assert len(stored_statistics) == 1
+    assert stored_statistics.get(surface_file)["max"] == 5.0
+    assert stored_statistics.get_min_max(surface_file)["max"] == 5.0
@@ -0,0 +1,81 @@
+import os
+import numpy as np
+import numpy.ma as ma
+import xtgeo
+
+from webviz_4d._datainput._surface_store import (
+    convert_surface,
+    get_store_path,
+    is_store_current,
+    open_surface_array,
+    read_surface_store,
+)
+
+
+def make_surface():
+    values = np.arange(20, dtype=np.float64).reshape(4, 5)
+    values = ma.masked_where(values == 7, values)
+
+    return xtgeo.RegularSurface(
+        ncol=4,
+        nrow=5,
+        xori=1000.0,
+        yori=2000.0,
+        xinc=25.0,
+        yinc=25.0,
+        rotation=30.0,
+        values=values,
+    )
+
+
+def test_convert_surface(tmp_path):
+    surface = make_surface()
+    surface_file = os.path.join(tmp_path, "surface.gri")
+    surface.to_file(surface_file)
+
+    store_path = convert_surface(surface_file)
+    assert store_path == get_store_path(surface_file)
+    assert is_store_current(surface_file, store_path)
+
+    header, values = open_surface_array(store_path)
+    assert (header["ncol"], header["nrow"]) == (4, 5)
+    assert isinstance(values, np.memmap)
+    assert values.shape == (4, 5)
+
+    stored_surface = read_surface_store(store_path)
+    assert stored_surface.rotation == surface.rotation
+    assert stored_surface.xori == surface.xori
+    assert np.array_equal(ma.getmaskarray(stored_surface.values), surface.values.mask)
+    assert np.allclose(stored_surface.values.compressed(), surface.values.compressed())
+
+
+def test_store_directory(tmp_path):
+    surface_file = os.path.join(tmp_path, "surface.gri")
+    store_directory = os.path.join(tmp_path, "store")
+
+    store_path = get_store_path(surface_file, store_directory)
+    assert os.path.dirname(store_path) == store_directory
+    assert store_path.endswith("surface.gri.w4d")
+
+
+def test_replaced_surface_file(tmp_path):
+    surface_file = os.path.join(tmp_path, "surface.gri")
+    make_surface().to_file(surface_file)
+    store_path = convert_surface(surface_file)
+    mtime_ns = os.stat(surface_file).st_mtime_ns
+
+    # A restored surface file with an older modification time
+    surface = make_surface()
+    surface.values = surface.values + 1
+    surface.to_file(surface_file)
+    os.utime(surface_file, ns=(mtime_ns - 10**9, mtime_ns - 10**9))
+    assert os.stat(store_path).st_mtime_ns > os.stat(surface_file).st_mtime_ns
+    assert not is_store_current(surface_file, store_path)
+
+    convert_surface(surface_file)
+    assert is_store_current(surface_file, store_path)
+    assert np.allclose(
+        read_surface_store(store_path).values.compressed(),
+        surface.values.compressed(),
+    )
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
@@ -0,0 +1,49 @@
+import os
+import shutil
+from pathlib import Path
+import numpy as np
+
+from webviz_4d._datainput.well import load_well_trajectories
+from webviz_4d._datainput._well_cache import load_cached_trajectories
+
+test_folder = "tests"
+data_folder = "data"
+well_folder = "well_data"
+
+well_names = ["55_33-A-1", "55_33-A-4"]
+
+
+def test_load_cached_trajectories(tmp_path):
+    well_files = []
+
+    for well_name in well_names:
+        well_file = Path(
+            os.path.join(test_folder, data_folder, well_folder, well_name + ".w")
+        )
+        shutil.copy(well_file, tmp_path)
+        well_files.append(str(tmp_path / well_file.name))
+
+    cache_file = tmp_path / ".well_trajectories.npz"
+    delta = 40
+
+    trajectories = load_cached_trajectories(well_files, delta, cache_file)
+    assert cache_file.is_file()
+    cache_mtime = os.path.getmtime(cache_file)
+
+    # All wells from the cache, the cache file is not rewritten
+    cached_trajectories = load_cached_trajectories(well_files, delta, cache_file)
+    assert os.path.getmtime(cache_file) == cache_mtime
+
+    expected = load_well_trajectories(well_files, delta)
+
+    for well_file in well_files:
+        for trajectory in [trajectories, cached_trajectories]:
+            assert trajectory[well_file]["wellname"] == expected[well_file]["wellname"]
+            assert np.allclose(trajectory[well_file]["MD"], expected[well_file]["MD"])
+            assert np.allclose(
+                trajectory[well_file]["X_UTME"], expected[well_file]["X_UTME"]
+            )
+
+    # Another resampling is a cache miss
+    resampled = load_cached_trajectories(well_files, 0, cache_file)
+    assert len(resampled[well_files[0]]["MD"]) >= len(trajectories[well_files[0]]["MD"])
@@ -0,0 +1,151 @@
+import math
+import numpy as np
+import pandas as pd
+
+from webviz_4d._datainput.well import (
+    WellIndex,
+    resample_well,
+    resample_wells,
+    get_resampled_indices,
+    get_position_data,
+)
+
+
+def reference_resample_well(well_df, md_start, md_end, delta):
+    """The original (loop) implementation of resample_well"""
+    if math.isnan(md_end):
+        md_end = well_df["MD"].iloc[-1]
+
+    dfr = well_df[(well_df["MD"] >= md_start) & (well_df["MD"] <= md_end)]
+
+    x = dfr["X_UTME"].values
+    y = dfr["Y_UTMN"].values
+    tvd = dfr["Z_TVDSS"].values
+    md = dfr["MD"].values
+
+    x_new = [x[0]]
+    y_new = [y[0]]
+    tvd_new = [tvd[0]]
+    md_new = [md[0]]
+    j = 0
+
+    for i in range(1, len(x)):
+        dist = ((x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2) ** 0.5
+
+        if dist > delta:
+            x_new.append(x[i])
+            y_new.append(y[i])
+            tvd_new.append(tvd[i])
+            md_new.append(md[i])
+            j = i
+
+    x_new.append(x[-1])
+    y_new.append(y[-1])
+    tvd_new.append(tvd[-1])
+    md_new.append(md[-1])
+
+    dfr_new = pd.DataFrame()
+    dfr_new["X_UTME"] = x_new
+    dfr_new["Y_UTMN"] = y_new
+    dfr_new["Z_TVDSS"] = tvd_new
+    dfr_new["MD"] = md_new
+
+    return dfr_new
+
+
+def make_well(rng, npoints):
+    md = np.cumsum(rng.uniform(1, 40, npoints))
+    steps = rng.normal(0, 15, (npoints, 2)).cumsum(axis=0)
+
+    return pd.DataFrame(
+        {
+            "X_UTME": 460000 + steps[:, 0],
+            "Y_UTMN": 5930000 + steps[:, 1],
+            "Z_TVDSS": 0.8 * md,
+            "MD": md,
+        }
+    )
+
+
+rng = np.random.default_rng(0)
+wells = [make_well(rng, npoints) for npoints in [1, 2, 3, 50, 200, 1000]]
+
+
+def test_resample_well():
+    for well_df in wells:
+        md = well_df["MD"].values
+
+        for delta in [0, 10, 200, 1e6]:
+            for md_start, md_end in [
+                (md[0], math.nan),
+                (md[len(md) // 3], md[-1]),
+                (md[len(md) // 2], 0.5 * (md[len(md) // 2] + md[-1])),
+            ]:
+                expected = reference_resample_well(well_df, md_start, md_end, delta)
+                resampled = resample_well(well_df, md_start, md_end, delta)
+
+                assert np.array_equal(resampled.values, expected.values)
+                assert list(resampled.columns) == list(expected.columns)
+
+
+def test_resample_wells():
+    md_starts = [well_df["MD"].iloc[0] for well_df in wells]
+    md_ends = [math.nan] * len(wells)
+
+    resampled = resample_wells(wells, md_starts, md_ends, 20)
+    assert len(resampled) == len(wells)
+
+    for well_df, resampled_df in zip(wells, resampled):
+        expected = reference_resample_well(well_df, well_df["MD"].iloc[0], math.nan, 20)
+        assert np.array_equal(resampled_df.values, expected.values)
+
+
+def test_get_resampled_indices():
+    x = np.array([0.0, 1.0, 5.0, 6.0, 20.0, 0.0, 0.0, 9.0])
+    y = np.zeros(len(x))
+
+    # Two segments and an empty one
+    kept, segments = get_resampled_indices(x, y, [0, 5, 5], [5, 5, 8], 3)
+
+    assert kept.tolist() == [0, 2, 4, 4, 5, 7, 7]
+    assert segments.tolist() == [0, 0, 0, 0, 2, 2, 2]
+
+
+def test_well_index():
+    wells_df = pd.concat(
+        [
+            well_df.assign(WELLBORE_NAME="well_" + str(index % 3))
+            for index, well_df in enumerate(wells)
+        ],
+        ignore_index=True,
+    )
+    well_index = WellIndex(wells_df)
+
+    names = ["well_0", "well_1", "well_2", "well_1"]
+    md_starts = [0.0, math.nan, 100.0, 500.0]
+    md_ends = [math.nan, math.nan, 2000.0, math.nan]
+
+    positions = well_index.get_positions(names, md_starts, md_ends, 200)
+    assert positions[1] == [[]]
+
+    for name, md_start, md_end, position in zip(names, md_starts, md_ends, positions):
+        well_df = wells_df[wells_df["WELLBORE_NAME"] == name]
+        expected = get_position_data(well_df, md_start, md_end)
+
+        assert np.array_equal(np.asarray(position), np.asarray(expected))
+        trajectory = well_index.get_trajectory(name)
+        assert np.array_equal(trajectory.values, well_df[trajectory.columns].values)
+
+
+def test_well_index_missing_names():
+    wells_df = pd.concat(
+        [wells[0].assign(WELLBORE_NAME="A"), wells[1].assign(WELLBORE_NAME=None)]
+        + [wells[2].assign(WELLBORE_NAME="B")],
+        ignore_index=True,
+    )
+    well_index = WellIndex(wells_df)
+
+    for name in ["A", "B"]:
+        trajectory = well_index.get_trajectory(name)
+        well_df = wells_df[wells_df["WELLBORE_NAME"] == name]
+        assert np.array_equal(trajectory.values, well_df[trajectory.columns].values)
@@ -11,6 +11,9 @@ from webviz_4d.plugins._surface_viewer_4D._webvizstore import (
 from webviz_4d._datainput.well import (
     load_well,
     load_all_wells,
+    load_well_trajectories,
+    make_wells_dataframe,
+    get_wellfiles,
 )
 
 test_folder = "tests"
@@ -60,3 +63,27 @@ def test_load_all_wells():
 
     well_df = all_wells_df[all_wells_df["WELLBORE_NAME"] == well_name]
     assert np.allclose(well.dataframe["MD"].to_list(), well_df["MD"].to_list())
+
+
+def test_well_trajectories():
+    wellbore_info = Path(
+        os.path.join(test_folder, data_folder, well_folder, "wellbore_info.csv")
+    )
+    all_wells_info = read_csv(csv_file=wellbore_info)
+    delta = 40
+
+    all_wells_df = load_all_wells(all_wells_info.copy(), delta)
+
+    # Each file is parsed once, in a process pool
+    trajectories = load_well_trajectories(
+        get_wellfiles(all_wells_info.copy()), delta, workers=2
+    )
+    parallel_df = make_wells_dataframe(trajectories, all_wells_info.copy())
+    assert parallel_df.equals(all_wells_df)
+
+    # A subset is built from the same trajectories
+    drilled_wells_info = all_wells_info.loc[
+        all_wells_info["layer_name"] == "Drilled wells"
+    ]
+    drilled_wells_df = make_wells_dataframe(trajectories, drilled_wells_info.copy())
+    assert drilled_wells_df.equals(load_all_wells(drilled_wells_info.copy(), delta))
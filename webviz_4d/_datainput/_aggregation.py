@@ -0,0 +1,254 @@
+"""Ensemble statistics (mean, std, p10, p50, p90) computed on demand from the
+realization surfaces of a selection
+
+The realizations are opened and read in chunks in a thread pool (from the
+memory-mapped surface store when it is enabled), and released after reading.
+Mean and standard deviation are updated realization by realization (Welford),
+the percentiles are computed for bands of columns, so that the memory use is
+bounded by the chunk/band size and not by the number of realizations, also
+without the surface store. The percentiles follow the xtgeo convention (p10
+is the 10th percentile)."""
+
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import numpy.ma as ma
+
+import xtgeo
+
+from ._surface_cache import SURFACE_CACHE, file_key
+from ._surface_store import (
+    store_settings,
+    convert_surface,
+    open_surface_array,
+    surface_from_array,
+)
+
+
+AGGREGATION_PREFIX = "ensemble-"
+
+moment_statistics = ["mean", "std"]
+quantile_statistics = {"p10": 0.1, "p50": 0.5, "p90": 0.9}
+aggregations = moment_statistics + list(quantile_statistics)
+
+geometry_keys = ["ncol", "nrow", "xori", "yori", "xinc", "yinc", "rotation", "yflip"]
+
+
+def get_aggregation_names():
+    """Return the realization dropdown values of the computed statistics"""
+    return [AGGREGATION_PREFIX + aggregation for aggregation in aggregations]
+
+
+def get_aggregation(realization):
+    """Return the statistic of a computed statistic dropdown value (or None)"""
+    if realization and realization.startswith(AGGREGATION_PREFIX):
+        aggregation = realization[len(AGGREGATION_PREFIX) :]
+
+        if aggregation in aggregations:
+            return aggregation
+
+    return None
+
+
+def open_realization(surface_path):
+    """Return the header and a (ncol, nrow) float32 array of a surface.
+    The array is memory-mapped from the surface store when possible"""
+    if store_settings["enabled"] and store_settings["writable"]:
+        try:
+            store_path = convert_surface(surface_path, store_settings["directory"])
+
+            return open_surface_array(store_path)
+        except OSError as error:
+            store_settings["writable"] = False
+            print("WARNING: surface store is not writable", surface_path, error)
+
+    surface = xtgeo.surface_from_file(surface_path)
+    header = {key: getattr(surface, key) for key in geometry_keys}
+    header["undef"] = np.nan
+    values = ma.filled(surface.values.astype(np.float32), np.nan)
+
+    return header, values
+
+
+def read_values(header, values, columns=slice(None)):
+    """Return (a column slice of) a realization as float64 with NaN for
+    undefined nodes"""
+    values = values[columns]
+
+    # Compared in the stored precision (float32 in the surface store)
+    undefined = values == np.array(header["undef"], dtype=values.dtype)
+    values = values.astype(np.float64)
+    values[undefined] = np.nan
+
+    return values
+
+
+def get_geometry(header):
+    return tuple(header[key] for key in geometry_keys)
+
+
+def nan_quantiles(stack, quantiles):
+    """Return the quantiles along the first axis of an array, ignoring NaN
+    (linear interpolation, as numpy.nanquantile, but vectorized)"""
+    stack = np.sort(stack, axis=0)
+    count = np.sum(~np.isnan(stack), axis=0)
+    last = np.maximum(count - 1, 0)
+    result = []
+
+    for quantile in quantiles:
+        position = quantile * last
+        lower = np.floor(position).astype(np.intp)
+        upper = np.minimum(lower + 1, last)
+
+        lower_values = np.take_along_axis(stack, lower[np.newaxis], axis=0)[0]
+        upper_values = np.take_along_axis(stack, upper[np.newaxis], axis=0)[0]
+
+        values = lower_values + (upper_values - lower_values) * (position - lower)
+        values[count == 0] = np.nan
+        result.append(values)
+
+    return result
+
+
+class RunningStatistics:
+    """Mean and standard deviation per node, updated one realization at a
+    time (Welford). Undefined (NaN) nodes are skipped per realization"""
+
+    def __init__(self, shape):
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.mean = np.zeros(shape, dtype=np.float64)
+        self.m2 = np.zeros(shape, dtype=np.float64)
+
+    def add(self, values):
+        valid = ~np.isnan(values)
+        self.count[valid] += 1
+
+        delta = values[valid] - self.mean[valid]
+        self.mean[valid] += delta / self.count[valid]
+        self.m2[valid] += delta * (values[valid] - self.mean[valid])
+
+    def get_mean(self):
+        return np.where(self.count > 0, self.mean, np.nan)
+
+    def get_std(self):
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=RuntimeWarning)
+
+            return np.where(self.count > 0, np.sqrt(self.m2 / self.count), np.nan)
+
+
+def read_realization(surface_path, geometry, columns=slice(None)):
+    """Return (a column slice of) a realization as float64, or None if its
+    grid geometry differs. The surface array is released after reading"""
+    header, values = open_realization(surface_path)
+
+    if get_geometry(header) != geometry:
+        print("WARNING: different grid geometry, skipped", surface_path)
+        return None
+
+    return read_values(header, values, columns)
+
+
+def read_realizations(
+    surface_paths, geometry, executor, chunk_size, columns=slice(None)
+):
+    """Yield (column slices of) the realizations with the given geometry,
+    reading chunk_size realizations at a time in an executor"""
+    for start in range(0, len(surface_paths), chunk_size):
+        chunk = surface_paths[start : start + chunk_size]
+
+        for values in executor.map(
+            lambda surface_path: read_realization(surface_path, geometry, columns),
+            chunk,
+        ):
+            if values is not None:
+                yield values
+
+
+def compute_moments(surface_paths, header, workers=4, chunk_size=8):
+    """Return {"mean", "std"} of realization surfaces with the grid geometry of
+    header. Only the chunk of realizations being read is kept in memory"""
+    running = RunningStatistics((header["ncol"], header["nrow"]))
+    geometry = get_geometry(header)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for values in read_realizations(surface_paths, geometry, executor, chunk_size):
+            running.add(values)
+
+    return {"mean": running.get_mean(), "std": running.get_std()}
+
+
+def get_band_quantiles(stack, executor, workers):
+    """Return the quantiles of a band of realizations (nreal, ncol, nrow),
+    computed for column tiles in an executor"""
+    quantiles = list(quantile_statistics.values())
+    tile_size = -(-stack.shape[1] // workers)
+    tiles = executor.map(
+        lambda start: nan_quantiles(stack[:, start : start + tile_size], quantiles),
+        range(0, stack.shape[1], tile_size),
+    )
+
+    return [np.concatenate(values) for values in zip(*tiles)]
+
+
+def compute_quantiles(surface_paths, header, workers=4, max_bytes=256 * 1024**2):
+    """Return {"p10", "p50", "p90"} of realization surfaces with the grid
+    geometry of header. The quantiles are computed for bands of columns of all
+    realizations, sized so that a band uses at most about max_bytes. Every band
+    reads all realizations again, which is cheap from the surface store
+    (memory-mapped) but parses the surface files again without it"""
+    ncol, nrow = header["ncol"], header["nrow"]
+    band_size = max(1, int(max_bytes // max(1, len(surface_paths) * nrow * 8)))
+    names = list(quantile_statistics)
+    results = {name: np.full((ncol, nrow), np.nan) for name in names}
+    geometry = get_geometry(header)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for band_start in range(0, ncol, band_size):
+            columns = slice(band_start, min(band_start + band_size, ncol))
+            stack = list(
+                read_realizations(surface_paths, geometry, executor, workers, columns)
+            )
+
+            if stack:
+                band_values = get_band_quantiles(np.stack(stack), executor, workers)
+
+                for name, values in zip(names, band_values):
+                    results[name][columns] = values
+
+    return results
+
+
+def aggregate_surfaces(surface_paths, aggregation, workers=4):
+    """Return the computed statistics (xtgeo surfaces) of the group of the
+    selected aggregation: mean and std, or all percentiles. The realizations
+    must have the grid geometry of the first one (others are skipped)"""
+    surface_paths = list(surface_paths)
+    header = open_realization(surface_paths[0])[0]
+
+    if aggregation in moment_statistics:
+        results = compute_moments(surface_paths, header, workers=workers)
+    else:
+        results = compute_quantiles(surface_paths, header, workers=workers)
+
+    return {
+        name: surface_from_array(header, values) for name, values in results.items()
+    }
+
+
+def get_aggregated_surface(surface_paths, aggregation, workers=4):
+    """Return (cache key, surface) of an ensemble statistic of the given
+    realization surfaces. The surfaces are cached in the surface cache"""
+    surface_keys = tuple(file_key(surface_path) for surface_path in surface_paths)
+    key = ("aggregation", aggregation) + surface_keys
+    surface = SURFACE_CACHE.get(key)
+
+    if surface is None:
+        surfaces = aggregate_surfaces(surface_paths, aggregation, workers=workers)
+
+        for name, aggregated_surface in surfaces.items():
+            SURFACE_CACHE.put(("aggregation", name) + surface_keys, aggregated_surface)
+
+        surface = surfaces[aggregation]
+
+    return key, surface
@@ -0,0 +1,121 @@
+import pandas as pd
+
+
+catalog_columns = [
+    "map_type",
+    "fmu_id.realization",
+    "fmu_id.iteration",
+    "data.name",
+    "data.attribute",
+    "data.time.t1",
+    "data.time.t2",
+]
+
+
+def normalize_metadata(surface_metadata):
+    """Return a copy of the surface metadata where missing values in the
+    catalog key columns are replaced by empty strings"""
+    metadata = surface_metadata.copy()
+
+    for column in catalog_columns + ["filename"]:
+        if column in metadata.columns:
+            values = metadata[column].astype(object)
+            metadata[column] = values.where(values.notna(), "")
+
+    return metadata
+
+
+class SurfaceCatalog:
+    """Lookup table for the surfaces listed in a surface metadata dataframe
+
+    The metadata is normalized once and every row is keyed by
+    (map_type, realization, iteration, name, attribute, t1, t2), so finding the
+    file for a selection is a dictionary lookup instead of a scan of the whole
+    dataframe."""
+
+    def __init__(self, surface_metadata):
+        if surface_metadata is None:
+            surface_metadata = pd.DataFrame(columns=catalog_columns + ["filename"])
+
+        self.metadata = normalize_metadata(surface_metadata)
+        self.filenames = self.metadata["filename"].values
+        self.realizations = self.metadata["fmu_id.realization"].values
+        self.index = {}
+        self.realization_index = {}
+
+        keys = zip(*[self.metadata[column].values for column in catalog_columns])
+
+        for row, key in enumerate(keys):
+            # Keep the first match, as the boolean scan used to do
+            if key not in self.index:
+                self.index[key] = row
+
+                # Rows of all realizations of a surface (without the realization)
+                if str(key[1]).startswith("realization"):
+                    group = (key[0],) + key[2:]
+                    self.realization_index.setdefault(group, []).append(row)
+
+    def __len__(self):
+        return len(self.index)
+
+    def get_row(self, map_type, realization, iteration, name, attribute, time1, time2):
+        """Return the row number of a surface in the metadata (or None)"""
+        key = (map_type, realization, iteration, name, attribute, time1, time2)
+
+        return self.index.get(key)
+
+    def get_filename(
+        self, map_type, realization, iteration, name, attribute, time1, time2
+    ):
+        """Return the file name of a surface (or None if it is not in the catalog)"""
+        row = self.get_row(
+            map_type, realization, iteration, name, attribute, time1, time2
+        )
+
+        if row is None:
+            return None
+
+        return self.filenames[row]
+
+    def get_metadata(
+        self, map_type, realization, iteration, name, attribute, time1, time2
+    ):
+        """Return the metadata row of a surface as a series (or None)"""
+        row = self.get_row(
+            map_type, realization, iteration, name, attribute, time1, time2
+        )
+
+        if row is None:
+            return None
+
+        return self.metadata.iloc[row]
+
+    def get_realization_filenames(
+        self, map_type, iteration, name, attribute, time1, time2
+    ):
+        """Return {realization: file name} of all realizations of a surface"""
+        rows = self.realization_index.get(
+            (map_type, iteration, name, attribute, time1, time2), []
+        )
+
+        return {self.realizations[row]: self.filenames[row] for row in rows}
+
+
+def get_interval_times(selected_interval, interval_mode):
+    """Return (t1, t2) for an interval string selected in the plugin"""
+    if interval_mode == "normal":
+        time2 = selected_interval[0:10]
+        time1 = selected_interval[11:]
+    else:
+        time1 = selected_interval[0:10]
+        time2 = selected_interval[11:]
+
+    return time1, time2
+
+
+def get_interval_name(time1, time2, interval_mode):
+    """Return the interval string selected in the plugin for (t1, t2)"""
+    if interval_mode == "normal":
+        return time2 + "-" + time1
+
+    return time1 + "-" + time2
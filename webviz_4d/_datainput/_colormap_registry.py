@@ -0,0 +1,70 @@
+"""Registry of encoded colormap images
+
+All matplotlib colormaps (including the reversed ones and the custom
+colormaps loaded from csv files) are encoded once, instead of being
+rebuilt and encoded for every rendered surface."""
+
+import threading
+import matplotlib
+
+from .image_processing import array_to_png_bytes, get_colormap_array
+from ._image_store import IMAGE_STORE
+
+
+class ColormapRegistry:
+    """Encoded png bytes and urls of colormap images by colormap name"""
+
+    def __init__(self):
+        self.images = {}
+        self.urls = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self.images
+
+    def register(self, name):
+        """Encode a colormap and store its image and url"""
+        image_bytes = array_to_png_bytes(get_colormap_array(name), colormap=True)
+
+        with self._lock:
+            self.images[name] = image_bytes
+            self.urls[name] = IMAGE_STORE.add(image_bytes)
+
+    def fill(self, names=None):
+        """Register colormaps (default: all colormaps known by matplotlib)"""
+        if names is None:
+            names = list(matplotlib.colormaps)
+
+        for name in names:
+            if name in self.images:
+                continue
+
+            # A broken colormap is left out (and fails when it is selected)
+            try:
+                self.register(name)
+            except Exception as error:  # pylint: disable=broad-except
+                print("WARNING: colormap not registered", name, error)
+
+    def get_image(self, name):
+        """Return the png bytes of a colormap image"""
+        if name not in self.images:
+            self.register(name)
+
+        return self.images[name]
+
+    def get_url(self, name):
+        """Return the url (or data url) of a colormap image"""
+        if name not in self.urls:
+            self.register(name)
+        elif not IMAGE_STORE.keep_url(self.urls[name]):
+            with self._lock:
+                self.urls[name] = IMAGE_STORE.add(self.images[name])
+
+        return self.urls[name]
+
+
+COLORMAP_REGISTRY = ColormapRegistry()
+
+
+def get_colormap_url(name):
+    return COLORMAP_REGISTRY.get_url(name)
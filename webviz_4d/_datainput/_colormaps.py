@@ -2,9 +2,8 @@ import os
 import glob
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as pl
+import matplotlib
 from matplotlib import colors
-from matplotlib import cm
 from matplotlib.colors import ListedColormap
 
 
@@ -21,18 +20,18 @@ def load_custom_colormaps(csv_files):
 
         name = colormap_df["name"].unique()[0]
 
-        if not name in pl.colormaps():
+        if not name in matplotlib.colormaps:
             color_map = colors.LinearSegmentedColormap.from_list(name, array)
-            pl.register_cmap(cmap=color_map)
+            matplotlib.colormaps.register(cmap=color_map)
 
             color_map_r = color_map.reversed()
-            pl.register_cmap(cmap=color_map_r)
+            matplotlib.colormaps.register(cmap=color_map_r)
 
 
 def change_colormap(name, red_start, green_start, blue_start, n_values):
     """Modify an existing colormap by changing the start color"""
 
-    colormap = cm.get_cmap(name, 256)
+    colormap = matplotlib.colormaps[name].resampled(256)
     newcolors = colormap(np.linspace(0, 1, 256))
     # pylint: disable=no-member
 
@@ -0,0 +1,119 @@
+"""4D intervals of additive attributes derived from incremental intervals
+
+An interval (t1, t2) which is not on disk can be assembled as the sum of the
+incremental (consecutive dates) surfaces between t1 and t2. Only the
+increments in the interval are summed (a node is undefined if it is undefined
+in one of them). The increments are cached as float64 arrays, so that
+neighbouring intervals reuse each other's reads and conversions."""
+
+import numpy.ma as ma
+
+from ._catalog import normalize_metadata, get_interval_name
+from ._metadata import get_all_intervals
+from ._surface import load_surface
+from ._surface_cache import SURFACE_CACHE, file_key
+
+
+def get_date_chains(incremental_intervals):
+    """Return the chains of consecutive dates of a list of (t1, t2) increments"""
+    chains = []
+
+    for time1, time2 in sorted(incremental_intervals):
+        if chains and chains[-1][-1] == time1:
+            chains[-1].append(time2)
+        else:
+            chains.append([time1, time2])
+
+    return chains
+
+
+class DerivedIntervals:
+    """The intervals (per map type) which can be derived for additive attributes"""
+
+    def __init__(self, surface_metadata, additive_attributes, interval_mode="normal"):
+        self.additive_attributes = list(additive_attributes or [])
+        self.interval_mode = interval_mode
+        self.chains = {}
+        self.intervals = {}
+
+        if surface_metadata is None or not self.additive_attributes:
+            return
+
+        metadata = normalize_metadata(surface_metadata)
+        metadata = metadata[
+            metadata["data.attribute"].isin(self.additive_attributes)
+            & (metadata["data.time.t1"] != "")
+            & (metadata["data.time.t2"] != "")
+        ]
+
+        for map_type, map_df in metadata.groupby("map_type"):
+            # get_all_intervals returns "t1-t2" in normal mode
+            all_intervals, incremental_intervals = get_all_intervals(map_df, "normal")
+            chains = get_date_chains(
+                [(interval[:10], interval[11:]) for interval in incremental_intervals]
+            )
+            existing = set(all_intervals)
+            derived = []
+
+            for chain in chains:
+                for start, time1 in enumerate(chain):
+                    for time2 in chain[start + 2 :]:
+                        if time1 + "-" + time2 not in existing:
+                            derived.append(
+                                get_interval_name(time1, time2, interval_mode)
+                            )
+
+            self.chains[map_type] = chains
+            self.intervals[map_type] = sorted(derived)
+
+    def get_intervals(self, map_type):
+        """Return the derived interval names of a map type"""
+        return self.intervals.get(map_type, [])
+
+    def is_derived(self, map_type, attribute, interval):
+        if attribute not in self.additive_attributes:
+            return False
+
+        return interval in self.get_intervals(map_type)
+
+    def get_chain(self, map_type, time1, time2):
+        """Return the chain of incremental dates containing t1 and t2 (or None)"""
+        for chain in self.chains.get(map_type, []):
+            if time1 in chain and time2 in chain:
+                return chain
+
+        return None
+
+
+def get_increment_values(surface_file):
+    """Return the (cached) values of an incremental surface as float64"""
+    return SURFACE_CACHE.get_or_create(
+        ("increment",) + file_key(surface_file),
+        lambda: ma.masked_invalid(load_surface(surface_file).values.astype("float64")),
+    )
+
+
+def sum_increments(surface_files, start, end):
+    """Return (cache key, surface) of the sum of the increments start to end - 1
+    of a chain. surface_files[i] is the increment from date i to date i + 1
+    (None if missing). Return None if an increment is missing"""
+    if start >= end or None in surface_files[start:end]:
+        return None
+
+    files = surface_files[start:end]
+    values = get_increment_values(files[0]).copy()
+
+    for surface_file in files[1:]:
+        increment = get_increment_values(surface_file)
+
+        if values.shape != increment.shape:
+            raise ValueError("Incremental surfaces have different grid geometry")
+
+        values = values + increment
+
+    surface = load_surface(files[-1]).copy()
+    surface.values = values
+
+    key = ("derived",) + tuple(file_key(surface_file) for surface_file in files)
+
+    return key, surface
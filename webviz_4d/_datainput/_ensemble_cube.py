@@ -0,0 +1,326 @@
+"""Memory-mapped stack of all realizations of a surface selection
+
+The cube is a float32 .npy file with shape (realizations, ncol, nrow) (the
+xtgeo array order), with NaN for undefined nodes. It is built once per
+selection from the realization surfaces, and a point or window probe is then
+a single strided read of the memory map instead of loading every surface.
+
+The cube directory is kept below a byte budget (least recently used cubes are
+removed first), and only a limited number of cubes are kept open."""
+
+import os
+import re
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from ._aggregation import (
+    geometry_keys,
+    get_geometry,
+    open_realization,
+    read_realization,
+)
+from ._residual import get_fractional_indices
+from ._snapshot import get_tmp_path
+from ._surface_cache import file_key
+from ._surface_store import store_settings
+
+
+CUBE_SUFFIX = ".npy"
+CUBE_NAME_PATTERN = re.compile(r"^[0-9a-f]{40}\.npy$")
+DEFAULT_CUBE_DIRECTORY_MB = 4096
+DEFAULT_OPEN_CUBES = 8
+
+
+def get_cube_directory():
+    """Return the directory of the cubes (the surface store directory if set)"""
+    directory = store_settings["directory"] or os.path.join(
+        tempfile.gettempdir(), "webviz_4d_cubes"
+    )
+    os.makedirs(directory, exist_ok=True)
+
+    return directory
+
+
+def get_cube_path(surface_keys, directory=None):
+    """Return the path to the cube of a list of surface file keys"""
+    digest = hashlib.sha1(json.dumps(surface_keys).encode("utf-8")).hexdigest()
+
+    return os.path.join(directory or get_cube_directory(), digest + CUBE_SUFFIX)
+
+
+def get_info_path(cube_path):
+    return os.path.splitext(cube_path)[0] + ".json"
+
+
+def build_cube(surface_files, cube_path, workers=4):
+    """Write the cube of a dict {realization: surface file} and its geometry
+    and realizations to a json file next to it. The realizations are read in
+    chunks, so that only the chunk being written is kept in memory"""
+    realizations = list(surface_files)
+    surface_paths = list(surface_files.values())
+    header = open_realization(surface_paths[0])[0]
+    geometry = get_geometry(header)
+    shape = (len(surface_paths), header["ncol"], header["nrow"])
+    tmp_path = get_tmp_path(cube_path)
+    info_path = get_info_path(cube_path)
+    tmp_info_path = get_tmp_path(info_path)
+
+    try:
+        cube = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float32, shape=shape
+        )
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for start in range(0, len(surface_paths), workers):
+                chunk = executor.map(
+                    lambda surface_path: read_realization(surface_path, geometry),
+                    surface_paths[start : start + workers],
+                )
+
+                for index, values in enumerate(chunk, start):
+                    cube[index] = np.nan if values is None else values
+
+        cube.flush()
+        del cube
+
+        info = {key: header[key] for key in geometry_keys}
+        info["realizations"] = realizations
+
+        with open(tmp_info_path, "w") as stream:
+            json.dump(info, stream)
+
+        # The cube is complete once it has its final name
+        os.replace(tmp_info_path, info_path)
+        os.replace(tmp_path, cube_path)
+    finally:
+        for path in [tmp_path, tmp_info_path]:
+            if os.path.isfile(path):
+                os.remove(path)
+
+
+class EnsembleCube:
+    """Read-only memory-mapped realization stack with point/window probes"""
+
+    def __init__(self, cube_path):
+        self.cube_path = cube_path
+        self.values = np.load(cube_path, mmap_mode="r")
+
+        with open(get_info_path(cube_path)) as stream:
+            info = json.load(stream)
+
+        self.realizations = info["realizations"]
+        self.geometry = tuple(info[key] for key in geometry_keys)
+
+    def close(self):
+        """Release the memory map. It is unmapped when no probe in progress
+        uses it, and opened again if the cube is probed later"""
+        self.values = None
+
+    def get_values(self):
+        values = self.values
+
+        if values is None:
+            values = self.values = np.load(self.cube_path, mmap_mode="r")
+
+        return values
+
+    def get_node(self, x_coord, y_coord):
+        """Return the nearest node (i, j) of a position (None if outside)"""
+        i_index, j_index = get_fractional_indices(self.geometry, x_coord, y_coord)
+        i_index = int(np.round(i_index))
+        j_index = int(np.round(j_index))
+
+        if 0 <= i_index < self.geometry[0] and 0 <= j_index < self.geometry[1]:
+            return i_index, j_index
+
+        return None
+
+    def probe(self, x_coord, y_coord, window=0):
+        """Return the values of all realizations at a position, averaged over
+        (2 * window + 1)^2 nodes if window > 0 (None if outside the grid)"""
+        node = self.get_node(x_coord, y_coord)
+
+        if node is None:
+            return None
+
+        i_index, j_index = node
+        values = self.get_values()
+
+        if window == 0:
+            return np.array(values[:, i_index, j_index], dtype=np.float64)
+
+        block = np.array(
+            values[
+                :,
+                max(0, i_index - window) : i_index + window + 1,
+                max(0, j_index - window) : j_index + window + 1,
+            ],
+            dtype=np.float64,
+        )
+        defined = np.isfinite(block).any(axis=(1, 2))
+        result = np.full(block.shape[0], np.nan)
+        result[defined] = np.nanmean(block[defined], axis=(1, 2))
+
+        return result
+
+
+class EnsembleCubes:
+    """Opened cubes (LRU) and the cube directory, kept below a byte budget.
+    Every cube is built once, also if requested from several threads, without
+    blocking probes of other cubes"""
+
+    def __init__(
+        self,
+        max_bytes=DEFAULT_CUBE_DIRECTORY_MB * 1024**2,
+        max_open=DEFAULT_OPEN_CUBES,
+    ):
+        self.max_bytes = max_bytes
+        self.max_open = max_open
+        self.cubes = OrderedDict()
+        self.locks = defaultdict(threading.Lock)
+        self.lock = threading.Lock()
+
+    def configure(self, max_bytes=None, max_open=None):
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+
+        if max_open is not None:
+            self.max_open = max_open
+
+    def get(self, surface_files, workers=4):
+        """Return the (opened) cube of a dict {realization: surface file},
+        built if missing. A changed surface file gives a new cube"""
+        surface_keys = [
+            [realization] + list(file_key(surface_file))
+            for realization, surface_file in surface_files.items()
+        ]
+        cube_path = get_cube_path(surface_keys)
+
+        with self.lock:
+            cube = self.cubes.get(cube_path)
+
+            if cube is not None:
+                self.cubes.move_to_end(cube_path)
+                return cube
+
+            cube_lock = self.locks[cube_path]
+
+        with cube_lock:
+            with self.lock:
+                cube = self.cubes.get(cube_path)
+
+            if cube is None:
+                built = not os.path.isfile(cube_path)
+
+                if built:
+                    build_cube(surface_files, cube_path, workers=workers)
+
+                # Mark the cube as recently used for all server processes
+                os.utime(cube_path)
+                cube = EnsembleCube(cube_path)
+
+                with self.lock:
+                    self.cubes[cube_path] = cube
+                    self.locks.pop(cube_path, None)
+                    self._close_cubes(self.max_open)
+
+                if built:
+                    self.prune(keep=cube_path)
+
+        return cube
+
+    def prune(self, keep=None):
+        """Remove the least recently used cubes until the cube directory holds
+        at most max_bytes (the cube keep is never removed)"""
+        directory = get_cube_directory()
+        files = []
+
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if CUBE_NAME_PATTERN.match(entry.name) and entry.path != keep:
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+
+                    files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        directory_bytes = sum(size for _mtime, size, _path in files)
+
+        if keep is not None and os.path.isfile(keep):
+            directory_bytes += os.path.getsize(keep)
+
+        for _mtime, size, cube_path in sorted(files):
+            if directory_bytes <= self.max_bytes:
+                break
+
+            with self.lock:
+                cube = self.cubes.pop(cube_path, None)
+
+            if cube is not None:
+                cube.close()
+
+            for path in [cube_path, get_info_path(cube_path)]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # Removed by another process
+
+            directory_bytes -= size
+
+    def _close_cubes(self, max_open):
+        while len(self.cubes) > max_open:
+            _cube_path, cube = self.cubes.popitem(last=False)
+            cube.close()
+
+
+ENSEMBLE_CUBES = EnsembleCubes()
+
+
+def get_ensemble_cube(surface_files, workers=4):
+    """Return the (opened) cube of a dict {realization: surface file}, built
+    if missing. A changed surface file gives a new cube"""
+    return ENSEMBLE_CUBES.get(surface_files, workers=workers)
+
+
+def get_probe_figure(values, realizations, title, unit=""):
+    """Return a plotly figure (dict) with a histogram and a box plot of the
+    probed values of all realizations"""
+    defined = np.isfinite(values)
+    values = values[defined].tolist()
+    realizations = [real for real, ok in zip(realizations, defined) if ok]
+
+    return {
+        "data": [
+            {
+                "type": "histogram",
+                "x": values,
+                "name": "Realizations",
+                "marker": {"color": "steelblue"},
+            },
+            {
+                "type": "box",
+                "x": values,
+                "text": realizations,
+                "name": "",
+                "yaxis": "y2",
+                "boxpoints": "all",
+                "hoverinfo": "x+text",
+                "marker": {"color": "steelblue"},
+            },
+        ],
+        "layout": {
+            "title": {"text": title, "font": {"size": 15}},
+            "xaxis": {"title": {"text": str(unit)}},
+            "yaxis": {"domain": [0, 0.75], "title": {"text": "Realizations"}},
+            "yaxis2": {"domain": [0.8, 1], "showticklabels": False},
+            "showlegend": False,
+            "height": 450,
+            "margin": {"l": 60, "r": 20, "t": 60, "b": 40},
+        },
+    }
@@ -0,0 +1,193 @@
+"""Content addressed store for rendered images
+
+When a route is configured (see the SurfaceViewer4D image route), images are
+stored by their content hash and referred to by a url, so that browsers can
+cache them. Without a route the images are returned as base64 data urls.
+The store also holds the serialized (JSON) static layer bundles.
+
+The image directory is shared by all server processes and kept below a byte
+budget: when it is exceeded, the least recently used files (by modification
+time, which is updated when a file is added again or read) are removed.
+Holders of urls (e.g. cached layers) check them with keep_url before they
+are used again, and add the image again if it was removed."""
+
+import os
+import re
+import hashlib
+import tempfile
+import threading
+
+from ._surface_cache import SurfaceCache
+from ._snapshot import get_tmp_path
+from .image_processing import to_data_url
+
+
+IMAGE_NAME_PATTERN = re.compile(r"^[0-9a-f]{32}\.[a-z]+$")
+DEFAULT_IMAGE_DIRECTORY_MB = 2048
+PRUNE_FRACTION = 0.8
+
+mimetypes = {"image/png": ".png", "image/webp": ".webp", "application/json": ".json"}
+
+
+class ImageStore:
+    """Images in memory (LRU) and on disk, named by content hash"""
+
+    def __init__(self, max_bytes=256 * 1024**2):
+        self.route = None
+        self.directory = None
+        self.max_directory_bytes = DEFAULT_IMAGE_DIRECTORY_MB * 1024**2
+        self.directory_bytes = 0
+        self.images = SurfaceCache(max_bytes=max_bytes)
+        self.lock = threading.Lock()
+
+    def configure(
+        self,
+        route,
+        directory=None,
+        max_directory_bytes=DEFAULT_IMAGE_DIRECTORY_MB * 1024**2,
+    ):
+        """Serve the images from a url route. The images are also written to
+        a directory (at most max_directory_bytes), so that all server processes
+        can serve them"""
+        if directory is None:
+            directory = os.path.join(tempfile.gettempdir(), "webviz_4d_images")
+
+        os.makedirs(directory, exist_ok=True)
+
+        self.route = route.rstrip("/")
+        self.directory = directory
+        self.max_directory_bytes = max_directory_bytes
+        self.prune()
+
+    def add(self, image_bytes, mimetype="image/png"):
+        """Store encoded image bytes and return the url to the image"""
+        if self.route is None:
+            return to_data_url(image_bytes, mimetype)
+
+        digest = hashlib.sha256(image_bytes).hexdigest()[:32]
+        name = digest + mimetypes.get(mimetype, ".png")
+
+        if name not in self.images:
+            self.images.put(name, image_bytes)
+
+        self._write(name, image_bytes)
+
+        return self.route + "/" + name
+
+    def get(self, name):
+        """Return the bytes of a stored image (or None)"""
+        if not IMAGE_NAME_PATTERN.match(name):
+            return None
+
+        image_bytes = self.images.get(name)
+
+        if image_bytes is None and self.directory is not None:
+            image_file = os.path.join(self.directory, name)
+
+            try:
+                with open(image_file, "rb") as stream:
+                    image_bytes = stream.read()
+
+                os.utime(image_file)
+            except OSError:
+                return None
+
+            self.images.put(name, image_bytes)
+
+        return image_bytes
+
+    def keep_url(self, url):
+        """Mark the image of a url as recently used. Return False if the image
+        is no longer stored (it must be added again to be served)"""
+        if self.route is None or not url.startswith(self.route + "/"):
+            return True  # Data urls
+
+        name = url[len(self.route) + 1 :]
+        image_bytes = self.images.get(name)
+
+        if image_bytes is not None:
+            self._write(name, image_bytes)  # Written again if it was removed
+            return True
+
+        try:
+            os.utime(os.path.join(self.directory, name))
+        except OSError:
+            return False
+
+        return True
+
+    def prune(self):
+        """Remove the least recently used image files until the directory
+        holds at most a fraction of its byte budget"""
+        files = []
+
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if IMAGE_NAME_PATTERN.match(entry.name):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+
+                    files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        directory_bytes = sum(size for _mtime, size, _path in files)
+
+        if directory_bytes > self.max_directory_bytes:
+            for _mtime, size, path in sorted(files):
+                if directory_bytes <= PRUNE_FRACTION * self.max_directory_bytes:
+                    break
+
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue  # Removed by another process
+
+                directory_bytes -= size
+
+        with self.lock:
+            self.directory_bytes = directory_bytes
+
+    def _write(self, name, image_bytes):
+        image_file = os.path.join(self.directory, name)
+
+        # An existing file is marked as recently used
+        try:
+            os.utime(image_file)
+            return
+        except OSError:
+            pass
+
+        tmp_file = get_tmp_path(image_file)
+
+        try:
+            with open(tmp_file, "wb") as stream:
+                stream.write(image_bytes)
+
+            os.replace(tmp_file, image_file)
+        except OSError as error:
+            print("WARNING: image not written to", image_file, error)
+
+            if os.path.isfile(tmp_file):
+                os.remove(tmp_file)
+
+            return
+
+        with self.lock:
+            self.directory_bytes += len(image_bytes)
+            prune = self.directory_bytes > self.max_directory_bytes
+
+        if prune:
+            self.prune()
+
+
+def get_mimetype(name):
+    """Return the mimetype of a stored image from its name"""
+    for mimetype, suffix in mimetypes.items():
+        if name.endswith(suffix):
+            return mimetype
+
+    return "application/octet-stream"
+
+
+IMAGE_STORE = ImageStore()
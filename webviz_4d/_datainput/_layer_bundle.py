@@ -0,0 +1,74 @@
+"""Static well and polygon layers shared by all maps, serialized once
+
+A bundle is a list of layers serialized to JSON bytes and put in the image
+store, so that it is served by content hash (and cached by the browsers) from
+the image route. The map callbacks only return the url to the bundle, which
+the browser fetches once and merges with the surface layer. The bundles are
+cached by the identity of the layer objects, i.e. a new version of a layer
+(another layer object) gives a new bundle."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from plotly.io.json import to_json_plotly
+
+from ._image_store import IMAGE_STORE
+from ._surface_cache import SURFACE_CACHE
+
+
+MAX_BUNDLES = 32
+
+
+class LayerBundles:
+    """Urls to serialized lists of layers, keyed by the layer objects"""
+
+    def __init__(self, max_bundles=MAX_BUNDLES):
+        self.max_bundles = max_bundles
+        self.bundles = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_url(self, layers):
+        """Return the url to the JSON of a list of layers (None if empty).
+        The layers are serialized the first time the list is seen"""
+        if not layers:
+            return None
+
+        key = tuple(id(layer) for layer in layers)
+
+        with self.lock:
+            cached = self.bundles.get(key)
+
+            # The entry holds the layers, so the ids in the key stay theirs
+            if cached is not None and all(
+                cached_layer is layer for cached_layer, layer in zip(cached[0], layers)
+            ):
+                self.bundles.move_to_end(key)
+                url = cached[1]
+            else:
+                url = None
+
+        if url is not None and IMAGE_STORE.keep_url(url):
+            return url
+
+        bundle_bytes = to_json_plotly(layers).encode("utf-8")
+        url = IMAGE_STORE.add(bundle_bytes, "application/json")
+
+        with self.lock:
+            self.bundles[key] = (list(layers), url)
+
+            while len(self.bundles) > self.max_bundles:
+                self.bundles.popitem(last=False)
+
+        return url
+
+
+LAYER_BUNDLES = LayerBundles()
+
+
+def get_layer_digest(layer):
+    """Return the (cached) digest of the JSON of a layer"""
+    return SURFACE_CACHE.get_or_create_for(
+        layer,
+        "layer-digest",
+        lambda: hashlib.sha1(to_json_plotly(layer).encode("utf-8")).hexdigest(),
+    )
@@ -0,0 +1,98 @@
+"""Compact encoding of the positions in well and polygon layers
+
+The positions are rounded to a number of decimals before they are encoded as
+JSON (one decimal, i.e. decimeters, is enough to display UTM coordinates).
+Optionally the vertices are delta encoded: the rounded positions are scaled
+to integers and every vertex is stored as the difference to the previous one.
+Delta encoded layers must be decoded (delta_decode_layer) before they are
+given to LayeredMap."""
+
+import numpy as np
+
+from ._surface_cache import SURFACE_CACHE
+from ._simplify import get_line_array
+
+
+DEFAULT_DECIMALS = 1
+
+
+def quantize_positions(positions, decimals=DEFAULT_DECIMALS):
+    """Return positions rounded to a number of decimals (same container type)"""
+    array = get_line_array(positions)
+
+    if array is None:
+        return positions
+
+    rounded = np.round(array, decimals)
+
+    return rounded if isinstance(positions, np.ndarray) else rounded.tolist()
+
+
+def delta_encode_positions(positions, decimals=DEFAULT_DECIMALS):
+    """Return a flat list of integers [x0, y0, dx1, dy1, ...] in units of
+    10^-decimals (an empty list if there are no x/y positions)"""
+    array = get_line_array(positions)
+
+    if array is None:
+        return []
+
+    scaled = np.round(array[:, :2] * 10**decimals).astype(np.int64)
+    scaled[1:] -= scaled[:-1].copy()
+
+    return scaled.ravel().tolist()
+
+
+def delta_decode_positions(values, decimals=DEFAULT_DECIMALS):
+    """Return the (n, 2) positions of delta encoded values"""
+    scaled = np.asarray(values, dtype=np.int64).reshape(-1, 2)
+
+    return np.cumsum(scaled, axis=0) / 10**decimals
+
+
+def encode_layer(layer, decimals=DEFAULT_DECIMALS, delta=False):
+    """Return a copy of a layer with rounded positions, or delta encoded
+    positions ("delta_positions" and "decimals" instead of "positions")"""
+    data = []
+
+    for item in layer.get("data", []):
+        if "positions" in item:
+            item = dict(item)
+
+            if delta:
+                item["delta_positions"] = delta_encode_positions(
+                    item.pop("positions"), decimals
+                )
+                item["decimals"] = decimals
+            else:
+                item["positions"] = quantize_positions(item["positions"], decimals)
+
+        data.append(item)
+
+    return dict(layer, data=data)
+
+
+def delta_decode_layer(layer):
+    """Return a copy of a delta encoded layer with plain positions"""
+    data = []
+
+    for item in layer.get("data", []):
+        if "delta_positions" in item:
+            item = dict(item)
+            positions = delta_decode_positions(
+                item.pop("delta_positions"), item.pop("decimals")
+            )
+            item["positions"] = positions.tolist() if len(positions) > 0 else [[]]
+
+        data.append(item)
+
+    return dict(layer, data=data)
+
+
+def get_quantized_layer(layer, decimals=DEFAULT_DECIMALS):
+    """Return the (cached) layer with positions rounded to a number of decimals"""
+    if not isinstance(layer, dict) or layer.get("base_layer") or decimals is None:
+        return layer
+
+    return SURFACE_CACHE.get_or_create_for(
+        layer, ("quantized", decimals), lambda: encode_layer(layer, decimals)
+    )
@@ -0,0 +1,140 @@
+"""Misfit between an observed surface and the realizations of an ensemble
+
+The scores (RMS of the difference, normalized correlation and the fraction of
+nodes where the signs agree) are cached per pair of surface files. Surfaces
+already in the surface cache are scored directly, the others are read and
+scored in a thread pool (the work is NumPy and file reading, which release the
+GIL) without being added to the surface cache."""
+
+from itertools import repeat
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import numpy.ma as ma
+
+from ._surface import load_surface, read_surface
+from ._surface_cache import SURFACE_CACHE, file_key
+from ._residual import get_geometry, get_resampling_weights, resample_values
+
+
+misfit_metrics = {
+    "rms": {"label": "RMS", "ascending": True},
+    "correlation": {"label": "Correlation", "ascending": False},
+    "sign_agreement": {"label": "Sign agreement", "ascending": False},
+}
+
+
+def compute_misfit(observed_values, simulated_values):
+    """Return the misfit scores of two (masked) arrays of the same shape"""
+    observed_values = ma.masked_invalid(observed_values).astype(np.float64)
+    simulated_values = ma.masked_invalid(simulated_values).astype(np.float64)
+    defined = ~(ma.getmaskarray(observed_values) | ma.getmaskarray(simulated_values))
+
+    observed = ma.getdata(observed_values)[defined]
+    simulated = ma.getdata(simulated_values)[defined]
+
+    if observed.size == 0:
+        return {name: np.nan for name in misfit_metrics}
+
+    observed_anomaly = observed - observed.mean()
+    simulated_anomaly = simulated - simulated.mean()
+    norm = np.sqrt(np.sum(observed_anomaly**2) * np.sum(simulated_anomaly**2))
+
+    return {
+        "rms": float(np.sqrt(np.mean((simulated - observed) ** 2))),
+        "correlation": (
+            float(np.sum(observed_anomaly * simulated_anomaly) / norm)
+            if norm > 0
+            else np.nan
+        ),
+        "sign_agreement": float(np.mean(np.sign(observed) == np.sign(simulated))),
+    }
+
+
+def get_surface_misfit(observed_surface, surface):
+    """Return the misfit scores of a surface, resampled to the observed grid
+    if the grid geometries differ"""
+    geometry = get_geometry(observed_surface)
+    other_geometry = get_geometry(surface)
+
+    if geometry == other_geometry:
+        values = surface.values
+    else:
+        indices, weights = get_resampling_weights(other_geometry, geometry)
+        values = resample_values(
+            surface.values, indices, weights, observed_surface.values.shape
+        )
+
+    return compute_misfit(observed_surface.values, values)
+
+
+def compute_file_misfit(observed_surface, surface_path):
+    """Return (surface path, misfit scores) of a surface file. The surface is
+    read without caching it"""
+    return surface_path, get_surface_misfit(
+        observed_surface, read_surface(surface_path)
+    )
+
+
+def get_misfit_scores(observed_path, surface_files, workers=4):
+    """Return {realization: misfit scores} for {realization: surface file}"""
+    observed_key = file_key(observed_path)
+    observed_surface = load_surface(observed_path)
+    scores = {}
+    missing = {}
+
+    for realization, surface_path in surface_files.items():
+        key = ("misfit", observed_key, file_key(surface_path))
+        realization_scores = SURFACE_CACHE.get(key)
+
+        if realization_scores is None:
+            if ("surface",) + file_key(surface_path) in SURFACE_CACHE:
+                realization_scores = get_surface_misfit(
+                    observed_surface, load_surface(surface_path)
+                )
+                SURFACE_CACHE.put(key, realization_scores)
+            else:
+                missing[surface_path] = realization
+                continue
+
+        scores[realization] = realization_scores
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(
+            executor.map(compute_file_misfit, repeat(observed_surface), missing)
+        )
+
+    for surface_path, realization_scores in results:
+        key = ("misfit", observed_key, file_key(surface_path))
+        SURFACE_CACHE.put(key, realization_scores)
+        scores[missing[surface_path]] = realization_scores
+
+    return scores
+
+
+def rank_realizations(scores, metric="rms"):
+    """Return the realizations sorted from best to worst match (undefined
+    scores last)"""
+    ascending = misfit_metrics[metric]["ascending"]
+
+    def sort_key(realization):
+        value = scores[realization][metric]
+
+        if value is None or np.isnan(value):
+            return (1, 0.0)
+
+        return (0, value if ascending else -value)
+
+    return sorted(scores, key=sort_key)
+
+
+def get_misfit_label(realization, realization_scores):
+    """Return a realization dropdown label annotated with the misfit scores"""
+    return (
+        realization
+        + " (RMS "
+        + f"{realization_scores['rms']:.3g}"
+        + ", corr "
+        + f"{realization_scores['correlation']:.2f}"
+        + ", sign "
+        + f"{100 * realization_scores['sign_agreement']:.0f}%)"
+    )
@@ -4,7 +4,7 @@ import pandas as pd
 from pathlib import Path
 
 from webviz_4d._datainput import common
-from webviz_4d._datainput.well import get_well_polyline
+from webviz_4d._datainput.well import WellIndex, polyline_delta
 
 # from webviz_4d.plugins._surface_viewer_4D._webvizstore import get_path
 
@@ -72,7 +72,8 @@ def make_new_well_layer(
     wells_df,
     label="Drilled wells",
 ):
-    """Make layeredmap wells layer"""
+    """Make layeredmap wells layer. wells_df is a WellIndex or a dataframe
+    with the trajectories of all wells (indexed here)"""
     # t0 = time.time()
     data = []
 
@@ -83,20 +84,28 @@ def make_new_well_layer(
     else:
         layer_df = pd.DataFrame()
 
-    for _index, row in layer_df.iterrows():
-        true_name = row["true_name"]
-        well_dataframe = wells_df[wells_df["WELLBORE_NAME"] == true_name]
+    if not isinstance(wells_df, WellIndex):
+        wells_df = WellIndex(wells_df)
 
-        polyline_data = get_well_polyline(
-            well_dataframe,
-            row["md_start"],
-            row["md_end"],
-            row["color"],
-            row["tooltip"],
+    if not layer_df.empty:
+        all_positions = wells_df.get_positions(
+            layer_df["true_name"].values,
+            layer_df["md_start"].values,
+            layer_df["md_end"].values,
+            polyline_delta,
         )
 
-        if polyline_data:
-            data.append(polyline_data)
+        for positions, color, tooltip in zip(
+            all_positions, layer_df["color"].values, layer_df["tooltip"].values
+        ):
+            data.append(
+                {
+                    "type": "polyline",
+                    "color": color,
+                    "positions": positions,
+                    "tooltip": tooltip,
+                }
+            )
 
     layer = {"name": label, "checked": False, "base_layer": False, "data": data}
 
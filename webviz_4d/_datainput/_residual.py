@@ -0,0 +1,152 @@
+"""Difference (residual) of two surfaces, e.g. observed minus simulated
+
+When the two surfaces have different grid geometries, the second surface is
+resampled (bilinear) to the grid of the first one. The resampling indices and
+weights only depend on the two geometries, so they are computed once per
+geometry pair and kept in the surface cache."""
+
+import math
+import numpy as np
+import numpy.ma as ma
+
+from ._aggregation import geometry_keys
+from ._surface_cache import SURFACE_CACHE
+
+
+# Fractional indices closer than this to the first/last node are on the edge
+EDGE_TOLERANCE = 1.0e-6
+
+
+def get_geometry(surface):
+    """Return the grid geometry of a surface as a (hashable) tuple"""
+    return tuple(getattr(surface, key) for key in geometry_keys)
+
+
+def get_node_coordinates(geometry):
+    """Return the x and y coordinates of all nodes (ncol, nrow) of a grid"""
+    ncol, nrow, xori, yori, xinc, yinc, rotation, yflip = geometry
+    angle = math.radians(rotation)
+
+    i_index, j_index = np.meshgrid(
+        np.arange(ncol, dtype=np.float64),
+        np.arange(nrow, dtype=np.float64),
+        indexing="ij",
+    )
+    x_local = i_index * xinc
+    y_local = j_index * yinc * yflip
+
+    x_coord = xori + x_local * math.cos(angle) - y_local * math.sin(angle)
+    y_coord = yori + x_local * math.sin(angle) + y_local * math.cos(angle)
+
+    return x_coord, y_coord
+
+
+def get_fractional_indices(geometry, x_coord, y_coord):
+    """Return the fractional (i, j) node indices of x/y coordinates in a grid"""
+    _ncol, _nrow, xori, yori, xinc, yinc, rotation, yflip = geometry
+    angle = math.radians(rotation)
+
+    x_delta = np.asarray(x_coord, dtype=np.float64) - xori
+    y_delta = np.asarray(y_coord, dtype=np.float64) - yori
+
+    i_index = (x_delta * math.cos(angle) + y_delta * math.sin(angle)) / xinc
+    y_step = yinc * yflip
+    j_index = (-x_delta * math.sin(angle) + y_delta * math.cos(angle)) / y_step
+
+    return i_index, j_index
+
+
+def get_cell_positions(index, count):
+    """Return (lower node, fraction, outside) of fractional indices along a
+    grid axis with count nodes. Indices on the last node use the cell before,
+    indices beyond the first or last node are outside"""
+    index = np.where(np.abs(index) <= EDGE_TOLERANCE, 0.0, index)
+    on_last = np.abs(index - (count - 1)) <= EDGE_TOLERANCE
+
+    lower = np.floor(index).astype(np.int64)
+    fraction = index - lower
+    lower[on_last] = count - 2
+    fraction[on_last] = 1.0
+
+    outside = (lower < 0) | (lower > count - 2)
+
+    return lower, fraction, outside
+
+
+def compute_resampling_weights(source_geometry, target_geometry):
+    """Return (indices, weights) for bilinear resampling from the source grid to
+    the nodes of the target grid. Both have shape (4, ncol * nrow) of the target,
+    indices are flat indices into the source values (-1 outside the source)"""
+    ncol, nrow = source_geometry[:2]
+
+    x_coord, y_coord = get_node_coordinates(target_geometry)
+    i_source, j_source = get_fractional_indices(
+        source_geometry, x_coord.ravel(), y_coord.ravel()
+    )
+
+    i_lower, i_fraction, i_outside = get_cell_positions(i_source, ncol)
+    j_lower, j_fraction, j_outside = get_cell_positions(j_source, nrow)
+    inside = ~(i_outside | j_outside)
+
+    indices = np.stack(
+        [
+            i_lower * nrow + j_lower,
+            (i_lower + 1) * nrow + j_lower,
+            i_lower * nrow + j_lower + 1,
+            (i_lower + 1) * nrow + j_lower + 1,
+        ]
+    )
+    weights = np.stack(
+        [
+            (1 - i_fraction) * (1 - j_fraction),
+            i_fraction * (1 - j_fraction),
+            (1 - i_fraction) * j_fraction,
+            i_fraction * j_fraction,
+        ]
+    )
+
+    indices[:, ~inside] = -1
+    weights[:, ~inside] = 0.0
+
+    return indices, weights
+
+
+def get_resampling_weights(source_geometry, target_geometry):
+    """Return the (cached) resampling weights for a pair of grid geometries"""
+    return SURFACE_CACHE.get_or_create(
+        ("resampling", source_geometry, target_geometry),
+        lambda: compute_resampling_weights(source_geometry, target_geometry),
+    )
+
+
+def resample_values(values, indices, weights, shape):
+    """Resample (masked) source values with precomputed indices and weights.
+    Target nodes outside the source or next to undefined nodes are masked"""
+    source = ma.filled(ma.masked_invalid(values).astype(np.float64), np.nan).ravel()
+    source = np.append(source, np.nan)  # index -1 => undefined
+
+    # Undefined source nodes with zero weight do not contribute
+    contributions = np.where(weights == 0.0, 0.0, source[indices] * weights)
+    resampled = np.sum(contributions, axis=0)
+    resampled[np.any(indices < 0, axis=0)] = np.nan
+
+    return ma.masked_invalid(resampled.reshape(shape))
+
+
+def get_residual_surface(surface, other_surface):
+    """Return surface - other_surface on the grid of the first surface"""
+    geometry = get_geometry(surface)
+    other_geometry = get_geometry(other_surface)
+
+    if geometry == other_geometry:
+        other_values = other_surface.values
+    else:
+        indices, weights = get_resampling_weights(other_geometry, geometry)
+        other_values = resample_values(
+            other_surface.values, indices, weights, surface.values.shape
+        )
+
+    residual = surface.copy()
+    residual.values = ma.masked_invalid(surface.values - other_values)
+
+    return residual
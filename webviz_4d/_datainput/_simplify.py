@@ -0,0 +1,180 @@
+"""Douglas-Peucker simplification of the polylines in well and polygon layers
+
+All polylines of a layer are simplified together: each step splits every
+segment (of every line) at its farthest inner position in one vectorized pass.
+A layer is simplified to a few tolerance levels (in map units), which are
+cached per layer. The level sent to the map is the coarsest one with a
+tolerance below the size of a screen pixel for the displayed extent.
+
+The server does not know the zoom of the map, so the level follows the full
+surface extent and stays the same when the user zooms in. The default
+tolerances are therefore at most a few metres (well below a 4D grid cell);
+larger tolerances must be configured explicitly."""
+
+import numpy as np
+
+from ._surface_cache import SURFACE_CACHE
+
+
+DEFAULT_TOLERANCES = [1, 2, 5]
+DEFAULT_MAP_PIXELS = 1000
+
+
+def get_segment_distances(x, y, first, last, inner):
+    """Return the distances from inner positions to the lines through the first
+    and last positions of their segments (to the first position if the
+    segment is closed)"""
+    dx = x[last] - x[first]
+    dy = y[last] - y[first]
+    length = np.hypot(dx, dy)
+
+    to_first_x = x[inner] - x[first]
+    to_first_y = y[inner] - y[first]
+    closed = length == 0
+
+    distances = np.hypot(to_first_x, to_first_y)
+    distances[~closed] = (
+        np.abs(dx * to_first_y - dy * to_first_x)[~closed] / length[~closed]
+    )
+
+    return distances
+
+
+def simplify_lines(x, y, starts, ends, tolerance):
+    """Return a boolean mask of the positions kept when the lines [start, end)
+    of concatenated coordinates are simplified with a tolerance"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+
+    keep = np.zeros(len(x), dtype=bool)
+    filled = ends > starts
+    keep[starts[filled]] = True
+    keep[ends[filled] - 1] = True
+
+    first = starts[filled]
+    last = ends[filled] - 1
+
+    while len(first) > 0:
+        counts = last - first - 1
+        split = counts > 0
+        first, last, counts = first[split], last[split], counts[split]
+
+        if len(first) == 0:
+            break
+
+        # All inner positions of all segments, segment by segment
+        offsets = np.cumsum(counts) - counts
+        segment = np.repeat(np.arange(len(first)), counts)
+        inner = np.arange(counts.sum()) - offsets[segment] + first[segment] + 1
+
+        distances = get_segment_distances(x, y, first[segment], last[segment], inner)
+        farthest = np.maximum.reduceat(distances, offsets)
+
+        # First inner position at the largest distance of each segment
+        candidates = np.flatnonzero(distances == farthest[segment])
+        _segments, index = np.unique(segment[candidates], return_index=True)
+        split_at = inner[candidates[index]]
+
+        split = farthest > tolerance
+        keep[split_at[split]] = True
+
+        first, last = (
+            np.concatenate([first[split], split_at[split]]),
+            np.concatenate([split_at[split], last[split]]),
+        )
+
+    return keep
+
+
+def get_line_array(positions):
+    """Return the positions of a polyline as an (n, >=2) array (None if there
+    are no x/y positions)"""
+    try:
+        array = np.asarray(positions, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+
+    if array.ndim != 2 or array.shape[1] < 2 or len(array) == 0:
+        return None
+
+    return array
+
+
+def simplify_layer(layer, tolerance):
+    """Return a copy of a layer with simplified polyline/polygon positions"""
+    items = []
+    arrays = []
+
+    for item in layer.get("data", []):
+        array = get_line_array(item.get("positions"))
+
+        if array is not None and len(array) > 2:
+            items.append(item)
+            arrays.append(array)
+
+    if not arrays:
+        return layer
+
+    lengths = np.array([len(array) for array in arrays])
+    ends = np.cumsum(lengths)
+    coordinates = np.concatenate([array[:, :2] for array in arrays])
+    keep = simplify_lines(
+        coordinates[:, 0], coordinates[:, 1], ends - lengths, ends, tolerance
+    )
+
+    simplified = {}
+
+    for item, array, start, end in zip(items, arrays, ends - lengths, ends):
+        positions = array[keep[start:end]]
+
+        if not isinstance(item["positions"], np.ndarray):
+            positions = positions.tolist()
+
+        simplified[id(item)] = dict(item, positions=positions)
+
+    new_layer = dict(layer)
+    new_layer["data"] = [
+        simplified.get(id(item), item) for item in layer.get("data", [])
+    ]
+
+    return new_layer
+
+
+def get_layer_levels(layer, tolerances=DEFAULT_TOLERANCES):
+    """Return the (cached) simplified levels {tolerance: layer} of a layer"""
+    return SURFACE_CACHE.get_or_create_for(
+        layer,
+        ("polyline-levels", tuple(tolerances)),
+        lambda: {
+            tolerance: simplify_layer(layer, tolerance) for tolerance in tolerances
+        },
+    )
+
+
+def select_tolerance(bounds, tolerances=DEFAULT_TOLERANCES, pixels=DEFAULT_MAP_PIXELS):
+    """Return the largest tolerance smaller than a pixel when bounds
+    [[xmin, ymin], [xmax, ymax]] are shown with a number of pixels (0 if none)"""
+    (xmin, ymin), (xmax, ymax) = bounds
+    pixel_size = max(xmax - xmin, ymax - ymin) / pixels
+
+    return max(
+        [tolerance for tolerance in tolerances if tolerance <= pixel_size], default=0
+    )
+
+
+def get_layer_level(
+    layer, bounds, tolerances=DEFAULT_TOLERANCES, pixels=DEFAULT_MAP_PIXELS
+):
+    """Return the simplified level of a layer which fits the displayed bounds
+    (the layer itself if no level fits or the layer has no polylines)"""
+    if not isinstance(layer, dict) or layer.get("base_layer"):
+        return layer
+
+    tolerance = select_tolerance(bounds, tolerances, pixels)
+
+    if tolerance == 0:
+        return layer
+
+    return get_layer_levels(layer, tolerances)[tolerance]
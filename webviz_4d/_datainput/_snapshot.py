@@ -0,0 +1,135 @@
+"""Binary (npz) snapshots of csv files, used to speed up plugin startup
+
+String columns are stored as categorical codes + categories and numeric
+columns as plain arrays. A snapshot is only used if the fingerprint
+(modification time and size) of the source file is unchanged."""
+
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+
+SNAPSHOT_VERSION = 1
+
+
+def get_fingerprint(file_name):
+    """Return the fingerprint (mtime in ns, size in bytes) of a file"""
+    stat = os.stat(file_name)
+
+    return np.array([stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+
+def get_tmp_path(file_name):
+    """Return a temporary name for writing a file, unique for the process and
+    thread, so that concurrent writers never write to the same file"""
+    return f"{file_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def is_text_column(values):
+    """Check if a column holds strings (object, str or categorical dtype)"""
+    return (
+        pd.api.types.is_object_dtype(values.dtype)
+        or pd.api.types.is_string_dtype(values.dtype)
+        or isinstance(values.dtype, pd.CategoricalDtype)
+    )
+
+
+def get_snapshot_path(file_name, suffix=".npz"):
+    """Return the path to the (hidden) snapshot file next to a given file"""
+    file_name = str(file_name)
+
+    return os.path.join(
+        os.path.dirname(file_name), "." + os.path.basename(file_name) + suffix
+    )
+
+
+def save_dataframe(dataframe, snapshot_file, fingerprint):
+    """Store a dataframe as an npz file with categorical string columns"""
+    arrays = {
+        "version": np.array([SNAPSHOT_VERSION]),
+        "fingerprint": np.asarray(fingerprint, dtype=np.int64),
+        "columns": np.array([str(column) for column in dataframe.columns]),
+    }
+
+    for index, column in enumerate(dataframe.columns):
+        values = dataframe[column]
+
+        if is_text_column(values):
+            codes, categories = pd.factorize(values)
+            arrays[f"codes_{index}"] = codes.astype(np.int32)
+            arrays[f"categories_{index}"] = np.array(
+                [str(category) for category in categories]
+            )
+        else:
+            arrays[f"values_{index}"] = values.values
+
+    tmp_file = get_tmp_path(snapshot_file)
+
+    try:
+        with open(tmp_file, "wb") as stream:
+            np.savez(stream, **arrays)
+
+        os.replace(tmp_file, snapshot_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def load_dataframe(snapshot_file, fingerprint=None):
+    """Load a dataframe from an npz snapshot. Return None if the snapshot
+    does not exist, has another format version or is outdated"""
+    if not os.path.isfile(snapshot_file):
+        return None
+
+    with np.load(snapshot_file, allow_pickle=False) as snapshot:
+        if snapshot["version"][0] != SNAPSHOT_VERSION:
+            return None
+
+        if fingerprint is not None and not np.array_equal(
+            snapshot["fingerprint"], np.asarray(fingerprint, dtype=np.int64)
+        ):
+            return None
+
+        data = {}
+
+        for index, column in enumerate(snapshot["columns"]):
+            if f"codes_{index}" in snapshot.files:
+                data[str(column)] = pd.Categorical.from_codes(
+                    snapshot[f"codes_{index}"],
+                    categories=snapshot[f"categories_{index}"].astype(object),
+                )
+            else:
+                data[str(column)] = snapshot[f"values_{index}"]
+
+    return pd.DataFrame(data)
+
+
+def read_csv_snapshot(csv_file):
+    """Read a csv file through its snapshot. The snapshot is (re)written
+    next to the csv file if it is missing or outdated"""
+    csv_file = str(csv_file)
+    snapshot_file = get_snapshot_path(csv_file)
+    fingerprint = get_fingerprint(csv_file)
+
+    try:
+        dataframe = load_dataframe(snapshot_file, fingerprint)
+    except (OSError, ValueError, KeyError) as error:
+        print("WARNING: could not read snapshot", snapshot_file, error)
+        dataframe = None
+
+    if dataframe is not None:
+        return dataframe
+
+    dataframe = pd.read_csv(csv_file, low_memory=False)
+
+    try:
+        save_dataframe(dataframe, snapshot_file, fingerprint)
+    except OSError as error:
+        print("WARNING: could not write snapshot", snapshot_file, error)
+
+    for column in dataframe.columns:
+        if is_text_column(dataframe[column]):
+            dataframe[column] = dataframe[column].astype("category")
+
+    return dataframe
@@ -1,19 +1,55 @@
 import math
+import warnings
 import numpy as np
 import numpy.ma as ma
 
 import xtgeo
 from webviz_config.common_cache import CACHE
 
-from .image_processing import array_to_png, get_colormap
+from .image_processing import array_to_image, get_image_encoder
+from ._image_store import IMAGE_STORE
+from ._colormap_registry import get_colormap_url
+from ._surface_cache import SURFACE_CACHE, file_key
+from ._surface_store import (
+    store_settings,
+    get_source_key,
+    get_store_path,
+    is_store_current,
+    read_surface_store,
+    write_surface_store,
+)
 
 
-@CACHE.memoize(timeout=CACHE.TIMEOUT)
 def load_surface(surface_path):
-    return xtgeo.surface_from_file(surface_path)
+    """Load a surface (cached). The returned surface is shared, do not modify it"""
+    return SURFACE_CACHE.get_or_create(
+        ("surface",) + file_key(surface_path), lambda: read_surface(surface_path)
+    )
+
+
+def read_surface(surface_path):
+    """Read a surface, using the memory-mapped surface store when available"""
+    if not store_settings["enabled"]:
+        return xtgeo.surface_from_file(surface_path)
+
+    store_path = get_store_path(surface_path, store_settings["directory"])
+
+    if is_store_current(surface_path, store_path):
+        return read_surface_store(store_path)
+
+    source_key = get_source_key(surface_path)
+    surface = xtgeo.surface_from_file(surface_path)
+
+    if store_settings["writable"]:
+        try:
+            write_surface_store(surface, store_path, source_key)
+        except OSError as error:
+            store_settings["writable"] = False
+            print("WARNING: surface store is not writable", store_path, error)
+
+    return surface
 
 
-@CACHE.memoize(timeout=CACHE.TIMEOUT)
 def get_surface_arr(surface, unrotate=True, flip=True):
     if unrotate:
         surface.unrotate()
@@ -31,7 +67,141 @@ def get_surface_fence(fence, surface):
     return surface.get_fence(fence)
 
 
-@CACHE.memoize(timeout=CACHE.TIMEOUT)
+def get_scaling_limits(min_max_df):
+    """Return (lower_limit, upper_limit) from a surface scaling selection"""
+    lower_limit = None
+    upper_limit = None
+
+    if min_max_df is not None and not min_max_df.empty:
+        lower_limit = min_max_df["lower_limit"].values[0]
+
+        if lower_limit is None or math.isnan(lower_limit):
+            lower_limit = None
+
+        upper_limit = min_max_df["upper_limit"].values[0]
+
+        if upper_limit is None or math.isnan(upper_limit):
+            upper_limit = None
+
+    return lower_limit, upper_limit
+
+
+def downsample_array(values):
+    """Halve the resolution of a 2D masked array (NaN-aware mean of 2x2 cells)"""
+    values = ma.filled(ma.masked_invalid(values).astype(np.float64), np.nan)
+    nrow, ncol = values.shape
+
+    padded = np.full((nrow + nrow % 2, ncol + ncol % 2), np.nan)
+    padded[:nrow, :ncol] = values
+    blocks = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2)
+
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=RuntimeWarning)
+        downsampled = np.nanmean(blocks, axis=(1, 3))
+
+    return ma.masked_invalid(downsampled)
+
+
+def make_surface_pyramid(surface, min_size=64):
+    """Return a list of (zvalues, bounds) for a surface, from full resolution
+    down to a level with less than 2 * min_size nodes along the longest side"""
+    # Work on a copy, loaded surfaces are shared through the surface cache
+    surface = surface.copy()
+    zvalues = get_surface_arr(surface)[2]
+    bounds = [[surface.xmin, surface.ymin], [surface.xmax, surface.ymax]]
+    nrow, ncol = zvalues.shape
+
+    levels = [(zvalues, bounds)]
+    factor = 1
+
+    while max(levels[-1][0].shape) >= 2 * min_size:
+        level_values = downsample_array(levels[-1][0])
+        factor = factor * 2
+
+        # Padded cells at the bottom/right extend the image beyond the surface
+        xmax = surface.xmin + (surface.xmax - surface.xmin) * (
+            level_values.shape[1] * factor - 1
+        ) / max(ncol - 1, 1)
+        ymin = surface.ymax - (surface.ymax - surface.ymin) * (
+            level_values.shape[0] * factor - 1
+        ) / max(nrow - 1, 1)
+
+        levels.append((level_values, [[surface.xmin, ymin], [xmax, surface.ymax]]))
+
+    return levels
+
+
+def select_pyramid_level(levels, max_size=None):
+    """Return the coarsest pyramid level with at least max_size nodes along
+    its longest side (the full resolution if max_size is not given)"""
+    if max_size:
+        for level in reversed(levels):
+            if max(level[0].shape) >= max_size:
+                return level
+
+    return levels[0]
+
+
+def get_cached_surface_layer(
+    surface_key,
+    surface_function,
+    name="surface",
+    min_val=None,
+    max_val=None,
+    color="inferno",
+    hillshading=False,
+    min_max_df=None,
+    unit="",
+    max_size=None,
+    value_range=None,
+):
+    """Return the (cached) LayeredMap surface image base layer for a surface
+    identified by a key (tuple). surface_function returns the surface"""
+    key = (
+        "layer",
+        surface_key,
+        name,
+        min_val,
+        max_val,
+        color,
+        hillshading,
+        get_scaling_limits(min_max_df),
+        unit,
+        max_size,
+    )
+
+    layer = SURFACE_CACHE.get(key)
+
+    # The image of a cached layer may have been removed from the image store
+    if layer is not None and not IMAGE_STORE.keep_url(layer["data"][0]["url"]):
+        layer = None
+
+    if layer is None:
+        levels = SURFACE_CACHE.get_or_create(
+            ("pyramid",) + surface_key,
+            lambda: make_surface_pyramid(surface_function()),
+        )
+        zvalues, bounds = select_pyramid_level(levels, max_size)
+
+        layer = SURFACE_CACHE.put(
+            key,
+            make_image_layer(
+                zvalues.copy(),
+                bounds,
+                name=name,
+                min_val=min_val,
+                max_val=max_val,
+                color=color,
+                hillshading=hillshading,
+                min_max_df=min_max_df,
+                unit=unit,
+                value_range=value_range,
+            ),
+        )
+
+    return layer
+
+
 def make_surface_layer(
     surface,
     name="surface",
@@ -41,21 +211,56 @@ def make_surface_layer(
     hillshading=False,
     min_max_df=None,
     unit="",
+    max_size=None,
+    value_range=None,
 ):
     """Make LayeredMap surface image base layer"""
-    zvalues = get_surface_arr(surface)[2]
-    bounds = [[surface.xmin, surface.ymin], [surface.xmax, surface.ymax]]
+    if max_size:
+        levels = make_surface_pyramid(surface)
+        zvalues, bounds = select_pyramid_level(levels, max_size)
+    else:
+        # Work on a copy, loaded surfaces are shared through the surface cache
+        surface = surface.copy()
+        zvalues = get_surface_arr(surface)[2]
+        bounds = [[surface.xmin, surface.ymin], [surface.xmax, surface.ymax]]
 
-    if min_max_df is not None and not min_max_df.empty:
-        lower_limit = min_max_df["lower_limit"].values[0]
+    return make_image_layer(
+        zvalues,
+        bounds,
+        name=name,
+        min_val=min_val,
+        max_val=max_val,
+        color=color,
+        hillshading=hillshading,
+        min_max_df=min_max_df,
+        unit=unit,
+        value_range=value_range,
+    )
 
-        if lower_limit is not None and not math.isnan(lower_limit):
-            min_val = lower_limit
 
-        upper_limit = min_max_df["upper_limit"].values[0]
+def make_image_layer(
+    zvalues,
+    bounds,
+    name="surface",
+    min_val=None,
+    max_val=None,
+    color="inferno",
+    hillshading=False,
+    min_max_df=None,
+    unit="",
+    value_range=None,
+):
+    """Make LayeredMap image base layer from a (flipped) 2D masked array.
+    The array is modified (clipped to the min/max values). value_range is the
+    (min, max) of the surface values (e.g. stored statistics), used when
+    min_val or max_val is not given"""
+    lower_limit, upper_limit = get_scaling_limits(min_max_df)
 
-        if upper_limit is not None and not math.isnan(upper_limit):
-            max_val = upper_limit
+    if lower_limit is not None:
+        min_val = lower_limit
+
+    if upper_limit is not None:
+        max_val = upper_limit
 
     # Flip color scale if min_val > max_val
     if min_val and max_val and min_val > max_val:
@@ -68,22 +273,21 @@ def make_surface_layer(
         min_val = max_val
         max_val = min_val_orig
 
-    if min_val is not None:
-        zvalues[(zvalues < min_val) & (ma.getmask(zvalues) == ma.nomask)] = min_val
-
-        if np.nanmin(zvalues) > min_val:
-            zvalues[0, 0] = ma.nomask
-            zvalues.data[0, 0] = min_val
+    if min_val is None or max_val is None:
+        if value_range is None:
+            value_range = (ma.min(zvalues), ma.max(zvalues))
 
-    if max_val is not None:
-        zvalues[(zvalues > max_val) & (ma.getmask(zvalues) == ma.nomask)] = max_val
+        min_val = min_val if min_val is not None else value_range[0]
+        max_val = max_val if max_val is not None else value_range[1]
 
-        if np.nanmax(zvalues) < max_val:
-            zvalues[-1, -1] = ma.nomask
-            zvalues.data[-1, -1] = max_val
+    zvalues[(zvalues < min_val) & (ma.getmask(zvalues) == ma.nomask)] = min_val
+    zvalues[(zvalues > max_val) & (ma.getmask(zvalues) == ma.nomask)] = max_val
 
-    min_val = min_val if min_val is not None else np.nanmin(zvalues)
-    max_val = max_val if max_val is not None else np.nanmax(zvalues)
+    # The image is scaled to the colour range, not to the values in the array
+    encoder = get_image_encoder()
+    image_bytes = encoder.encode(
+        array_to_image(zvalues.copy(), value_range=(min_val, max_val))
+    )
 
     return {
         "name": name,
@@ -92,8 +296,8 @@ def make_surface_layer(
         "data": [
             {
                 "type": "image",
-                "url": array_to_png(zvalues.copy()),
-                "colormap": get_colormap(color),
+                "url": IMAGE_STORE.add(image_bytes, encoder.mimetype),
+                "colormap": get_colormap_url(color),
                 "bounds": bounds,
                 "allowHillshading": hillshading,
                 "minvalue": f"{min_val:.2f}" if min_val is not None else None,
@@ -0,0 +1,152 @@
+"""Byte-budgeted LRU cache for loaded surfaces and rendered layers"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+DEFAULT_CACHE_MB = 1024
+
+
+def file_key(file_name):
+    """Return a content based key for a file: (path, mtime in ns, size)"""
+    file_name = os.path.abspath(str(file_name))
+    stat = os.stat(file_name)
+
+    return (file_name, stat.st_mtime_ns, stat.st_size)
+
+
+def get_nbytes(item):
+    """Return the (approximate) memory footprint of a cached item in bytes"""
+    if isinstance(item, np.ndarray):
+        nbytes = item.nbytes
+
+        if np.ma.isMaskedArray(item) and np.ma.getmask(item) is not np.ma.nomask:
+            nbytes += np.ma.getmask(item).nbytes
+
+        return nbytes
+
+    if isinstance(item, (str, bytes)):
+        return len(item)
+
+    if isinstance(item, dict):
+        return sum(get_nbytes(value) for value in item.values())
+
+    if isinstance(item, (list, tuple)):
+        return sum(get_nbytes(value) for value in item)
+
+    values = getattr(item, "values", None)
+
+    if isinstance(values, np.ndarray):  # e.g. xtgeo surfaces
+        return get_nbytes(values)
+
+    return sys.getsizeof(item)
+
+
+class SurfaceCache:
+    """Thread safe LRU cache with a memory budget in bytes
+
+    Items are evicted (least recently used first) when the sum of their
+    sizes exceeds the budget. Items larger than the whole budget are not
+    cached."""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_MB * 1024**2):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key][0]
+
+            self.misses += 1
+
+        return default
+
+    def put(self, key, item):
+        nbytes = get_nbytes(item)
+
+        with self._lock:
+            if key in self._items:
+                self.nbytes -= self._items.pop(key)[1]
+
+            if nbytes > self.max_bytes:
+                return item
+
+            self._items[key] = (item, nbytes)
+            self.nbytes += nbytes
+            self._evict()
+
+        return item
+
+    def get_or_create(self, key, create_function):
+        """Return a cached item, or create, cache and return it"""
+        item = self.get(key)
+
+        if item is None:
+            item = self.put(key, create_function())
+
+        return item
+
+    def get_or_create_for(self, obj, tag, create_function):
+        """Return a cached item derived from an object (e.g. a layer dict),
+        keyed by tag and the identity of the object. The cache entry holds the
+        object itself, so that its id cannot be reused by another object while
+        the item is cached"""
+        key = (tag, id(obj))
+        cached = self.get(key)
+
+        if cached is not None and cached[0] is obj:
+            return cached[1]
+
+        item = create_function()
+        self.put(key, (obj, item))
+
+        return item
+
+    def resize(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """Return hit/miss/eviction counters and memory usage"""
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "nbytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and self._items:
+            _key, (_item, nbytes) = self._items.popitem(last=False)
+            self.nbytes -= nbytes
+            self.evictions += 1
+
+
+SURFACE_CACHE = SurfaceCache()
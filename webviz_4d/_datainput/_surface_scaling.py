@@ -0,0 +1,145 @@
+"""Create the surface scaling file (colour limits) for a whole ensemble
+
+The limits are computed per map type, attribute, interval and zone name from
+percentiles of all the surfaces in the group. The per-surface statistics are
+computed in a process pool and stored in the surface statistics file (see
+_surface_statistics), so that a rerun only reads new or changed surfaces."""
+
+import os
+import re
+import argparse
+import numpy as np
+import pandas as pd
+
+from ._catalog import normalize_metadata, get_interval_name
+from ._surface_statistics import (
+    PERCENTILES,
+    SurfaceStatistics,
+    get_statistics_file,
+)
+
+
+scaling_columns = ["map_type", "data.attribute", "interval", "data.name"]
+
+
+def get_limits(lower_values, upper_values, symmetric):
+    """Return robust (lower, upper) limits for a group of surfaces: the median
+    over the group of each surface's lower and upper percentile"""
+    lower_limit = float(np.nanmedian(lower_values))
+    upper_limit = float(np.nanmedian(upper_values))
+
+    if symmetric:
+        limit = max(abs(lower_limit), abs(upper_limit))
+        lower_limit = -limit
+        upper_limit = limit
+
+    return lower_limit, upper_limit
+
+
+def create_surface_scaling(
+    surface_metadata,
+    surface_statistics,
+    percentile=1,
+    interval_mode="normal",
+    symmetric_patterns=("diff",),
+):
+    """Return a surface scaling dataframe (one row per map type, attribute,
+    interval and zone name)"""
+    metadata = normalize_metadata(surface_metadata)
+    metadata = metadata[metadata["filename"] != ""]
+
+    lower_name = f"p{percentile}"
+    upper_name = f"p{100 - percentile}"
+    rows = []
+
+    metadata = metadata.assign(
+        interval=[
+            get_interval_name(time1, time2, interval_mode)
+            for time1, time2 in zip(metadata["data.time.t1"], metadata["data.time.t2"])
+        ]
+    )
+
+    for group, group_df in metadata.groupby(scaling_columns, sort=True):
+        lower_values = []
+        upper_values = []
+
+        for filename in group_df["filename"]:
+            filename = os.path.abspath(filename)
+
+            if os.path.isfile(filename):
+                statistics = surface_statistics.get(filename)
+                lower_values.append(statistics[lower_name])
+                upper_values.append(statistics[upper_name])
+
+        if not lower_values or np.all(np.isnan(lower_values)):
+            continue
+
+        attribute = group[1]
+        symmetric = any(re.search(pattern, attribute) for pattern in symmetric_patterns)
+        lower_limit, upper_limit = get_limits(lower_values, upper_values, symmetric)
+
+        row = dict(zip(scaling_columns, group))
+        row["lower_limit"] = lower_limit
+        row["upper_limit"] = upper_limit
+        rows.append(row)
+
+    return pd.DataFrame(rows, columns=scaling_columns + ["lower_limit", "upper_limit"])
+
+
+def main():
+    """Compute colour limits for all surfaces in a surface metadata file"""
+    description = "Create a surface scaling file from a surface metadata file"
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("metadata_file", help="Enter path to surface_metadata.csv")
+    parser.add_argument(
+        "--output",
+        help="Surface scaling file (default: surface_scaling.csv next to metadata)",
+        default=None,
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--percentile",
+        type=int,
+        choices=[p for p in PERCENTILES if p < 50],
+        default=1,
+        help="Lower percentile (the upper percentile is 100 - percentile)",
+    )
+    parser.add_argument(
+        "--interval_mode", choices=["normal", "reverse"], default="normal"
+    )
+    parser.add_argument(
+        "--symmetric",
+        nargs="*",
+        default=["diff"],
+        help="Attribute name patterns which get limits symmetric around zero",
+    )
+    args = parser.parse_args()
+
+    output_file = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(args.metadata_file)), "surface_scaling.csv"
+    )
+
+    surface_metadata = pd.read_csv(args.metadata_file, low_memory=False)
+    surface_files = [
+        os.path.abspath(path) for path in surface_metadata["filename"].dropna().unique()
+    ]
+
+    statistics_file = get_statistics_file(args.metadata_file)
+    surface_statistics = SurfaceStatistics(statistics_file)
+    number = surface_statistics.update(surface_files, workers=args.workers)
+    surface_statistics.save()
+    print("Statistics computed for", number, "new or changed surfaces")
+
+    surface_scaling = create_surface_scaling(
+        surface_metadata,
+        surface_statistics,
+        percentile=args.percentile,
+        interval_mode=args.interval_mode,
+        symmetric_patterns=args.symmetric,
+    )
+    surface_scaling.to_csv(output_file, index=False)
+    print("Surface scaling written to", output_file)
+
+
+if __name__ == "__main__":
+    main()
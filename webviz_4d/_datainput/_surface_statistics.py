@@ -0,0 +1,202 @@
+"""Surface statistics (min/max/mean/std/percentiles/histogram) per surface file
+
+The statistics are stored in a csv file next to the surface metadata file,
+keyed by the file name, modification time and size of each surface. They
+are computed offline (see main), so that the colour scale defaults do not
+need to rescan the grids. For surfaces missing in the file only the min and
+max are computed on demand (once per file version)."""
+
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import numpy.ma as ma
+import pandas as pd
+
+from ._surface import read_surface
+from ._surface_cache import file_key
+
+
+PERCENTILES = [1, 5, 50, 95, 99]
+HISTOGRAM_BINS = 50
+
+statistics_names = ["min", "max", "mean", "std"] + [f"p{p}" for p in PERCENTILES]
+
+
+def get_statistics_file(surface_metadata_file):
+    """Return the path to the statistics file of a surface metadata file"""
+    return os.path.splitext(str(surface_metadata_file))[0] + "_statistics.csv"
+
+
+def compute_statistics(values):
+    """Return the statistics of the defined values in a (masked) array"""
+    values = ma.masked_invalid(values).compressed().astype(np.float64)
+
+    if values.size == 0:
+        statistics = {name: np.nan for name in statistics_names}
+        statistics["histogram_counts"] = []
+        statistics["histogram_edges"] = []
+        return statistics
+
+    statistics = {
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+    }
+
+    for percentile, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        statistics[f"p{percentile}"] = float(value)
+
+    counts, edges = np.histogram(values, bins=HISTOGRAM_BINS)
+    statistics["histogram_counts"] = counts.tolist()
+    statistics["histogram_edges"] = edges.tolist()
+
+    return statistics
+
+
+def compute_min_max(values):
+    """Return the min and max statistics of the defined values in an array"""
+    values = ma.masked_invalid(values)
+
+    if not values.count():
+        return {"min": np.nan, "max": np.nan}
+
+    return {"min": float(values.min()), "max": float(values.max())}
+
+
+def compute_surface_statistics(surface_path):
+    """Return (file key, statistics) of a surface file"""
+    key = file_key(surface_path)
+    surface = read_surface(surface_path)
+
+    return key, compute_statistics(surface.values)
+
+
+class SurfaceStatistics:
+    """Statistics of surface files, backed by an (optional) csv file"""
+
+    def __init__(self, statistics_file=None):
+        self.statistics_file = statistics_file
+        self.statistics = {}
+        self.min_max = {}
+
+        if statistics_file is not None and os.path.isfile(statistics_file):
+            self.load(statistics_file)
+
+    def __len__(self):
+        return len(self.statistics)
+
+    def load(self, statistics_file):
+        statistics_df = pd.read_csv(statistics_file)
+
+        for row in statistics_df.to_dict("records"):
+            key = (row["filename"], int(row["mtime"]), int(row["size"]))
+            statistics = {name: row[name] for name in statistics_names}
+            statistics["histogram_counts"] = json.loads(row["histogram_counts"])
+            statistics["histogram_edges"] = json.loads(row["histogram_edges"])
+            self.statistics[key[0]] = (key, statistics)
+
+    def save(self, statistics_file=None):
+        statistics_file = statistics_file or self.statistics_file
+        rows = []
+
+        for key, statistics in self.statistics.values():
+            row = {"filename": key[0], "mtime": key[1], "size": key[2]}
+            row.update({name: statistics[name] for name in statistics_names})
+            row["histogram_counts"] = json.dumps(statistics["histogram_counts"])
+            row["histogram_edges"] = json.dumps(statistics["histogram_edges"])
+            rows.append(row)
+
+        tmp_file = statistics_file + ".tmp"
+        pd.DataFrame(rows).to_csv(tmp_file, index=False)
+        os.replace(tmp_file, statistics_file)
+
+    def is_current(self, key):
+        entry = self.statistics.get(key[0])
+
+        return entry is not None and entry[0] == key
+
+    def get(self, surface_path, surface=None):
+        """Return the statistics of a surface file, computed (from the given
+        surface, or by loading the file) if missing or outdated"""
+        key = file_key(surface_path)
+
+        if not self.is_current(key):
+            if surface is not None:
+                statistics = compute_statistics(surface.values)
+            else:
+                key, statistics = compute_surface_statistics(surface_path)
+
+            self.statistics[key[0]] = (key, statistics)
+
+        return self.statistics[key[0]][1]
+
+    def get_min_max(self, surface_path, surface=None):
+        """Return the min and max statistics of a surface file. If the file
+        has no current statistics, only these are computed (from the given
+        surface, or by loading the file)"""
+        key = file_key(surface_path)
+
+        if self.is_current(key):
+            statistics = self.statistics[key[0]][1]
+            return {"min": statistics["min"], "max": statistics["max"]}
+
+        entry = self.min_max.get(key[0])
+
+        if entry is None or entry[0] != key:
+            if surface is None:
+                surface = read_surface(surface_path)
+
+            entry = (key, compute_min_max(surface.values))
+            self.min_max[key[0]] = entry
+
+        return entry[1]
+
+    def update(self, surface_paths, workers=1):
+        """Compute the statistics of new or changed surface files (in a
+        process pool if workers > 1). Return the number of computed files"""
+        missing = [
+            path
+            for path in surface_paths
+            if os.path.isfile(path) and not self.is_current(file_key(path))
+        ]
+
+        if workers > 1 and len(missing) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(
+                    executor.map(compute_surface_statistics, missing, chunksize=4)
+                )
+        else:
+            results = [compute_surface_statistics(path) for path in missing]
+
+        for key, statistics in results:
+            self.statistics[key[0]] = (key, statistics)
+
+        return len(results)
+
+
+def main():
+    """Compute the statistics of all surfaces in a surface metadata file"""
+    description = "Compute statistics for all surfaces in a surface metadata file"
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("metadata_file", help="Enter path to surface_metadata.csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    surface_metadata = pd.read_csv(args.metadata_file, low_memory=False)
+    surface_files = [
+        os.path.abspath(path) for path in surface_metadata["filename"].dropna().unique()
+    ]
+
+    statistics_file = get_statistics_file(args.metadata_file)
+    surface_statistics = SurfaceStatistics(statistics_file)
+    number = surface_statistics.update(surface_files, workers=args.workers)
+    surface_statistics.save()
+
+    print("Statistics computed for", number, "surfaces, stored in", statistics_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Memory-mapped surface store
+
+Each surface (e.g. an irap binary .gri file) is stored once as a raw float32
+array preceded by a small fixed-size header with the grid geometry and the
+modification time and size of the surface file it was made from. The
+stored array can be opened with np.memmap, so that several server processes
+share the operating system page cache instead of each parsing the file."""
+
+import os
+import hashlib
+import struct
+import argparse
+import numpy as np
+import numpy.ma as ma
+import pandas as pd
+import xtgeo
+
+from ._snapshot import get_tmp_path
+
+
+MAGIC = b"W4DSURF2"
+HEADER_FORMAT = "<8s2i6di2q"
+HEADER_SIZE = 128
+STORE_SUFFIX = ".w4d"
+
+store_settings = {"directory": None, "enabled": True, "writable": True}
+
+
+def configure_surface_store(directory=None, enabled=True):
+    """Set the directory for the stored surfaces (None => next to the surface
+    files) and whether the store should be used at all"""
+    store_settings["directory"] = directory
+    store_settings["enabled"] = enabled
+    store_settings["writable"] = True
+
+
+def get_store_path(surface_path, store_directory=None):
+    """Return the path to the stored version of a surface file"""
+    surface_path = str(surface_path)
+    basename = os.path.basename(surface_path)
+
+    if store_directory is None:
+        return os.path.join(
+            os.path.dirname(surface_path), "." + basename + STORE_SUFFIX
+        )
+
+    path_hash = hashlib.sha1(os.path.abspath(surface_path).encode()).hexdigest()
+
+    return os.path.join(store_directory, path_hash[:16] + "_" + basename + STORE_SUFFIX)
+
+
+def get_source_key(surface_path):
+    """Return the (modification time in ns, size) of a surface file"""
+    stat = os.stat(surface_path)
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+def is_store_current(surface_path, store_path):
+    """Check if a stored surface exists and was made from the surface file as
+    it is now (same modification time and size, also if the file is older)"""
+    try:
+        header = read_surface_header(store_path)
+        source_key = get_source_key(surface_path)
+    except (OSError, ValueError, struct.error):
+        return False
+
+    return (header["source_mtime_ns"], header["source_size"]) == source_key
+
+
+def write_surface_store(surface, store_path, source_key=(0, 0)):
+    """Write an xtgeo surface to the store format. The source key (see
+    get_source_key) should be taken before the surface file was read"""
+    values = ma.filled(surface.values, surface.undef).astype(np.float32)
+
+    header = struct.pack(
+        HEADER_FORMAT,
+        MAGIC,
+        surface.ncol,
+        surface.nrow,
+        surface.xori,
+        surface.yori,
+        surface.xinc,
+        surface.yinc,
+        surface.rotation,
+        surface.undef,
+        surface.yflip,
+        *source_key,
+    )
+
+    store_dir = os.path.dirname(store_path)
+
+    if store_dir and not os.path.isdir(store_dir):
+        os.makedirs(store_dir, exist_ok=True)
+
+    tmp_path = get_tmp_path(store_path)
+
+    try:
+        with open(tmp_path, "wb") as stream:
+            stream.write(header.ljust(HEADER_SIZE, b"\0"))
+            stream.write(np.ascontiguousarray(values).tobytes())
+
+        os.replace(tmp_path, store_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_surface_header(store_path):
+    """Return the grid geometry of a stored surface as a dict"""
+    with open(store_path, "rb") as stream:
+        header = stream.read(HEADER_SIZE)
+
+    size = struct.calcsize(HEADER_FORMAT)
+    values = struct.unpack(HEADER_FORMAT, header[:size])
+
+    if values[0] != MAGIC:
+        raise ValueError("Not a stored surface: " + str(store_path))
+
+    keys = ["ncol", "nrow", "xori", "yori", "xinc", "yinc", "rotation", "undef"]
+    header_dict = dict(zip(keys, values[1:9]))
+    header_dict["yflip"] = values[9]
+    header_dict["source_mtime_ns"] = values[10]
+    header_dict["source_size"] = values[11]
+
+    return header_dict
+
+
+def open_surface_array(store_path):
+    """Return the header and a read-only memory map (ncol, nrow) of a stored
+    surface. Undefined nodes have the value header["undef"]"""
+    header = read_surface_header(store_path)
+
+    values = np.memmap(
+        store_path,
+        dtype=np.float32,
+        mode="r",
+        offset=HEADER_SIZE,
+        shape=(header["ncol"], header["nrow"]),
+    )
+
+    return header, values
+
+
+def surface_from_array(header, values):
+    """Create an xtgeo surface from a grid geometry and a (ncol, nrow) array"""
+    values = ma.masked_invalid(values)
+
+    return xtgeo.RegularSurface(
+        ncol=header["ncol"],
+        nrow=header["nrow"],
+        xori=header["xori"],
+        yori=header["yori"],
+        xinc=header["xinc"],
+        yinc=header["yinc"],
+        rotation=header["rotation"],
+        yflip=header["yflip"],
+        values=values,
+    )
+
+
+def read_surface_store(store_path):
+    """Return a stored surface as an xtgeo surface"""
+    header, values = open_surface_array(store_path)
+    masked_values = ma.masked_equal(values, np.float32(header["undef"]), copy=False)
+
+    return surface_from_array(header, masked_values)
+
+
+def convert_surface(surface_path, store_directory=None):
+    """Convert a surface file to the store format (if needed) and return
+    the path to the stored surface"""
+    store_path = get_store_path(surface_path, store_directory)
+
+    if not is_store_current(surface_path, store_path):
+        source_key = get_source_key(surface_path)
+        surface = xtgeo.surface_from_file(surface_path)
+        write_surface_store(surface, store_path, source_key)
+
+    return store_path
+
+
+def main():
+    """Convert all surfaces in a surface metadata file to the store format"""
+    description = "Create memory-mapped copies of all surfaces in a metadata file"
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("metadata_file", help="Enter path to surface_metadata.csv")
+    parser.add_argument(
+        "--store_directory",
+        help="Directory for the stored surfaces (default: next to the surfaces)",
+        default=None,
+    )
+
+    args = parser.parse_args()
+    surface_metadata = pd.read_csv(args.metadata_file, low_memory=False)
+    surface_files = surface_metadata["filename"].dropna().unique()
+
+    for surface_file in surface_files:
+        if not os.path.isfile(surface_file):
+            print("WARNING: surface file not found", surface_file)
+            continue
+
+        store_path = convert_surface(surface_file, args.store_directory)
+        print(surface_file, "=>", store_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Persistent cache of parsed and resampled well trajectories
+
+The trajectories (see well.load_well_trajectory) of all well files are stored
+in one columnar npz snapshot (see _snapshot). Every well is keyed by its file
+name, modification time, size and the resampling delta, so that only new or
+changed well files are parsed again when the plugin is restarted."""
+
+import numpy as np
+import pandas as pd
+
+from ._snapshot import get_fingerprint, save_dataframe, load_dataframe
+from .well import load_well_trajectories, trajectory_columns
+
+
+name_columns = ["wellname", "truewellname", "shortwellname"]
+
+
+def get_well_key(wellfile, delta):
+    """Return the cache key (mtime, size, delta) of a well file"""
+    mtime, size = get_fingerprint(wellfile)
+
+    return int(mtime), int(size), float(delta)
+
+
+def trajectories_to_dataframe(trajectories, keys):
+    """Return a dataframe with one row per trajectory point of all wells"""
+    columns = {
+        column: []
+        for column in ["file_name", "mtime", "size", "delta"]
+        + name_columns
+        + trajectory_columns
+    }
+
+    for wellfile, trajectory in trajectories.items():
+        npoints = len(trajectory["MD"])
+        mtime, size, delta = keys[wellfile]
+
+        columns["file_name"].append(np.full(npoints, wellfile, dtype=object))
+        columns["mtime"].append(np.full(npoints, mtime, dtype=np.int64))
+        columns["size"].append(np.full(npoints, size, dtype=np.int64))
+        columns["delta"].append(np.full(npoints, delta, dtype=np.float64))
+
+        for column in name_columns:
+            columns[column].append(np.full(npoints, trajectory[column], dtype=object))
+
+        for column in trajectory_columns:
+            columns[column].append(np.asarray(trajectory[column], dtype=np.float64))
+
+    return pd.DataFrame(
+        {
+            column: np.concatenate(values) if values else np.array([])
+            for column, values in columns.items()
+        }
+    )
+
+
+def dataframe_to_trajectories(dataframe):
+    """Return ({well file: trajectory}, {well file: key}) from a cache dataframe"""
+    trajectories = {}
+    keys = {}
+
+    file_names = np.asarray(dataframe["file_name"], dtype=object)
+
+    if len(file_names) == 0:
+        return trajectories, keys
+
+    # The points of a well are stored contiguously
+    starts = np.flatnonzero(np.r_[True, file_names[1:] != file_names[:-1]])
+    ends = np.r_[starts[1:], len(file_names)]
+
+    columns = {
+        column: np.asarray(dataframe[column])
+        for column in ["mtime", "size", "delta"] + name_columns + trajectory_columns
+    }
+
+    for start, end in zip(starts, ends):
+        wellfile = str(file_names[start])
+        keys[wellfile] = (
+            int(columns["mtime"][start]),
+            int(columns["size"][start]),
+            float(columns["delta"][start]),
+        )
+
+        trajectory = {column: str(columns[column][start]) for column in name_columns}
+
+        for column in trajectory_columns:
+            trajectory[column] = columns[column][start:end].astype(np.float64)
+
+        trajectories[wellfile] = trajectory
+
+    return trajectories, keys
+
+
+def read_well_cache(cache_file):
+    """Return the cached trajectories and keys (empty if no usable cache)"""
+    try:
+        dataframe = load_dataframe(str(cache_file))
+    except (OSError, ValueError, KeyError) as error:
+        print("WARNING: could not read well cache", cache_file, error)
+        dataframe = None
+
+    if dataframe is None:
+        return {}, {}
+
+    return dataframe_to_trajectories(dataframe)
+
+
+def load_cached_trajectories(wellfiles, delta, cache_file, workers=1):
+    """Return {well file: trajectory} for a list of well files. Only wells
+    missing in the cache file (or changed) are parsed, and the cache file is
+    updated if any well was parsed"""
+    wellfiles = list(dict.fromkeys(str(wellfile) for wellfile in wellfiles))
+    cached_trajectories, cached_keys = read_well_cache(cache_file)
+
+    keys = {wellfile: get_well_key(wellfile, delta) for wellfile in wellfiles}
+    changed = [
+        wellfile
+        for wellfile in wellfiles
+        if cached_keys.get(wellfile) != keys[wellfile]
+    ]
+
+    print("Well cache:", len(changed), "of", len(wellfiles), "well files parsed")
+
+    trajectories = {
+        wellfile: cached_trajectories[wellfile]
+        for wellfile in set(wellfiles).difference(changed)
+    }
+
+    if changed:
+        trajectories.update(load_well_trajectories(changed, delta, workers=workers))
+
+        try:
+            save_dataframe(
+                trajectories_to_dataframe(trajectories, keys),
+                str(cache_file),
+                [len(trajectories)],
+            )
+        except OSError as error:
+            print("WARNING: could not write well cache", cache_file, error)
+
+    return {wellfile: trajectories[wellfile] for wellfile in wellfiles}
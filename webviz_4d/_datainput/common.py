@@ -193,13 +193,18 @@ def get_last_date(selection_list):
     return last_date
 
 
-def get_map_min_max(surface, attribute_settings, data):
+def get_map_min_max(surface, attribute_settings, data, statistics=None):
+    """Return the colour scale limits of a map, from the attribute settings or
+    (if not given) symmetric around zero up to the maximum map value. The
+    maximum is taken from precomputed surface statistics when available"""
     if attribute_settings:
         min_val = attribute_settings.get(data["attr"], {}).get("min", None)
         max_val = attribute_settings.get(data["attr"], {}).get("max", None)
+    elif statistics is not None:
+        max_val = statistics["max"]
+        min_val = -max_val
     else:
-        x, y, z = surface.get_xyz_values1d(activeonly=True)
-        max_val = np.percentile(z, 100)
+        max_val = float(surface.values.max())
         min_val = -max_val
 
     return min_val, max_val
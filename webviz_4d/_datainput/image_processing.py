@@ -1,7 +1,7 @@
 import io
 import base64
 import numpy as np
-from matplotlib import cm
+import matplotlib
 from PIL import Image
 import warnings
 
@@ -9,10 +9,27 @@ from webviz_4d._datainput._colormaps import change_inferno
 
 
 def array_to_png(tensor, shift=True, colormap=False):
+    """Return an array as a base64 encoded png data url (see array_to_png_bytes)"""
+    return to_data_url(array_to_png_bytes(tensor, shift=shift, colormap=colormap))
+
+
+def to_data_url(image_bytes, mimetype="image/png"):
+    """Return encoded image bytes as a base64 data url"""
+    base64_data = base64.b64encode(image_bytes).decode("ascii")
+
+    return f"data:{mimetype};base64,{base64_data}"
+
+
+def array_to_png_bytes(tensor, shift=True, colormap=False):
+    """Return an array as png encoded bytes (default png settings)"""
+    return PNG_ENCODER.encode(array_to_image(tensor, shift=shift, colormap=colormap))
+
+
+def array_to_image(tensor, shift=True, colormap=False, value_range=None):
     """The layered map dash component takes in pictures as base64 data
     (or as a link to an existing hosted image). I.e. for containers wanting
     to create pictures on-the-fly from numpy arrays, they have to be converted
-    to base64. This is an example function of how that can be done.
+    to an image. This function returns the (not yet encoded) PIL image.
 
     1) Scale the input array (tensor) to the range 0-255.
     2) If shift=True and colormap=False, the 0 value in the scaled range
@@ -26,18 +43,24 @@ def array_to_png(tensor, shift=True, colormap=False):
     3) If the array is two-dimensional, the picture is stored as greyscale.
        Otherwise it is either stored as RGB or RGBA (depending on if the size
        of the third dimension is three or four, respectively).
+
+    The range which is scaled to 0-255 is value_range (min, max) if given,
+    otherwise the range of the values in the array.
     """
 
     with warnings.catch_warnings():
         warnings.filterwarnings("ignore", category=RuntimeWarning)
 
-        tensor -= np.nanmin(tensor)
+        if value_range is None:
+            value_range = (np.nanmin(tensor), np.nanmax(tensor))
+
+        tensor -= value_range[0]
 
         if shift:
-            tensor *= 254.0 / np.nanmax(tensor)
+            tensor *= 254.0 / (value_range[1] - value_range[0])
             tensor += 1.0
         else:
-            tensor *= 255.0 / np.nanmax(tensor)
+            tensor *= 255.0 / (value_range[1] - value_range[0])
 
         tensor[np.isnan(tensor)] = 0
 
@@ -74,22 +97,139 @@ def array_to_png(tensor, shift=True, colormap=False):
         else:
             raise ValueError("Incorrect number of dimensions in tensor")
 
+    return image
+
+
+class ImageEncoder:
+    """Encode PIL images as png or webp
+
+    * `image_format`: png or webp
+    * `compress_level`: png zlib compression level (0-9, 1 is fast)
+    * `strategy`: png zlib strategy (default, filtered, huffman_only, rle or fixed)
+    * `optimize`: extra png optimization pass (slow, smallest files)
+    * `lossless`, `quality`, `method`: webp settings (method 0 is fast)"""
+
+    presets = {
+        "fast": {"image_format": "png", "compress_level": 1},
+        "default": {"image_format": "png"},
+        "small": {"image_format": "png", "compress_level": 9, "optimize": True},
+        "webp": {"image_format": "webp", "lossless": True, "method": 0},
+    }
+
+    strategies = {
+        "default": 0,
+        "filtered": 1,
+        "huffman_only": 2,
+        "rle": 3,
+        "fixed": 4,
+    }
+
+    mimetypes = {"png": "image/png", "webp": "image/webp"}
+
+    def __init__(
+        self,
+        image_format="png",
+        compress_level=None,
+        strategy=None,
+        optimize=False,
+        lossless=True,
+        quality=80,
+        method=4,
+    ):
+        if image_format not in self.mimetypes:
+            raise ValueError("Unsupported image format: " + str(image_format))
+
+        if strategy is not None and strategy not in self.strategies:
+            raise ValueError("Unknown png strategy: " + str(strategy))
+
+        self.image_format = image_format
+        self.compress_level = compress_level
+        self.strategy = strategy
+        self.optimize = optimize
+        self.lossless = lossless
+        self.quality = quality
+        self.method = method
+
+    @classmethod
+    def from_settings(cls, encoding_settings):
+        """Create an encoder from the image_encoding part of settings.yaml,
+        e.g. {mode: fast} or {format: png, compress_level: 3, strategy: rle}"""
+        if not encoding_settings:
+            return cls()
+
+        encoding_settings = dict(encoding_settings)
+        mode = encoding_settings.pop("mode", "default")
+
+        if mode not in cls.presets:
+            raise ValueError("Unknown image encoding mode: " + str(mode))
+
+        options = dict(cls.presets[mode])
+
+        if "format" in encoding_settings:
+            options["image_format"] = encoding_settings.pop("format")
+
+        options.update(encoding_settings)
+
+        return cls(**options)
+
+    @property
+    def mimetype(self):
+        return self.mimetypes[self.image_format]
+
+    def encode(self, image):
+        """Return the encoded bytes of a PIL image"""
         byte_io = io.BytesIO()
-        image.save(byte_io, format="png")
 
-        byte_io.seek(0)
+        if self.image_format == "webp":
+            image.save(
+                byte_io,
+                format="webp",
+                lossless=self.lossless,
+                quality=self.quality,
+                method=self.method,
+            )
+        else:
+            options = {"optimize": self.optimize}
+
+            if self.compress_level is not None:
+                options["compress_level"] = self.compress_level
 
-        base64_data = base64.b64encode(byte_io.read()).decode("ascii")
+            if self.strategy is not None:
+                options["compress_type"] = self.strategies[self.strategy]
 
-    return f"data:image/png;base64,{base64_data}"
+            image.save(byte_io, format="png", **options)
 
+        return byte_io.getvalue()
 
-def get_colormap(colormap):
-    """Get selected colrmap from matlplotlig, but modify inferno if selected"""
+
+PNG_ENCODER = ImageEncoder()
+
+# Encoder used for the surface images, see configure_image_encoder
+image_encoders = {"surface": PNG_ENCODER}
+
+
+def configure_image_encoder(encoding_settings):
+    """Set the encoder for surface images from settings"""
+    image_encoders["surface"] = ImageEncoder.from_settings(encoding_settings)
+
+
+def get_image_encoder():
+    return image_encoders["surface"]
+
+
+def get_colormap_array(colormap):
+    """Get selected colormap from matplotlib as a (1, 256, 4) array, but modify
+    inferno if selected"""
 
     if colormap == "inferno":
         cmap = [change_inferno()]
     else:
-        cmap = cm.get_cmap(colormap, 256)([np.linspace(0, 1, 256)])
+        cmap = matplotlib.colormaps[colormap].resampled(256)([np.linspace(0, 1, 256)])
+
+    return np.array(cmap, dtype=np.float64)
+
+
+def get_colormap(colormap):
+    """Get selected colrmap from matlplotlig, but modify inferno if selected"""
 
-    return array_to_png(cmap, colormap=True)
+    return array_to_png(get_colormap_array(colormap), colormap=True)
@@ -4,23 +4,66 @@ import math
 import numpy as np
 import xtgeo
 import argparse
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 from webviz_4d._datainput.common import read_config
 
 
+trajectory_columns = ["X_UTME", "Y_UTMN", "Z_TVDSS", "MD"]
+
+# Lateral distance between the positions of the well polylines
+polyline_delta = 200
+
+
 def load_well(well_path):
     """Return a well object (xtgeo) for a given file (RMS ascii format)"""
     return xtgeo.well_from_file(well_path, mdlogname="MD")
 
 
-def load_all_wells(metadata, delta):
-    """For all wells in a folder return
-    - a list of dataframes with the well trajectories
-    - dataframe with metadata for all the wells"""
+def load_well_trajectory(wellfile, delta):
+    """Return the names and the trajectory (X_UTME, Y_UTMN, Z_TVDSS and MD
+    arrays) of a well file, resampled to delta"""
+    well = load_well(wellfile)
 
-    all_wells_list = []
+    # Resample well trajectory to delta
+    try:
+        well.rescale(delta=delta)
+    except:
+        print("WARNING:", well.name, ": rescaling failed, keeping original trajectory")
+
+    trajectory = {
+        "wellname": well.wellname,
+        "truewellname": well.truewellname,
+        "shortwellname": well.shortwellname,
+    }
+
+    for column in trajectory_columns:
+        trajectory[column] = well.dataframe[column].values
+
+    return trajectory
+
+
+def load_well_trajectories(wellfiles, delta, workers=1):
+    """Return {well file: trajectory} for a list of well files, parsed once
+    each (in a process pool if workers > 1)"""
+    wellfiles = list(dict.fromkeys(str(wellfile) for wellfile in wellfiles))
+
+    if workers > 1 and len(wellfiles) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            trajectories = list(
+                executor.map(
+                    load_well_trajectory, wellfiles, repeat(delta), chunksize=8
+                )
+            )
+    else:
+        trajectories = [load_well_trajectory(wellfile, delta) for wellfile in wellfiles]
 
+    return dict(zip(wellfiles, trajectories))
+
+
+def get_wellfiles(metadata):
     try:
         wellfiles = metadata["file_name"]
         wellfiles.dropna(inplace=True)
@@ -28,92 +71,262 @@ def load_all_wells(metadata, delta):
         wellfiles = []
         raise Exception("No wellfiles found")
 
-    for wellfile in wellfiles:
-        well = load_well(wellfile)
+    return wellfiles
 
-        # Resample well trajectory to delta
-        try:
-            well.rescale(delta=delta)
-        except:
-            print(
-                "WARNING:", well.name, ": rescaling failed, keeping original trajectory"
-            )
 
-        well.dataframe = well.dataframe[["X_UTME", "Y_UTMN", "Z_TVDSS", "MD"]]
-        well_metadata = metadata.loc[metadata["wellbore.rms_name"] == well.wellname]
+def make_wells_dataframe(trajectories, metadata):
+    """Return one dataframe with the trajectories of all wells in the metadata
+    (X_UTME, Y_UTMN, Z_TVDSS, MD, WELLBORE_NAME and layer_name)"""
+    columns = {column: [] for column in trajectory_columns}
+    wellbore_names = []
+    layer_names = []
+
+    for wellfile in get_wellfiles(metadata):
+        trajectory = trajectories[str(wellfile)]
+        wellname = trajectory["wellname"]
+        npoints = len(trajectory["MD"])
+
+        well_metadata = metadata.loc[metadata["wellbore.rms_name"] == wellname]
         layer_name = well_metadata["layer_name"].values[0]
 
         if layer_name == "Drilled wells":
-            well.dataframe["WELLBORE_NAME"] = well.truewellname
-            short_name = well.shortwellname
+            wellbore_name = trajectory["truewellname"]
+            short_name = trajectory["shortwellname"]
         else:
-            well.dataframe["WELLBORE_NAME"] = well.wellname
-            short_name = well.wellname
+            wellbore_name = wellname
+            short_name = wellname
 
         well_info = metadata.loc[metadata["wellbore.short_name"] == short_name]
         layer_name = well_info["layer_name"].values[0]
-        well.dataframe["layer_name"] = layer_name
 
-        all_wells_list.append(well.dataframe)
+        for column in trajectory_columns:
+            columns[column].append(trajectory[column])
+
+        wellbore_names.append(np.full(npoints, wellbore_name, dtype=object))
+        layer_names.append(np.full(npoints, layer_name, dtype=object))
+
+    all_wells_df = pd.DataFrame(
+        {column: np.concatenate(values) for column, values in columns.items()}
+    )
+    all_wells_df["WELLBORE_NAME"] = np.concatenate(wellbore_names)
+    all_wells_df["layer_name"] = np.concatenate(layer_names)
 
-    all_wells_df = pd.concat(all_wells_list)
     return all_wells_df
 
 
+def load_all_wells(metadata, delta, workers=1):
+    """For all wells in the metadata return a dataframe with the well
+    trajectories (see make_wells_dataframe)"""
+    wellfiles = get_wellfiles(metadata)
+    trajectories = load_well_trajectories(wellfiles, delta, workers=workers)
+
+    return make_wells_dataframe(trajectories, metadata)
+
+
 def get_position_data(well_dataframe, md_start, md_end):
     """Return x- and y-values for a well between given depths"""
-    delta = 200
     positions = [[]]
 
     if not math.isnan(md_start):
         well_df = well_dataframe[well_dataframe["MD"] >= md_start]
-        resampled_df = resample_well(well_df, md_start, md_end, delta)
+        resampled_df = resample_well(well_df, md_start, md_end, polyline_delta)
         positions = resampled_df[["X_UTME", "Y_UTMN"]].values
 
     return positions
 
 
+def get_resampled_indices(x, y, starts, ends, delta, window=32):
+    """Return the indices of the positions kept when the segments [start, end)
+    of concatenated trajectories are resampled to a lateral distance delta.
+    All segments are resampled together: the first position, every position
+    more than delta from the last kept position and the last position
+    (see resample_well). The indices are sorted by segment"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+
+    filled = ends > starts
+    kept = [starts[filled], ends[filled] - 1]
+    segments = [np.flatnonzero(filled), np.flatnonzero(filled)]
+
+    # Last kept position and first position to search from in active segments
+    active = np.flatnonzero(ends - starts > 1)
+    current = starts[active]
+    scan = current + 1
+    offsets = np.arange(window)
+
+    while len(active) > 0:
+        candidates = scan[:, np.newaxis] + offsets
+        valid = candidates < ends[active, np.newaxis]
+        candidates = np.minimum(candidates, ends[active, np.newaxis] - 1)
+
+        dist = np.sqrt(
+            (x[candidates] - x[current, np.newaxis]) ** 2
+            + (y[candidates] - y[current, np.newaxis]) ** 2
+        )
+        outside = valid & (dist > delta)
+
+        found = outside.any(axis=1)
+        first = candidates[found, np.argmax(outside[found], axis=1)]
+        kept.append(first)
+        segments.append(active[found])
+
+        current[found] = first
+        scan[found] = first + 1
+        scan[~found] = scan[~found] + window
+
+        searching = scan < ends[active]
+        active = active[searching]
+        current = current[searching]
+        scan = scan[searching]
+
+    kept = np.concatenate(kept)
+    segments = np.concatenate(segments)
+    order = np.lexsort((kept, segments))
+
+    return kept[order], segments[order]
+
+
+def get_md_range(md, md_start, md_end):
+    """Return a boolean mask of the positions between two MD values (to the end
+    of the well if md_end is NaN)"""
+    if len(md) > 0 and math.isnan(md_end):
+        md_end = md[-1]
+
+    return (md >= md_start) & (md <= md_end)
+
+
+def resample_wells(well_dataframes, md_starts, md_ends, delta):
+    """Resample many well trajectories (between given depths) in one call,
+    see resample_well. Return a list of dataframes"""
+    trajectories = {column: [] for column in trajectory_columns}
+    lengths = []
+
+    for well_df, md_start, md_end in zip(well_dataframes, md_starts, md_ends):
+        md = well_df["MD"].values
+        selected = get_md_range(md, md_start, md_end)
+        lengths.append(np.count_nonzero(selected))
+
+        for column in trajectory_columns:
+            trajectories[column].append(well_df[column].values[selected])
+
+    if not lengths:
+        return []
+
+    trajectories = {
+        column: np.concatenate(values) for column, values in trajectories.items()
+    }
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+
+    kept, segments = get_resampled_indices(
+        trajectories["X_UTME"], trajectories["Y_UTMN"], starts, ends, delta
+    )
+    bounds = np.searchsorted(segments, np.arange(len(lengths) + 1))
+
+    resampled = []
+
+    for index in range(len(lengths)):
+        well_kept = kept[bounds[index] : bounds[index + 1]]
+        resampled.append(
+            pd.DataFrame(
+                {
+                    column: trajectories[column][well_kept]
+                    for column in trajectory_columns
+                }
+            )
+        )
+
+    return resampled
+
+
 def resample_well(well_df, md_start, md_end, delta):
-    # Resample well trajectory by selecting only positions with a lateral distance larger than the given delta value
-    if math.isnan(md_end):
-        md_end = well_df["MD"].iloc[-1]
-
-    dfr = well_df[(well_df["MD"] >= md_start) & (well_df["MD"] <= md_end)]
-
-    x = dfr["X_UTME"].values
-    y = dfr["Y_UTMN"].values
-    tvd = dfr["Z_TVDSS"].values
-    md = dfr["MD"].values
-
-    x_new = [x[0]]
-    y_new = [y[0]]
-    tvd_new = [tvd[0]]
-    md_new = [md[0]]
-    j = 0
-
-    for i in range(1, len(x)):
-        dist = ((x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2) ** 0.5
-        # print(i, j, md[i], dist)
-
-        if dist > delta:
-            x_new.append(x[i])
-            y_new.append(y[i])
-            tvd_new.append(tvd[i])
-            md_new.append(md[i])
-            j = i
-
-    x_new.append(x[-1])
-    y_new.append(y[-1])
-    tvd_new.append(tvd[-1])
-    md_new.append(md[-1])
-
-    dfr_new = pd.DataFrame()
-    dfr_new["X_UTME"] = x_new
-    dfr_new["Y_UTMN"] = y_new
-    dfr_new["Z_TVDSS"] = tvd_new
-    dfr_new["MD"] = md_new
-
-    return dfr_new
+    """Resample a well trajectory between two depths by selecting only
+    positions with a lateral distance larger than delta from the previously
+    selected position. The first and the last position are always kept"""
+    return resample_wells([well_df], [md_start], [md_end], delta)[0]
+
+
+class WellIndex:
+    """The trajectories of all wellbores in a wells dataframe (see
+    make_wells_dataframe), sorted by WELLBORE_NAME so that every wellbore is
+    a contiguous slice of the column arrays"""
+
+    def __init__(self, wells_df):
+        codes, names = pd.factorize(wells_df["WELLBORE_NAME"].values)
+
+        # Rows without a wellbore name (code -1) are left out
+        named = np.flatnonzero(codes >= 0)
+        order = named[np.argsort(codes[named], kind="stable")]
+        counts = np.bincount(codes[named], minlength=len(names))
+        ends = np.cumsum(counts)
+
+        self.columns = {
+            column: wells_df[column].values[order].astype(np.float64)
+            for column in trajectory_columns
+        }
+        self.slices = {
+            name: (int(end - count), int(end))
+            for name, count, end in zip(names, counts, ends)
+        }
+
+    def get_slice(self, wellbore_name):
+        """Return (start, end) of a wellbore in the column arrays"""
+        return self.slices.get(wellbore_name, (0, 0))
+
+    def get_trajectory(self, wellbore_name):
+        """Return the trajectory of a wellbore as a dataframe"""
+        start, end = self.get_slice(wellbore_name)
+
+        return pd.DataFrame(
+            {column: values[start:end] for column, values in self.columns.items()}
+        )
+
+    def get_positions(self, wellbore_names, md_starts, md_ends, delta):
+        """Return the x- and y-values of many wellbores between given depths
+        (see get_position_data), resampled in one batched call"""
+        md = self.columns["MD"]
+        positions = []
+        selections = []
+
+        for wellbore_name, md_start, md_end in zip(wellbore_names, md_starts, md_ends):
+            if math.isnan(md_start):
+                positions.append([[]])
+                continue
+
+            start, end = self.get_slice(wellbore_name)
+            below = np.flatnonzero(md[start:end] >= md_start) + start
+
+            if len(below) > 0 and math.isnan(md_end):
+                md_end = md[below[-1]]
+
+            selections.append(below[md[below] <= md_end])
+            positions.append(None)
+
+        if not selections:
+            return positions
+
+        lengths = [len(selection) for selection in selections]
+        selected = np.concatenate(selections)
+        x_values = self.columns["X_UTME"][selected]
+        y_values = self.columns["Y_UTMN"][selected]
+
+        ends = np.cumsum(lengths)
+        kept, segments = get_resampled_indices(
+            x_values, y_values, ends - lengths, ends, delta
+        )
+        bounds = np.searchsorted(segments, np.arange(len(lengths) + 1))
+        resampled = iter(
+            np.column_stack([x_values[kept], y_values[kept]])[
+                bounds[index] : bounds[index + 1]
+            ]
+            for index in range(len(lengths))
+        )
+
+        return [
+            next(resampled) if position is None else position for position in positions
+        ]
 
 
 def get_well_polyline(
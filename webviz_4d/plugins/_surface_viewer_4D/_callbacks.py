@@ -2,6 +2,44 @@ import dash
 from dash.exceptions import PreventUpdate
 from dash.dependencies import Input, Output, State
 
+from ._layer_patch import get_layer_patch
+
+
+# Insert the static layer bundle (fetched once per url) into the map layers.
+# The map layers store is updated with a Patch of the changed layers only, but
+# LayeredMap still gets (and renders) the full merged list on every update
+MERGE_STATIC_LAYERS = """
+function (mapLayers) {
+    if (!mapLayers) {
+        return window.dash_clientside.no_update;
+    }
+
+    const url = mapLayers.static_url;
+
+    if (!url) {
+        return mapLayers.layers;
+    }
+
+    const bundles = (window.webviz4dLayerBundles = window.webviz4dLayerBundles || {});
+
+    if (!(url in bundles)) {
+        bundles[url] = fetch(url)
+            .then((response) => response.json())
+            .catch((error) => {
+                delete bundles[url];
+                throw error;
+            });
+    }
+
+    return bundles[url].then((staticLayers) => {
+        const layers = mapLayers.layers;
+        const index = mapLayers.static_index;
+
+        return layers.slice(0, index).concat(staticLayers, layers.slice(index));
+    });
+}
+"""
+
 
 def set_first_map(parent, app):
     # First map
@@ -9,7 +47,8 @@ def set_first_map(parent, app):
         [
             Output(parent.uuid("heading1"), "children"),
             Output(parent.uuid("sim_info1"), "children"),
-            Output(parent.uuid("map"), "layers"),
+            Output(parent.uuid("map-layers"), "data"),
+            Output(parent.uuid("map-layer-keys"), "data"),
             Output(parent.uuid("interval-label1"), "children"),
         ],
         [
@@ -18,6 +57,7 @@ def set_first_map(parent, app):
             Input(parent.uuid("realization"), "value"),
             Input(parent.uuid("attribute-settings"), "data"),
         ],
+        [State(parent.uuid("map-layer-keys"), "data")],
     )
     # pylint: disable=too-many-arguments, too-many-locals
     def _set_base_layer(
@@ -25,8 +65,13 @@ def set_first_map(parent, app):
         iteration,
         real,
         attribute_settings,
+        layer_keys,
     ):
-        return parent.make_map(data, iteration, real, attribute_settings, 0)
+        heading, sim_info, map_layers, label = parent.make_map(
+            data, iteration, real, attribute_settings, 0
+        )
+
+        return heading, sim_info, *get_layer_patch(map_layers, layer_keys), label
 
 
 def set_second_map(parent, app):
@@ -35,7 +80,8 @@ def set_second_map(parent, app):
         [
             Output(parent.uuid("heading2"), "children"),
             Output(parent.uuid("sim_info2"), "children"),
-            Output(parent.uuid("map2"), "layers"),
+            Output(parent.uuid("map2-layers"), "data"),
+            Output(parent.uuid("map2-layer-keys"), "data"),
             Output(parent.uuid("interval-label2"), "children"),
         ],
         [
@@ -44,6 +90,7 @@ def set_second_map(parent, app):
             Input(parent.uuid("realization2"), "value"),
             Input(parent.uuid("attribute-settings"), "data"),
         ],
+        [State(parent.uuid("map2-layer-keys"), "data")],
     )
     # pylint: disable=too-many-arguments, too-many-locals
     def _set_base_layer(
@@ -51,8 +98,13 @@ def set_second_map(parent, app):
         iteration,
         real,
         attribute_settings,
+        layer_keys,
     ):
-        return parent.make_map(data, iteration, real, attribute_settings, 1)
+        heading, sim_info, map_layers, label = parent.make_map(
+            data, iteration, real, attribute_settings, 1
+        )
+
+        return heading, sim_info, *get_layer_patch(map_layers, layer_keys), label
 
 
 def set_third_map(parent, app):
@@ -61,7 +113,8 @@ def set_third_map(parent, app):
         [
             Output(parent.uuid("heading3"), "children"),
             Output(parent.uuid("sim_info3"), "children"),
-            Output(parent.uuid("map3"), "layers"),
+            Output(parent.uuid("map3-layers"), "data"),
+            Output(parent.uuid("map3-layer-keys"), "data"),
             Output(parent.uuid("interval-label3"), "children"),
         ],
         [
@@ -70,6 +123,7 @@ def set_third_map(parent, app):
             Input(parent.uuid("realization3"), "value"),
             Input(parent.uuid("attribute-settings"), "data"),
         ],
+        [State(parent.uuid("map3-layer-keys"), "data")],
     )
     # pylint: disable=too-many-arguments, too-many-locals
     def _set_base_layer(
@@ -77,8 +131,142 @@ def set_third_map(parent, app):
         iteration,
         real,
         attribute_settings,
+        layer_keys,
     ):
-        return parent.make_map(data, iteration, real, attribute_settings, 2)
+        heading, sim_info, map_layers, label = parent.make_map(
+            data, iteration, real, attribute_settings, 2
+        )
+
+        return heading, sim_info, *get_layer_patch(map_layers, layer_keys), label
+
+
+def set_difference_map(parent, app):
+    # Difference map (map A - map B)
+    @app.callback(
+        [
+            Output(parent.uuid("heading4"), "children"),
+            Output(parent.uuid("sim_info4"), "children"),
+            Output(parent.uuid("map4-layers"), "data"),
+            Output(parent.uuid("map4-layer-keys"), "data"),
+            Output(parent.uuid("interval-label4"), "children"),
+        ],
+        [
+            Input(parent.uuid("difference-pair"), "value"),
+            Input(parent.selector.storage_id, "children"),
+            Input(parent.uuid("iteration"), "value"),
+            Input(parent.uuid("realization"), "value"),
+            Input(parent.selector2.storage_id, "children"),
+            Input(parent.uuid("iteration2"), "value"),
+            Input(parent.uuid("realization2"), "value"),
+            Input(parent.selector3.storage_id, "children"),
+            Input(parent.uuid("iteration3"), "value"),
+            Input(parent.uuid("realization3"), "value"),
+            Input(parent.uuid("attribute-settings"), "data"),
+        ],
+        [State(parent.uuid("map4-layer-keys"), "data")],
+    )
+    # pylint: disable=too-many-arguments, too-many-locals
+    def _set_difference_layer(
+        pair,
+        data,
+        iteration,
+        real,
+        data2,
+        iteration2,
+        real2,
+        data3,
+        iteration3,
+        real3,
+        attribute_settings,
+        layer_keys,
+    ):
+        if pair is None or None in [data, data2, data3]:
+            raise PreventUpdate
+
+        selections = [
+            (data, iteration, real),
+            (data2, iteration2, real2),
+            (data3, iteration3, real3),
+        ]
+
+        heading, sim_info, map_layers, label = parent.make_difference_map(
+            pair, selections, attribute_settings
+        )
+
+        return heading, sim_info, *get_layer_patch(map_layers, layer_keys), label
+
+
+def set_map_layers(parent, app):
+    # The map callbacks return the layer data, merged with the static layers
+    # in the browser
+    for map_id in ["map", "map2", "map3", "map4"]:
+        app.clientside_callback(
+            MERGE_STATIC_LAYERS,
+            Output(parent.uuid(map_id), "layers"),
+            Input(parent.uuid(map_id + "-layers"), "data"),
+        )
+
+
+def set_realization_ranking(parent, app):
+    # Realization dropdowns of simulated maps, ranked by misfit to observed map
+    maps = [
+        (0, parent.selector, "iteration", "realization"),
+        (1, parent.selector2, "iteration2", "realization2"),
+        (2, parent.selector3, "iteration3", "realization3"),
+    ]
+
+    for map_idx, selector, iteration_id, realization_id in maps:
+        if parent.map_defaults[map_idx]["map_type"] != parent.simulations:
+            continue
+
+        @app.callback(
+            Output(parent.uuid(realization_id), "options"),
+            [
+                Input(parent.uuid("misfit-metric"), "value"),
+                Input(selector.storage_id, "children"),
+                Input(parent.uuid(iteration_id), "value"),
+            ],
+        )
+        def _set_realization_options(metric, data, iteration, map_idx=map_idx):
+            if data is None:
+                raise PreventUpdate
+
+            return parent.get_realization_options(map_idx, data, iteration, metric)
+
+
+def set_point_probe(parent, app):
+    # Values of all realizations at a marker placed in one of the maps
+    @app.callback(
+        Output(parent.uuid("probe-graph"), "figure"),
+        [
+            Input(parent.uuid("map"), "marker_point"),
+            Input(parent.uuid("map2"), "marker_point"),
+            Input(parent.uuid("map3"), "marker_point"),
+        ],
+        [
+            State(parent.selector.storage_id, "children"),
+            State(parent.uuid("iteration"), "value"),
+            State(parent.selector2.storage_id, "children"),
+            State(parent.uuid("iteration2"), "value"),
+            State(parent.selector3.storage_id, "children"),
+            State(parent.uuid("iteration3"), "value"),
+        ],
+        prevent_initial_call=True,
+    )
+    # pylint: disable=too-many-arguments
+    def _set_probe_figure(
+        point, point2, point3, data, iteration, data2, iteration2, data3, iteration3
+    ):
+        ctx = dash.callback_context.triggered
+
+        if not ctx or not ctx[0]["value"]:
+            raise PreventUpdate
+
+        map_ids = [parent.uuid("map"), parent.uuid("map2"), parent.uuid("map3")]
+        map_idx = map_ids.index(ctx[0]["prop_id"].split(".")[0])
+        selections = [(data, iteration), (data2, iteration2), (data3, iteration3)]
+
+        return parent.make_probe_figure(map_idx, *selections[map_idx], ctx[0]["value"])
 
 
 def change_maps_from_button(parent, app):
@@ -0,0 +1,43 @@
+import flask
+
+from webviz_4d._datainput._image_store import (
+    IMAGE_STORE,
+    DEFAULT_IMAGE_DIRECTORY_MB,
+    get_mimetype,
+)
+
+
+IMAGE_ROUTE = "webviz-4d/images"
+IMAGE_ENDPOINT = "webviz_4d_images"
+
+
+def serve_image(name):
+    """Serve a stored image. The name is the content hash, so the response
+    can be cached forever and revalidated with the ETag"""
+    image_bytes = IMAGE_STORE.get(name)
+
+    if image_bytes is None:
+        flask.abort(404)
+
+    response = flask.Response(image_bytes, mimetype=get_mimetype(name))
+    response.set_etag(name.split(".")[0])
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+
+    return response.make_conditional(flask.request)
+
+
+def set_image_route(app, directory=None, directory_mb=DEFAULT_IMAGE_DIRECTORY_MB):
+    """Register the image route (once per app) and let the image store
+    return urls to it. The image directory is kept below directory_mb"""
+    if IMAGE_ENDPOINT not in app.server.view_functions:
+        app.server.add_url_rule(
+            app.config.routes_pathname_prefix + IMAGE_ROUTE + "/<name>",
+            IMAGE_ENDPOINT,
+            serve_image,
+        )
+
+    IMAGE_STORE.configure(
+        app.config.requests_pathname_prefix + IMAGE_ROUTE,
+        directory=directory,
+        max_directory_bytes=int(directory_mb * 1024**2),
+    )
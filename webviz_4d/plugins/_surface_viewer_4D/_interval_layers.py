@@ -0,0 +1,91 @@
+import threading
+from collections import defaultdict
+
+from webviz_4d._datainput._surface_cache import SurfaceCache, get_nbytes
+
+
+DEFAULT_WELL_LAYER_CACHE_MB = 256
+
+
+class IntervalWellLayers:
+    """Well layers of the 4D intervals, built the first time an interval is
+    selected and kept in a bounded LRU cache
+
+    The layers can also be built for all intervals in a background thread
+    (warm). Warming stops before the cache budget is used (estimated from the
+    largest layers built so far), so that it never evicts layers which have
+    been selected."""
+
+    def __init__(
+        self,
+        build_function,
+        intervals,
+        max_bytes=DEFAULT_WELL_LAYER_CACHE_MB * 1024**2,
+    ):
+        self.build_function = build_function
+        self.intervals = list(intervals)
+        self.cache = SurfaceCache(max_bytes)
+        self.locks = defaultdict(threading.Lock)
+        self.lock = threading.Lock()
+        self.warm_thread = None
+        self.largest_nbytes = 0
+
+    def __contains__(self, interval):
+        return interval in self.intervals
+
+    def get(self, interval):
+        """Return the (cached) well layers of an interval"""
+        if interval not in self.intervals:
+            return []
+
+        with self.lock:
+            interval_lock = self.locks[interval]
+
+        # Build every interval once, also if requested from several threads
+        with interval_lock:
+            return self.cache.get_or_create(interval, lambda: self._build(interval))
+
+    def _build(self, interval):
+        layers = self.build_function(interval)
+        self.largest_nbytes = max(self.largest_nbytes, get_nbytes(layers))
+
+        return layers
+
+    def _fits(self, nbytes):
+        return nbytes <= self.cache.max_bytes - self.cache.nbytes
+
+    def warm(self, delay=0):
+        """Build the layers of all intervals (latest first) in a background
+        thread, starting after a delay in seconds"""
+        if self.warm_thread is not None:
+            return
+
+        self.warm_thread = threading.Timer(delay, self._warm)
+        self.warm_thread.daemon = True
+        self.warm_thread.start()
+
+    def _warm(self):
+        for interval in reversed(self.intervals):
+            if not self._fits(self.largest_nbytes):
+                print("WARNING: well layer cache is full, warming stopped")
+                break
+
+            with self.lock:
+                interval_lock = self.locks[interval]
+
+            with interval_lock:
+                if interval in self.cache:
+                    continue
+
+                try:
+                    layers = self._build(interval)
+                except Exception as error:  # pylint: disable=broad-except
+                    print("WARNING: building well layers failed", interval, error)
+                    continue
+
+                # Only layers which fit are cached
+                if not self._fits(get_nbytes(layers)):
+                    print("WARNING: well layer cache is full, warming stopped")
+                    break
+
+                self.cache.put(interval, layers)
@@ -0,0 +1,44 @@
+from dash import Patch, no_update
+
+from webviz_4d._datainput._layer_bundle import get_layer_digest
+
+
+def get_layer_keys(map_layers):
+    """Return the keys (layer digests, static bundle url and position) of the
+    data in a map layers store"""
+    return {
+        "layers": [get_layer_digest(layer) for layer in map_layers["layers"]],
+        "static_index": map_layers["static_index"],
+        "static_url": map_layers["static_url"],
+    }
+
+
+def get_layer_patch(map_layers, layer_keys):
+    """Return (update, keys) for a map layers store, where layer_keys are the
+    keys of the data in the browser. The update is a Patch replacing only
+    the changed layers (the full data if there are no keys in the browser,
+    no_update if nothing changed)"""
+    new_keys = get_layer_keys(map_layers)
+
+    if not layer_keys:
+        return map_layers, new_keys
+
+    if layer_keys == new_keys:
+        return no_update, no_update
+
+    patch = Patch()
+
+    if len(layer_keys["layers"]) != len(new_keys["layers"]):
+        patch["layers"] = map_layers["layers"]
+    else:
+        for index, (key, new_key) in enumerate(
+            zip(layer_keys["layers"], new_keys["layers"])
+        ):
+            if key != new_key:
+                patch["layers"][index] = map_layers["layers"][index]
+
+    for key in ["static_index", "static_url"]:
+        if layer_keys.get(key) != new_keys[key]:
+            patch[key] = map_layers[key]
+
+    return patch, new_keys
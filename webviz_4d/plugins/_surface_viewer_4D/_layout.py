@@ -6,6 +6,8 @@ from dash import dcc
 
 from webviz_subsurface_components import LayeredMap
 
+from webviz_4d._datainput._misfit import misfit_metrics
+
 
 def set_grid_layout(columns):
     return {
@@ -210,11 +212,16 @@ def set_layout(parent):
                                 },
                             ),
                             LayeredMap(
-                                sync_ids=[parent.uuid("map2"), parent.uuid("map3")],
+                                sync_ids=[
+                                    parent.uuid("map2"),
+                                    parent.uuid("map3"),
+                                    parent.uuid("map4"),
+                                ],
                                 id=parent.uuid("map"),
                                 height=600,
                                 layers=[],
                                 hillShading=False,
+                                draw_toolbar_marker=True,
                             ),
                             html.Div(
                                 id=parent.uuid("interval-label1"),
@@ -246,11 +253,16 @@ def set_layout(parent):
                                 },
                             ),
                             LayeredMap(
-                                sync_ids=[parent.uuid("map"), parent.uuid("map3")],
+                                sync_ids=[
+                                    parent.uuid("map"),
+                                    parent.uuid("map3"),
+                                    parent.uuid("map4"),
+                                ],
                                 id=parent.uuid("map2"),
                                 height=600,
                                 layers=[],
                                 hillShading=False,
+                                draw_toolbar_marker=True,
                             ),
                             html.Div(
                                 id=parent.uuid("interval-label2"),
@@ -282,11 +294,16 @@ def set_layout(parent):
                                 },
                             ),
                             LayeredMap(
-                                sync_ids=[parent.uuid("map"), parent.uuid("map2")],
+                                sync_ids=[
+                                    parent.uuid("map"),
+                                    parent.uuid("map2"),
+                                    parent.uuid("map4"),
+                                ],
                                 id=parent.uuid("map3"),
                                 height=600,
                                 layers=[],
                                 hillShading=False,
+                                draw_toolbar_marker=True,
                             ),
                             html.Div(
                                 id=parent.uuid("interval-label3"),
@@ -302,8 +319,126 @@ def set_layout(parent):
                         id=parent.uuid("attribute-settings"),
                         data=json.dumps(parent.attribute_settings),
                     ),
+                    dcc.Store(id=parent.uuid("map-layers")),
+                    dcc.Store(id=parent.uuid("map2-layers")),
+                    dcc.Store(id=parent.uuid("map3-layers")),
+                    dcc.Store(id=parent.uuid("map4-layers")),
+                    dcc.Store(id=parent.uuid("map-layer-keys")),
+                    dcc.Store(id=parent.uuid("map2-layer-keys")),
+                    dcc.Store(id=parent.uuid("map3-layer-keys")),
+                    dcc.Store(id=parent.uuid("map4-layer-keys")),
                 ],
             ),
+            difference_layout(parent),
             html.H6(update_txt),
         ],
     )
+
+
+def difference_layout(parent):
+    """Layout of the difference map (map A - map B), the misfit ranking and
+    the point probe"""
+    pairs = ["0-1", "0-2", "1-2"]
+
+    return wcc.FlexBox(
+        style={"fontSize": "1rem"},
+        children=[
+            html.Div(
+                style={"margin": "10px", "flex": 4},
+                children=[
+                    html.Label(
+                        "Difference map",
+                        style={"fontSize": 15, "fontWeight": "bold"},
+                    ),
+                    dcc.Dropdown(
+                        options=[
+                            {
+                                "label": "Map "
+                                + str(int(pair[0]) + 1)
+                                + " - map "
+                                + str(int(pair[2]) + 1),
+                                "value": pair,
+                            }
+                            for pair in pairs
+                        ],
+                        value=pairs[0],
+                        id=parent.uuid("difference-pair"),
+                        clearable=False,
+                        persistence=True,
+                        persistence_type="session",
+                        style={"fontSize": 15, "fontWeight": "normal"},
+                    ),
+                    html.Label(
+                        "Rank realizations by misfit to the observed map",
+                        style={"fontSize": 15, "fontWeight": "bold"},
+                    ),
+                    dcc.RadioItems(
+                        options=[{"label": "Off", "value": ""}]
+                        + [
+                            {"label": metric["label"], "value": name}
+                            for name, metric in misfit_metrics.items()
+                        ],
+                        value="",
+                        id=parent.uuid("misfit-metric"),
+                        persistence=True,
+                        persistence_type="session",
+                        style={"fontSize": 15, "fontWeight": "normal"},
+                    ),
+                ],
+            ),
+            html.Div(
+                style={"margin": "10px", "flex": 8},
+                children=[
+                    html.Div(
+                        id=parent.uuid("heading4"),
+                        style={
+                            "textAlign": "center",
+                            "fontSize": 20,
+                            "fontWeight": "bold",
+                        },
+                    ),
+                    html.Div(
+                        id=parent.uuid("sim_info4"),
+                        style={
+                            "textAlign": "center",
+                            "fontSize": 15,
+                            "fontWeight": "bold",
+                        },
+                    ),
+                    LayeredMap(
+                        sync_ids=[
+                            parent.uuid("map"),
+                            parent.uuid("map2"),
+                            parent.uuid("map3"),
+                        ],
+                        id=parent.uuid("map4"),
+                        height=600,
+                        layers=[],
+                        hillShading=False,
+                    ),
+                    html.Div(
+                        id=parent.uuid("interval-label4"),
+                        style={
+                            "textAlign": "center",
+                            "fontSize": 20,
+                            "fontWeight": "bold",
+                        },
+                    ),
+                ],
+            ),
+            html.Div(
+                style={"margin": "10px", "flex": 4},
+                children=[
+                    html.Label(
+                        "Realizations at a point (place a marker in a map)",
+                        style={"fontSize": 15, "fontWeight": "bold"},
+                    ),
+                    dcc.Graph(
+                        id=parent.uuid("probe-graph"),
+                        figure={},
+                        config={"displaylogo": False},
+                    ),
+                ],
+            ),
+        ],
+    )
@@ -0,0 +1,77 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def get_neighbours(current_value, options):
+    """Return the previous and next option of a selected value"""
+    try:
+        index = options.index(current_value)
+    except ValueError:
+        return []
+
+    neighbours = []
+
+    if index + 1 < len(options):
+        neighbours.append(options[index + 1])
+
+    if index > 0:
+        neighbours.append(options[index - 1])
+
+    return neighbours
+
+
+class SurfacePrefetcher:
+    """Render surface layers for neighbouring selections in a bounded thread pool
+
+    The rendered layers end up in the surface cache, so that stepping to the
+    next/previous realization, iteration or interval is a cache hit. A new
+    schedule for a map cancels the prefetching still pending for that map."""
+
+    def __init__(self, render_function, max_workers=2):
+        self.render_function = render_function
+        self.executor = (
+            ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="webviz-4d-prefetch"
+            )
+            if max_workers > 0
+            else None
+        )
+        self.pending = {}
+        self.generations = {}
+        self.lock = threading.Lock()
+
+    def schedule(self, map_idx, selections):
+        """Cancel pending prefetching for a map and prefetch new selections.
+        Each selection is a tuple with the arguments to the render function"""
+        with self.lock:
+            self._cancel(map_idx)
+
+            if self.executor is None:
+                return
+
+            generation = self.generations.get(map_idx, 0) + 1
+            self.generations[map_idx] = generation
+
+            self.pending[map_idx] = [
+                self.executor.submit(self._run, map_idx, generation, selection)
+                for selection in selections
+            ]
+
+    def cancel(self, map_idx):
+        with self.lock:
+            self.generations[map_idx] = self.generations.get(map_idx, 0) + 1
+            self._cancel(map_idx)
+
+    def _cancel(self, map_idx):
+        for future in self.pending.pop(map_idx, []):
+            future.cancel()
+
+    def _run(self, map_idx, generation, selection):
+        # Skip tasks which have been started after the user moved elsewhere
+        if self.generations.get(map_idx) != generation:
+            return
+
+        try:
+            self.render_function(*selection)
+        except Exception as error:  # pylint: disable=broad-except
+            print("WARNING: prefetching failed", selection, error)
@@ -2,11 +2,21 @@ from typing import List, Tuple, Callable
 from pathlib import Path
 import json
 import os
-import numpy as np
+import time
 import pandas as pd
 
 from webviz_config import WebvizPluginABC
-from webviz_4d._datainput._surface import make_surface_layer, load_surface
+from webviz_4d._datainput._surface import get_cached_surface_layer, load_surface
+from webviz_4d._datainput._surface_cache import (
+    SURFACE_CACHE,
+    DEFAULT_CACHE_MB,
+    file_key,
+)
+from webviz_4d._datainput._aggregation import (
+    get_aggregation,
+    get_aggregation_names,
+    get_aggregated_surface,
+)
 from webviz_4d._datainput.common import (
     read_config,
     get_update_dates,
@@ -15,10 +25,15 @@ from webviz_4d._datainput.common import (
     get_last_date,
     get_map_min_max,
 )
-from webviz_4d._datainput.well import load_all_wells
+from webviz_4d._datainput.well import WellIndex, make_wells_dataframe, get_wellfiles
+from webviz_4d._datainput._well_cache import load_cached_trajectories
+from webviz_4d._datainput._snapshot import get_snapshot_path
 from webviz_4d._datainput._production import make_new_well_layer
 from webviz_4d._private_plugins.surface_selector import SurfaceSelector
 from webviz_4d._datainput._colormaps import load_custom_colormaps
+from webviz_4d._datainput.image_processing import configure_image_encoder
+from webviz_4d._datainput._image_store import DEFAULT_IMAGE_DIRECTORY_MB
+from webviz_4d._datainput._colormap_registry import COLORMAP_REGISTRY
 from webviz_4d._datainput._config import get_basic_well_layers
 from webviz_4d._datainput._settings import get_color
 from webviz_4d._datainput._polygons import (
@@ -28,14 +43,55 @@ from webviz_4d._datainput._polygons import (
     get_default_polygon_files,
 )
 from webviz_4d._datainput._metadata import define_map_defaults
-from ._webvizstore import read_csv, read_csvs, find_files, get_path
+from webviz_4d._datainput._catalog import SurfaceCatalog, get_interval_times
+from webviz_4d._datainput._derived_intervals import DerivedIntervals, sum_increments
+from webviz_4d._datainput._residual import get_residual_surface
+from webviz_4d._datainput._simplify import (
+    DEFAULT_TOLERANCES,
+    DEFAULT_MAP_PIXELS,
+    get_layer_level,
+    get_layer_levels,
+)
+from webviz_4d._datainput._layer_encoding import DEFAULT_DECIMALS, get_quantized_layer
+from webviz_4d._datainput._layer_bundle import LAYER_BUNDLES
+from webviz_4d._datainput._ensemble_cube import (
+    ENSEMBLE_CUBES,
+    DEFAULT_CUBE_DIRECTORY_MB,
+    get_ensemble_cube,
+    get_probe_figure,
+)
+from webviz_4d._datainput._misfit import (
+    get_misfit_scores,
+    get_misfit_label,
+    rank_realizations,
+)
+from webviz_4d._datainput._surface_store import configure_surface_store
+from webviz_4d._datainput._surface_statistics import (
+    SurfaceStatistics,
+    compute_min_max,
+    get_statistics_file,
+)
+from ._webvizstore import (
+    read_csv,
+    read_csvs,
+    read_surface_metadata,
+    find_files,
+    get_path,
+)
 from ._callbacks import (
     set_first_map,
     set_second_map,
     set_third_map,
+    set_difference_map,
+    set_map_layers,
+    set_realization_ranking,
+    set_point_probe,
     change_maps_from_button,
 )
 from ._layout import set_layout
+from ._prefetch import SurfacePrefetcher, get_neighbours
+from ._interval_layers import IntervalWellLayers, DEFAULT_WELL_LAYER_CACHE_MB
+from ._image_route import set_image_route
 
 
 class SurfaceViewer4D(WebvizPluginABC):
@@ -139,10 +195,87 @@ class SurfaceViewer4D(WebvizPluginABC):
         print("Reading maps metadata from", surface_metadata_file)
         self.surface_metadata_file = surface_metadata_file
         self.surface_metadata = (
-            read_csv(csv_file=surface_metadata_file)
+            read_surface_metadata(csv_file=surface_metadata_file)
+            if surface_metadata_file is not None
+            else None
+        )
+        self.surface_catalog = SurfaceCatalog(self.surface_metadata)
+        # Precomputed surface statistics (only min and max computed if missing)
+        # Precomputed surface statistics (computed on demand if missing)
+        statistics_file = (
+            get_statistics_file(surface_metadata_file)
             if surface_metadata_file is not None
             else None
         )
+        self.surface_statistics = SurfaceStatistics(statistics_file)
+
+        # Memory budget for loaded surfaces and rendered surface layers
+        surface_cache_mb = self.shared_settings.get(
+            "surface_cache_mb", DEFAULT_CACHE_MB
+        )
+        SURFACE_CACHE.resize(int(surface_cache_mb * 1024**2))
+
+        # Render surfaces at (at least) this number of pixels along the longest
+        # side, using a downsampled level of large surfaces. 0 => full resolution
+        self.map_image_size = self.shared_settings.get("map_image_size", 1200)
+
+        # Serve surface images by content hash instead of as inline data urls
+        set_image_route(
+            app,
+            self.shared_settings.get("image_cache_directory"),
+            self.shared_settings.get(
+                "image_cache_directory_mb", DEFAULT_IMAGE_DIRECTORY_MB
+            ),
+        )
+
+        # Background rendering of neighbouring realizations/iterations/intervals
+        self.prefetcher = SurfacePrefetcher(
+            self.make_surface_map_layer,
+            max_workers=self.shared_settings.get("prefetch_workers", 2),
+        )
+
+        # Ensemble statistics computed on demand from the realization surfaces
+        self.aggregation_names = (
+            get_aggregation_names()
+            if self.shared_settings.get("computed_aggregations", True)
+            else []
+        )
+        self.aggregation_workers = self.shared_settings.get("aggregation_workers", 4)
+
+        # Ranking of the realizations by misfit to the observed map
+        self.misfit_workers = self.shared_settings.get("misfit_workers", 4)
+
+        # Point probes: values of all realizations at a clicked position, averaged
+        # over (2 * probe_window + 1)^2 nodes
+        self.probe_window = self.shared_settings.get("probe_window", 0)
+        cube_directory_mb = self.shared_settings.get(
+            "cube_directory_mb", DEFAULT_CUBE_DIRECTORY_MB
+        )
+        ENSEMBLE_CUBES.configure(max_bytes=int(cube_directory_mb * 1024**2))
+
+        # Simplified levels of the well and polygon layers (tolerances in map
+        # units), selected from the map extent shown with this number of pixels.
+        # The level does not follow the zoom, so keep the tolerances small
+        # ([] turns simplification off)
+        self.polyline_tolerances = self.shared_settings.get(
+            "polyline_tolerances", DEFAULT_TOLERANCES
+        )
+        self.polyline_map_pixels = self.shared_settings.get(
+            "polyline_map_pixels", DEFAULT_MAP_PIXELS
+        )
+
+        # Decimals of the well and polygon positions sent to the maps (None =>
+        # full precision)
+        self.polyline_decimals = self.shared_settings.get(
+            "polyline_decimals", DEFAULT_DECIMALS
+        )
+
+        # Memory-mapped copies of the surfaces (default: next to the surface files)
+        surface_store = self.shared_settings.get("surface_store", {})
+        configure_surface_store(
+            directory=surface_store.get("directory"),
+            enabled=surface_store.get("enabled", True),
+        )
 
         # Read custom colormaps
         print("Reading custom colormaps from:", colormap_data)
@@ -154,6 +287,9 @@ class SurfaceViewer4D(WebvizPluginABC):
             ]
             load_custom_colormaps(self.colormap_files)
 
+        # Encode all colormap images once
+        COLORMAP_REGISTRY.fill()
+
         # Read attribute maps settings (min-/max-values)
         self.surface_scaling_file = surface_scaling_file
         self.colormap_settings = self.load_surface_scaling(self.surface_scaling_file)
@@ -168,11 +304,34 @@ class SurfaceViewer4D(WebvizPluginABC):
             # self.delimiter = None
             self.attribute_settings = self.settings.get("attribute_settings")
             self.default_colormap = self.settings.get("default_colormap", "seismic_r")
+            configure_image_encoder(self.settings.get("image_encoding"))
         else:
             self.settings = None
             self.default_colormap = "seismic_r"
             print("WARNING: no settings file found, using default values")
 
+        # Colormap of the difference map (map A - map B)
+        self.difference_colormap = (
+            self.settings.get("difference_colormap", "seismic")
+            if self.settings
+            else "seismic"
+        )
+
+        # Intervals of additive attributes derived from the incremental intervals
+        self.derived_intervals = DerivedIntervals(
+            self.surface_metadata,
+            self.settings.get("additive_attributes") if self.settings else None,
+            self.interval_mode,
+        )
+
+        for map_type, options in self.selection_dict.items():
+            if options and self.derived_intervals.get_intervals(map_type):
+                options["interval"] = options["interval"] + [
+                    interval
+                    for interval in self.derived_intervals.get_intervals(map_type)
+                    if interval not in options["interval"]
+                ]
+
         # Define default map settings
         map_defaults = [map1_defaults, map2_defaults, map3_defaults]
         self.map_defaults = define_map_defaults(
@@ -214,6 +373,7 @@ class SurfaceViewer4D(WebvizPluginABC):
 
                 if layer:
                     self.additional_layers.append(layer)
+                    get_layer_levels(layer, self.polyline_tolerances)
 
         # Read update dates and well data
         #    self.drilled_wells_df: dataframe with wellpaths (x- and y positions) for all drilled wells
@@ -227,8 +387,10 @@ class SurfaceViewer4D(WebvizPluginABC):
             delta = 40  # Well trajectory resampling (along MD)
             self.process_well_data(delta)
 
-            print("Loading all well layers ...")
+            print("Loading basic well layers ...")
+            start_time = time.perf_counter()
             self.create_well_layers()
+            print_stage_time("Well layers created", start_time)
 
         # Create selectors (attributes, names and dates) for all 3 maps
         self.selector = SurfaceSelector(app, self.selection_dict, self.map_defaults[0])
@@ -253,7 +415,10 @@ class SurfaceViewer4D(WebvizPluginABC):
                 store_functions.append((get_path, [{"path": Path(fn)}]))
 
         store_functions.append(
-            (read_csv, [{"csv_file": Path(self.surface_metadata_file)}])
+            (
+                read_surface_metadata,
+                [{"csv_file": Path(self.surface_metadata_file)}],
+            )
         )
         if self.surface_scaling_file is not None:
             store_functions.append(
@@ -325,47 +490,163 @@ class SurfaceViewer4D(WebvizPluginABC):
 
     def realizations(self, map_number):
         map_type = self.map_defaults[map_number]["map_type"]
-        return self.selection_dict[map_type]["realization"]
+        realizations = self.selection_dict[map_type]["realization"]
+
+        if map_type == self.simulations:
+            realizations = realizations + self.aggregation_names
+
+        return realizations
 
     @property
     def layout(self):
         return set_layout(parent=self)
 
-    def get_real_runpath(self, data, iteration, real, map_type):
+    def get_real_runpath(self, data, iteration, real, map_type, verbose=True):
         selected_interval = data["date"]
         name = data["name"]
         attribute = data["attr"]
 
-        if self.interval_mode == "normal":
-            time2 = selected_interval[0:10]
-            time1 = selected_interval[11:]
-        else:
-            time1 = selected_interval[0:10]
-            time2 = selected_interval[11:]
-
-        self.surface_metadata.replace(np.nan, "", inplace=True)
-
-        try:
-            selected_metadata = self.surface_metadata[
-                (self.surface_metadata["fmu_id.realization"] == real)
-                & (self.surface_metadata["fmu_id.iteration"] == iteration)
-                & (self.surface_metadata["map_type"] == map_type)
-                & (self.surface_metadata["data.time.t1"] == time1)
-                & (self.surface_metadata["data.time.t2"] == time2)
-                & (self.surface_metadata["data.name"] == name)
-                & (self.surface_metadata["data.attribute"] == attribute)
-            ]
+        time1, time2 = get_interval_times(selected_interval, self.interval_mode)
 
-            filepath = selected_metadata["filename"].values[0]
-            path = get_path(Path(filepath))
+        filepath = self.surface_catalog.get_filename(
+            map_type, real, iteration, name, attribute, time1, time2
+        )
 
-        except:
+        if filepath:
+            path = get_path(Path(filepath))
+        else:
             path = ""
-            print("WARNING: selected map not found. Selection criteria are:")
-            print(map_type, real, iteration, name, attribute, time1, time2)
+
+            if verbose:
+                print("WARNING: selected map not found. Selection criteria are:")
+                print(map_type, real, iteration, name, attribute, time1, time2)
 
         return path
 
+    def get_realization_files(self, data, iteration, map_type):
+        """Return {realization: surface file} of the existing realization
+        surfaces of a selection"""
+        time1, time2 = get_interval_times(data["date"], self.interval_mode)
+
+        filenames = self.surface_catalog.get_realization_filenames(
+            map_type, iteration, data["name"], data["attr"], time1, time2
+        )
+        filepaths = {
+            realization: get_path(Path(filename))
+            for realization, filename in filenames.items()
+        }
+
+        return {
+            realization: filepath
+            for realization, filepath in filepaths.items()
+            if os.path.isfile(filepath)
+        }
+
+    def get_derived_surface(self, data, iteration, real, map_type):
+        """Return (cache key, surface) of a derived interval as the sum of the
+        incremental surfaces (None if an increment is missing)"""
+        time1, time2 = get_interval_times(data["date"], self.interval_mode)
+        chain = self.derived_intervals.get_chain(map_type, time1, time2)
+
+        if chain is None:
+            return None
+
+        surface_files = []
+
+        for date1, date2 in zip(chain[:-1], chain[1:]):
+            filepath = self.surface_catalog.get_filename(
+                map_type, real, iteration, data["name"], data["attr"], date1, date2
+            )
+            filepath = get_path(Path(filepath)) if filepath else None
+
+            if filepath is not None and not os.path.isfile(filepath):
+                filepath = None
+
+            surface_files.append(filepath)
+
+        return sum_increments(surface_files, chain.index(time1), chain.index(time2))
+
+    def get_realization_misfit(self, data, iteration, map_idx):
+        """Return {realization: misfit scores} between the observed map and all
+        realizations of a selection (empty if there is no observed map)"""
+        map_type = self.map_defaults[map_idx]["map_type"]
+        observed_options = self.selection_dict.get(self.observations)
+
+        if not observed_options:
+            return {}
+
+        observed_file = self.get_real_runpath(
+            data,
+            observed_options["iteration"][0],
+            observed_options["realization"][0],
+            self.observations,
+            verbose=False,
+        )
+
+        if not os.path.isfile(observed_file):
+            return {}
+
+        surface_files = self.get_realization_files(data, iteration, map_type)
+
+        return get_misfit_scores(
+            observed_file, surface_files, workers=self.misfit_workers
+        )
+
+    def make_probe_figure(self, map_idx, data, iteration, marker_point):
+        """Return a histogram/box plot of the values of all realizations at a
+        position (marker_point is [x, y] in map coordinates)"""
+        data = json.loads(data)
+        map_type = self.map_defaults[map_idx]["map_type"]
+        title = data["attr"] + " (" + data["name"] + ") " + data["date"]
+
+        if map_type != self.simulations:
+            return {"layout": {"title": {"text": "Select a point in a simulated map"}}}
+
+        surface_files = self.get_realization_files(data, iteration, map_type)
+
+        if not surface_files:
+            return {"layout": {"title": {"text": "No realizations: " + title}}}
+
+        cube = get_ensemble_cube(surface_files, workers=self.aggregation_workers)
+        values = cube.probe(marker_point[0], marker_point[1], window=self.probe_window)
+
+        if values is None:
+            return {"layout": {"title": {"text": "Point outside the map: " + title}}}
+
+        unit = (self.attribute_settings or {}).get(data["attr"], {}).get("unit", "")
+
+        return get_probe_figure(
+            values,
+            cube.realizations,
+            title
+            + " at ("
+            + f"{marker_point[0]:.0f}"
+            + ", "
+            + f"{marker_point[1]:.0f}"
+            + ")",
+            unit,
+        )
+
+    def get_realization_options(self, map_idx, data, iteration, metric=None):
+        """Return the realization dropdown options of a map, ranked by misfit
+        to the observed map and annotated with the scores if a metric is given"""
+        realizations = self.realizations(map_idx)
+
+        if not metric:
+            return [{"label": real, "value": real} for real in realizations]
+
+        scores = self.get_realization_misfit(json.loads(data), iteration, map_idx)
+        ranked = rank_realizations(scores, metric)
+
+        return [
+            {"label": get_misfit_label(real, scores[real]), "value": real}
+            for real in ranked
+        ] + [
+            {"label": real, "value": real}
+            for real in realizations
+            if real not in scores
+        ]
+
     def get_heading(self, map_ind, observation_type):
         if self.map_defaults[map_ind]["map_type"] == observation_type:
             txt = "Observed map: "
@@ -403,16 +684,28 @@ class SurfaceViewer4D(WebvizPluginABC):
 
                 well_layer = make_new_well_layer(
                     well_layer_file,
-                    self.pdm_wells_df,
+                    self.pdm_wells_index,
                     label,
                 )
 
                 if well_layer is not None:
                     interval_well_layers.append(well_layer)
-                    self.layer_files.append(well_layer_file)
 
         return interval_well_layers
 
+    def get_additional_layer_files(self):
+        """Return the well layer files of all intervals (without reading them)"""
+        layer_files = []
+
+        for interval, interval_overview in self.intervals.items():
+            if get_dates(interval)[0] <= self.production_update:
+                layer_dir = Path(self.well_layer_dir / "additional" / interval)
+
+                for value in interval_overview.values():
+                    layer_files.append(Path(layer_dir / value))
+
+        return layer_files
+
     def get_map_scaling(self, data, map_type, realization):
         min_max = None
         colormap_settings = self.colormap_settings
@@ -433,13 +726,228 @@ class SurfaceViewer4D(WebvizPluginABC):
 
         return min_max
 
+    def get_map_surface(self, data, iteration, real, map_type, verbose=True):
+        """Return (cache key, surface, surface file) for a selection (None if
+        no map). The surface file is None for computed surfaces"""
+        aggregation = get_aggregation(real)
+        surface_file = None
+
+        if aggregation is None and self.derived_intervals.is_derived(
+            map_type, data["attr"], data["date"]
+        ):
+            derived_surface = self.get_derived_surface(data, iteration, real, map_type)
+
+            if derived_surface is None:
+                return None
+
+            surface_key, surface = derived_surface
+        elif aggregation is None:
+            surface_file = self.get_real_runpath(
+                data, iteration, real, map_type, verbose=verbose
+            )
+
+            if not os.path.isfile(surface_file):
+                return None
+
+            surface = load_surface(surface_file)
+            surface_key = file_key(surface_file)
+        else:
+            surface_files = self.get_realization_files(data, iteration, map_type)
+
+            if not surface_files:
+                return None
+
+            surface_key, surface = get_aggregated_surface(
+                list(surface_files.values()),
+                aggregation,
+                workers=self.aggregation_workers,
+            )
+
+        return surface_key, surface, surface_file
+
+    def make_surface_map_layer(
+        self, data, iteration, real, attribute_settings, map_type, verbose=True
+    ):
+        """Return the surface image layer for a selection (None if no map)"""
+        map_surface = self.get_map_surface(
+            data, iteration, real, map_type, verbose=verbose
+        )
+
+        if map_surface is None:
+            return None
+
+        surface_key, surface, surface_file = map_surface
+        statistics = self.get_surface_min_max(surface_key, surface, surface_file)
+        min_val, max_val = get_map_min_max(
+            surface, attribute_settings, data, statistics=statistics
+        )
+        metadata = self.get_map_scaling(data, map_type, real)
+
+        return get_cached_surface_layer(
+            surface_key,
+            lambda: surface,
+            name=data["attr"],
+            color=attribute_settings.get(data["attr"], {}).get(
+                "color", self.default_colormap
+            ),
+            min_val=min_val,
+            max_val=max_val,
+            unit=attribute_settings.get(data["attr"], {}).get("unit", ""),
+            hillshading=False,
+            min_max_df=metadata,
+            max_size=self.map_image_size,
+            value_range=(statistics["min"], statistics["max"]),
+        )
+
+    def get_surface_min_max(self, surface_key, surface, surface_file=None):
+        """Return the min and max statistics of a map surface: from the
+        statistics file, or computed once per surface file or cached surface"""
+        if surface_file is not None:
+            return self.surface_statistics.get_min_max(surface_file, surface)
+
+        return SURFACE_CACHE.get_or_create(
+            ("min_max", surface_key), lambda: compute_min_max(surface.values)
+        )
+
+    def make_difference_map(self, pair, selections, attribute_settings):
+        """Return heading, info, layers and label of the difference map between
+        two of the maps. selections holds (data, iteration, realization) per map"""
+        map_indices = [int(index) for index in pair.split("-")]
+        map_surfaces = []
+        attribute_settings = json.loads(attribute_settings)
+
+        for map_idx in map_indices:
+            data, iteration, real = selections[map_idx]
+            map_type = self.map_defaults[map_idx]["map_type"]
+            map_surface = self.get_map_surface(
+                json.loads(data), iteration, real, map_type, verbose=False
+            )
+
+            if map_surface is None:
+                return "Selected maps don't exist", "-", self.get_map_layers([]), "-"
+
+            map_surfaces.append(map_surface)
+
+        (key, surface, _file), (other_key, other_surface, _other_file) = map_surfaces
+        residual_key = ("residual", key, other_key)
+        residual = SURFACE_CACHE.get_or_create(
+            residual_key, lambda: get_residual_surface(surface, other_surface)
+        )
+
+        # The maps may not overlap (or only where one of them is undefined)
+        if not residual.values.count():
+            return "The selected maps don't overlap", "-", self.get_map_layers([]), "-"
+
+        data = json.loads(selections[map_indices[0]][0])
+        statistics = self.get_surface_min_max(residual_key, residual)
+        min_val, max_val = get_map_min_max(residual, {}, data, statistics=statistics)
+
+        surface_layers = [
+            get_cached_surface_layer(
+                residual_key,
+                lambda: residual,
+                name="Difference",
+                color=self.difference_colormap,
+                min_val=min_val,
+                max_val=max_val,
+                unit=attribute_settings.get(data["attr"], {}).get("unit", ""),
+                hillshading=False,
+                max_size=self.map_image_size,
+                value_range=(statistics["min"], statistics["max"]),
+            )
+        ]
+        heading = (
+            "Difference map: map "
+            + str(map_indices[0] + 1)
+            + " - map "
+            + str(map_indices[1] + 1)
+        )
+        sim_info = " - ".join(selections[map_idx][2] for map_idx in map_indices)
+        label = get_plot_label(self.settings, data["date"])
+
+        return heading, sim_info, self.get_map_layers(surface_layers), label
+
+    def get_displayed_layers(self, layers, bounds):
+        """Return the simplified level of well and polygon layers which fits the
+        extent (bounds) of the surface, with rounded positions"""
+        return [
+            get_quantized_layer(
+                get_layer_level(
+                    layer, bounds, self.polyline_tolerances, self.polyline_map_pixels
+                ),
+                self.polyline_decimals,
+            )
+            for layer in layers
+        ]
+
+    def get_map_layers(self, surface_layers, static_index=1):
+        """Return the data of a map layers store: the surface layer (first) and
+        the map specific layers, and the url to the bundle of static layers
+        (additional polygons and basic wells) to insert at static_index"""
+        if not surface_layers:
+            return {"layers": [], "static_index": 0, "static_url": None}
+
+        bounds = surface_layers[0]["data"][0]["bounds"]
+        static_layers = list(self.additional_layers)
+
+        if self.basic_well_layers:
+            static_layers.extend(self.well_basic_layers)
+
+        return {
+            "layers": surface_layers[:1]
+            + self.get_displayed_layers(surface_layers[1:], bounds),
+            "static_index": static_index,
+            "static_url": LAYER_BUNDLES.get_url(
+                self.get_displayed_layers(static_layers, bounds)
+            ),
+        }
+
+    def get_prefetch_selections(
+        self, data, iteration, real, attribute_settings, map_idx
+    ):
+        """Return the neighbouring selections (realizations, iterations and
+        intervals) of a map, as arguments to make_surface_map_layer"""
+        map_type = self.map_defaults[map_idx]["map_type"]
+        intervals = self.selection_dict[map_type]["interval"]
+        selections = []
+
+        # Computed statistics are not prefetched (they read all realizations)
+        realizations = [
+            realization
+            for realization in self.realizations(map_idx)
+            if get_aggregation(realization) is None
+        ]
+
+        for realization in get_neighbours(real, realizations):
+            selections.append(
+                (data, iteration, realization, attribute_settings, map_type, False)
+            )
+
+        for neighbour in get_neighbours(iteration, self.iterations(map_idx)):
+            selections.append(
+                (data, neighbour, real, attribute_settings, map_type, False)
+            )
+
+        for interval in get_neighbours(data["date"], intervals):
+            selections.append(
+                (
+                    dict(data, date=interval),
+                    iteration,
+                    real,
+                    attribute_settings,
+                    map_type,
+                    False,
+                )
+            )
+
+        return selections
+
     def make_map(self, data, iteration, real, attribute_settings, map_idx):
         self.realization = real
         self.iteration = iteration
         data = json.loads(data)
         selected_zone = data.get("name")
         map_type = self.map_defaults[map_idx]["map_type"]
-        surface_file = self.get_real_runpath(data, iteration, real, map_type)
 
         if "realization" in real:
             self.surface_type = "realization"
@@ -448,27 +956,19 @@ class SurfaceViewer4D(WebvizPluginABC):
         else:
             self.surface_type = "aggregation"
 
-        if os.path.isfile(surface_file):
-            surface = load_surface(surface_file)
-            attribute_settings = json.loads(attribute_settings)
-
-            min_val, max_val = get_map_min_max(surface, attribute_settings, data)
-            metadata = self.get_map_scaling(data, map_type, real)
-
-            surface_layers = [
-                make_surface_layer(
-                    surface,
-                    name=data["attr"],
-                    color=attribute_settings.get(data["attr"], {}).get(
-                        "color", self.default_colormap
-                    ),
-                    min_val=min_val,
-                    max_val=max_val,
-                    unit=attribute_settings.get(data["attr"], {}).get("unit", ""),
-                    hillshading=False,
-                    min_max_df=metadata,
-                )
-            ]
+        attribute_settings = json.loads(attribute_settings)
+        surface_layer = self.make_surface_map_layer(
+            data, iteration, real, attribute_settings, map_type
+        )
+
+        if surface_layer is not None:
+            surface_layers = [surface_layer]
+            self.prefetcher.schedule(
+                map_idx,
+                self.get_prefetch_selections(
+                    data, iteration, real, attribute_settings, map_idx
+                ),
+            )
 
             # Check if there are polygons available for the new map
             if self.zone_polygon_layers and len(self.zone_polygon_layers) > 0:
@@ -482,22 +982,18 @@ class SurfaceViewer4D(WebvizPluginABC):
 
                     surface_layers.append(layer)
 
-            # Add additional polygon layers (if existing)
-            if self.additional_layers and len(self.additional_layers) > 0:
-                for layer in self.additional_layers:
-                    surface_layers.append(layer)
-
-            if self.basic_well_layers:
-                for well_layer in self.well_basic_layers:
-                    surface_layers.append(well_layer)
-
+            # The additional polygon and basic well layers (shared by all maps)
+            # follow the zone polygons
+            static_index = len(surface_layers)
             interval = data["date"]
 
             # Load new interval well layers if selected interval has changed (or has not been set)
             if interval != self.selected_intervals[map_idx]:
-                if get_dates(interval)[0] <= self.last_observed_date:
-                    index = self.interval_names.index(interval)
-                    self.interval_well_layers = self.all_interval_layers[index]
+                if (
+                    get_dates(interval)[0] <= self.last_observed_date
+                    and interval in self.interval_layers
+                ):
+                    self.interval_well_layers = self.interval_layers.get(interval)
                     self.selected_intervals[map_idx] = interval
                 else:
                     self.interval_well_layers = []
@@ -505,6 +1001,7 @@ class SurfaceViewer4D(WebvizPluginABC):
             for interval_layer in self.interval_well_layers:
                 surface_layers.append(interval_layer)
 
+            map_layers = self.get_map_layers(surface_layers, static_index)
             self.selected_names[map_idx] = data["name"]
             self.selected_attributes[map_idx] = data["attr"]
             self.selected_iterations[map_idx] = iteration
@@ -515,19 +1012,18 @@ class SurfaceViewer4D(WebvizPluginABC):
         else:
             heading = "Selected map doesn't exist"
             sim_info = "-"
-            surface_layers = []
+            map_layers = self.get_map_layers([])
             label = "-"
 
         return (
             heading,
             sim_info,
-            surface_layers,
+            map_layers,
             label,
         )
 
     def create_well_layers(self):
         self.well_basic_layers = []
-        self.all_interval_layers = []
         self.layer_files = []
 
         basic_layers = self.well_layers_overview.get("basic")
@@ -538,38 +1034,62 @@ class SurfaceViewer4D(WebvizPluginABC):
 
             well_layer = make_new_well_layer(
                 layer_file,
-                self.all_wells_df,
+                self.all_wells_index,
                 label,
             )
 
             if well_layer:
                 self.well_basic_layers.append(well_layer)
                 self.layer_files.append(layer_file)
+                get_layer_levels(well_layer, self.polyline_tolerances)
 
+        # The interval layers are built when an interval is first selected
         self.intervals = self.well_layers_overview.get("additional")
-        self.interval_names = []
+        self.interval_names = list(self.intervals)
+        self.layer_files.extend(self.get_additional_layer_files())
+
+        well_layer_cache_mb = self.shared_settings.get(
+            "well_layer_cache_mb", DEFAULT_WELL_LAYER_CACHE_MB
+        )
+        self.interval_layers = IntervalWellLayers(
+            self.create_additional_well_layers,
+            self.interval_names,
+            int(well_layer_cache_mb * 1024**2),
+        )
 
-        for interval in self.intervals:
-            interval_layers = self.create_additional_well_layers(interval)
-            self.all_interval_layers.append(interval_layers)
-            self.interval_names.append(interval)
+        # Optionally build all interval layers in the background, after a
+        # delay (in seconds) to let the server start first
+        warm_delay = self.shared_settings.get("well_layer_warm_delay")
+
+        if warm_delay is not None:
+            self.interval_layers.warm(warm_delay)
 
     def process_well_data(self, delta):
+        start_time = time.perf_counter()
         self.well_update, self.production_update = self.get_dates()
 
+        # Read the wellbore info once, the plugin keeps an unmodified copy
         self.wellbore_info = read_csv(
             csv_file=Path(self.well_data) / "wellbore_info.csv"
         )
-
-        self.all_wells_info = read_csv(
-            csv_file=Path(self.well_data) / "wellbore_info.csv"
-        )
+        self.all_wells_info = self.wellbore_info.copy()
 
         self.all_wells_info["file_name"] = self.all_wells_info["file_name"].apply(
             lambda x: get_path(Path(x))
         )
+        start_time = print_stage_time("Wellbore info read", start_time)
+
+        # Parse every (new or changed) well file once, all well tables are
+        # built from these
+        well_trajectories = load_cached_trajectories(
+            get_wellfiles(self.all_wells_info),
+            delta,
+            get_snapshot_path(Path(self.well_data) / "well_trajectories"),
+            workers=self.shared_settings.get("well_workers", os.cpu_count()),
+        )
+        start_time = print_stage_time("Well files parsed", start_time)
 
-        self.all_wells_df = load_all_wells(self.all_wells_info, delta)
+        self.all_wells_df = make_wells_dataframe(well_trajectories, self.all_wells_info)
         self.drilled_wells_files = list(
             self.wellbore_info[self.wellbore_info["layer_name"] == "Drilled wells"][
                 "file_name"
@@ -586,7 +1106,12 @@ class SurfaceViewer4D(WebvizPluginABC):
             self.drilled_wells_info["wellbore.pdm_name"] != ""
         ]
 
-        self.pdm_wells_df = load_all_wells(self.pdm_wells_info, delta)
+        self.pdm_wells_df = make_wells_dataframe(well_trajectories, self.pdm_wells_info)
+
+        # Per-wellbore slices shared by all well layers
+        self.all_wells_index = WellIndex(self.all_wells_df)
+        self.pdm_wells_index = WellIndex(self.pdm_wells_df)
+        start_time = print_stage_time("Well tables created", start_time)
 
         layer_overview_file = get_path(Path(self.well_layer_dir / "well_layers.yaml"))
         self.well_layers_overview = read_config(layer_overview_file)
@@ -760,4 +1285,16 @@ class SurfaceViewer4D(WebvizPluginABC):
         set_first_map(parent=self, app=app)
         set_second_map(parent=self, app=app)
         set_third_map(parent=self, app=app)
+        set_difference_map(parent=self, app=app)
+        set_map_layers(parent=self, app=app)
+        set_realization_ranking(parent=self, app=app)
+        set_point_probe(parent=self, app=app)
         change_maps_from_button(parent=self, app=app)
+
+
+def print_stage_time(stage, start_time):
+    """Print the time used by a startup stage and return the current time"""
+    end_time = time.perf_counter()
+    print(stage, "in", f"{end_time - start_time:.2f}", "s")
+
+    return end_time
@@ -7,6 +7,8 @@ from pathlib import Path
 import pandas as pd
 from webviz_config.webviz_store import webvizstore
 
+from webviz_4d._datainput._snapshot import read_csv_snapshot
+
 
 @webvizstore
 def get_path(path) -> Path:
@@ -38,6 +40,11 @@ def read_csv(
     return pd.read_csv(csv_file, sep=sep, dtype=dtype, low_memory=False)
 
 
+@webvizstore
+def read_surface_metadata(csv_file: Path) -> pd.DataFrame:
+    return read_csv_snapshot(csv_file)
+
+
 @webvizstore
 def find_files(folder: Path, suffix: str) -> BytesIO:
     return BytesIO(